@@ -0,0 +1,129 @@
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from PIL import Image
+
+from image_organizer.batch_sort.rules import read_metadata
+from image_organizer.catalog.catalog import Catalog, CatalogFilter
+from image_organizer.catalog.indexing import DEFAULT_INDEX_WORKERS, index_images
+from image_organizer.image_utils.discovery import discover_images
+
+CAMERAS = ('Alpha', 'Beta', 'Gamma', 'Delta')
+SIZES = ((320, 240), (240, 320), (400, 300), (160, 120))
+
+MAKE_TAG = 0x010F
+MODEL_TAG = 0x0110
+DATE_TIME_TAG = 0x0132
+
+
+# * Small JPEGs with the EXIF the catalog reads, spread over a few directories
+def generate_images(root: Path, count: int, per_directory: int) -> None:
+    for index in range(count):
+        directory = root / f'dir{index // per_directory:03d}'
+        directory.mkdir(exist_ok=True)
+
+        exif = Image.Exif()
+        exif[MAKE_TAG] = 'Make'
+        exif[MODEL_TAG] = CAMERAS[index % len(CAMERAS)]
+        year, month, day = 2010 + index % 12, 1 + index % 12, 1 + index % 28
+        exif[DATE_TIME_TAG] = f'{year}:{month:02d}:{day:02d} 12:00:00'
+
+        image = Image.new('RGB', SIZES[index % len(SIZES)], (index % 256, 80, 160))
+        image.save(directory / f'{index:06d}.jpg', exif=exif)
+
+
+# * What sorting by date needs without the catalog, every session
+def without_catalog(root: Path, workers: int) -> list[Path]:
+    image_paths = list(discover_images([root], recursive=True))
+
+    with ThreadPoolExecutor(workers) as executor:
+        metadata = list(executor.map(read_metadata, image_paths))
+
+    dates = {
+        image_path: image_metadata.date
+        for image_path, image_metadata in zip(image_paths, metadata)
+    }
+    return sorted(
+        image_paths,
+        key=lambda image_path: (
+            dates[image_path] is None,
+            dates[image_path] or 0,
+            str(image_path)
+        )
+    )
+
+
+def with_catalog(root: Path, catalog: Catalog, workers: int) -> list[Path]:
+    image_paths = list(discover_images([root], recursive=True, catalog=catalog))
+
+    for _ in index_images(image_paths, catalog, workers):
+        pass
+
+    return catalog.ordered(image_paths, 'date')
+
+
+def main() -> None:
+    ap = ArgumentParser()
+    ap.add_argument('--images', type=int, default=20_000)
+    ap.add_argument('--per-directory', type=int, default=500)
+    ap.add_argument('--workers', type=int, default=DEFAULT_INDEX_WORKERS)
+    ap.add_argument(
+        '--root',
+        type=Path,
+        default=None,
+        help='Reuse already generated images'
+    )
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='catalog-bench-') as temporary_directory:
+        root: Path = args.root or Path(temporary_directory) / 'images'
+
+        if args.root is None:
+            root.mkdir()
+
+            start = time.perf_counter()
+            generate_images(root, args.images, args.per_directory)
+            elapsed_s = time.perf_counter() - start
+            print(f'generated {args.images} images in {elapsed_s:.1f}s')
+
+        start = time.perf_counter()
+        expected = without_catalog(root, args.workers)
+        print(f'{"no catalog":<24}{time.perf_counter() - start:>10.2f}s')
+
+        catalog = Catalog(Path(temporary_directory) / 'catalog.sqlite3')
+
+        start = time.perf_counter()
+        first = with_catalog(root, catalog, args.workers)
+        print(f'{"first session":<24}{time.perf_counter() - start:>10.2f}s')
+
+        catalog.close()
+
+        start = time.perf_counter()
+        relaunch = with_catalog(root, catalog, args.workers)
+        print(f'{"relaunch":<24}{time.perf_counter() - start:>10.2f}s')
+
+        start = time.perf_counter()
+        catalog_filter = CatalogFilter(camera='alpha', min_megapixels=0.05)
+        filtered = catalog.ordered(relaunch, 'camera', catalog_filter)
+        print(f'{"filter by camera":<24}{time.perf_counter() - start:>10.2f}s')
+
+        catalog.close()
+
+    if first != expected or relaunch != expected:
+        print(
+            'the catalog sorted the images differently than their metadata',
+            file=sys.stderr
+        )
+        sys.exit(1)
+
+    if len(filtered) != len(expected[::len(CAMERAS)]):
+        print(f'the camera filter found {len(filtered)} images', file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+from PIL import ExifTags, Image
+
+SIZES: dict[str, tuple[int, int]] = {
+    'small': (800, 600),
+    'medium': (1920, 1080),
+    'large': (4000, 3000)
+}
+
+# * Modes every format can store, the rest of the combinations are skipped
+FORMAT_MODES: dict[str, tuple[str, ...]] = {
+    'JPEG': ('RGB', 'L', 'CMYK'),
+    'PNG': ('RGB', 'RGBA', 'L', 'P', 'I;16'),
+    'WEBP': ('RGB', 'RGBA'),
+    'TIFF': ('RGB', 'RGBA', 'L', 'P', 'CMYK', 'I;16')
+}
+
+EXTENSIONS = {
+    'JPEG': '.jpg',
+    'PNG': '.png',
+    'WEBP': '.webp',
+    'TIFF': '.tiff'
+}
+
+# * Upright, upside down and both rotations which swap width and height
+ORIENTATIONS = (1, 3, 6, 8)
+ORIENTED_FORMATS = ('JPEG', 'WEBP')
+
+SEED = 1234
+
+
+def case_name(image_format: str, mode: str, size_name: str, orientation: int) -> str:
+    mode_name = mode.lower().replace(';', '')
+    return f'{image_format.lower()}-{mode_name}-{size_name}-o{orientation}'
+
+
+@dataclass(frozen=True)
+class CorpusImage:
+    path: Path
+    format: str
+    mode: str
+    size_name: str
+    orientation: int
+
+    @property
+    def name(self) -> str:
+        return case_name(self.format, self.mode, self.size_name, self.orientation)
+
+
+# * Smooth gradients with a bit of noise,
+# * so the images compress like photos do and not like solid colors or pure noise.
+# * Seeded, so every run benchmarks exactly the same pixels.
+def photo_like(size: tuple[int, int], seed: int = SEED) -> Image.Image:
+    width, height = size
+    rng = np.random.default_rng(seed)
+
+    x = np.linspace(0, 1, width, dtype=np.float32)
+    y = np.linspace(0, 1, height, dtype=np.float32)[:, None]
+    noise = rng.normal(0, 8, (height, width, 3)).astype(np.float32)
+
+    channels = np.stack(np.broadcast_arrays(x * 255, y * 255, (x + y) * 127), axis=-1)
+    pixels = np.clip(channels + noise, 0, 255).astype(np.uint8)
+
+    return Image.fromarray(pixels, 'RGB')
+
+
+def in_mode(image: Image.Image, mode: str) -> Image.Image:
+    if mode == 'I;16':
+        # * Spreads the 8 bits over the whole 16 bit range,
+        # * like a scanner or a RAW export would
+        pixels = np.asarray(image.convert('L'), dtype=np.uint16) * 257
+        return Image.fromarray(pixels, 'I;16')
+
+    if mode == 'P':
+        return image.quantize(256)
+
+    if mode == 'RGBA':
+        rgba = image.convert('RGBA')
+        rgba.putalpha(image.convert('L'))
+
+        return rgba
+
+    return image.convert(mode)
+
+
+def save(image: Image.Image, path: Path, image_format: str, orientation: int) -> None:
+    options: dict[str, object] = {}
+
+    if orientation != 1:
+        exif = Image.Exif()
+        exif[ExifTags.Base.Orientation] = orientation
+        options['exif'] = exif.tobytes()
+
+    if image_format in ('JPEG', 'WEBP'):
+        options['quality'] = 90
+
+    image.save(path, image_format, **options)
+
+
+def corpus_cases(
+    sizes: list[str],
+    formats: list[str] | None = None
+) -> list[tuple[str, str, str, int]]:
+    cases: list[tuple[str, str, str, int]] = []
+
+    for image_format in formats or list(FORMAT_MODES):
+        for mode in FORMAT_MODES[image_format]:
+            for size_name in sizes:
+                cases.append((image_format, mode, size_name, 1))
+
+        if image_format in ORIENTED_FORMATS:
+            for size_name in sizes:
+                cases.extend(
+                    (image_format, 'RGB', size_name, orientation)
+                    for orientation in ORIENTATIONS
+                    if orientation != 1
+                )
+
+    return cases
+
+
+# * Files which already exist are reused, so a corpus directory can be kept between runs
+def generate_corpus(
+    root: Path,
+    sizes: list[str],
+    formats: list[str] | None = None
+) -> list[CorpusImage]:
+    root.mkdir(parents=True, exist_ok=True)
+
+    sources: dict[str, Image.Image] = {}
+    images: list[CorpusImage] = []
+
+    for image_format, mode, size_name, orientation in corpus_cases(sizes, formats):
+        name = case_name(image_format, mode, size_name, orientation)
+        path = root / (name + EXTENSIONS[image_format])
+        images.append(CorpusImage(path, image_format, mode, size_name, orientation))
+
+        if path.exists():
+            continue
+
+        source = sources.get(size_name)
+        if source is None:
+            source = sources[size_name] = photo_like(SIZES[size_name])
+
+        save(in_mode(source, mode), path, image_format, orientation)
+
+    return images
@@ -0,0 +1,89 @@
+import os
+import tempfile
+import time
+from argparse import ArgumentParser
+from pathlib import Path
+
+from image_organizer.image_utils.discovery import DEFAULT_WORKERS, discover_images
+from image_organizer.image_utils.find_images import is_supported
+
+EXTENSIONS = ('.jpg', '.JPG', '.png', '.txt', '.xmp')
+
+
+# * A tree of nested directories, where every file is empty, as only the names matter
+def generate_tree(
+    root: Path,
+    entries: int,
+    files_per_directory: int,
+    fan_out: int
+) -> None:
+    created = 0
+    directories = [root]
+
+    while created < entries:
+        directory = directories.pop(0)
+
+        for index in range(files_per_directory):
+            if created >= entries:
+                return
+
+            extension = EXTENSIONS[created % len(EXTENSIONS)]
+            (directory / f'{index:05d}{extension}').touch()
+            created += 1
+
+        for index in range(fan_out):
+            subdirectory = directory / f'dir{index:03d}'
+            subdirectory.mkdir()
+
+            directories.append(subdirectory)
+            created += 1
+
+
+# * A serial recursive scan producing the same paths, for comparison
+def serial_walk(root: Path) -> int:
+    found: list[Path] = []
+    for directory, _, file_names in os.walk(root):
+        found.extend(Path(directory, name) for name in file_names if is_supported(name))
+
+    return len(found)
+
+
+def main() -> None:
+    ap = ArgumentParser()
+    ap.add_argument('--entries', type=int, default=1_000_000)
+    ap.add_argument('--files-per-directory', type=int, default=500)
+    ap.add_argument('--fan-out', type=int, default=8)
+    ap.add_argument('--workers', type=int, nargs='+', default=[1, 4, DEFAULT_WORKERS])
+    ap.add_argument(
+        '--root',
+        type=Path,
+        default=None,
+        help='Reuse an already generated tree'
+    )
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='discovery-bench-') as temporary_directory:
+        root: Path = args.root or Path(temporary_directory)
+
+        if args.root is None:
+            start = time.perf_counter()
+            generate_tree(root, args.entries, args.files_per_directory, args.fan_out)
+            elapsed = time.perf_counter() - start
+            print(f'generated {args.entries} entries in {elapsed:.1f}s')
+
+        start = time.perf_counter()
+        found = serial_walk(root)
+        elapsed = time.perf_counter() - start
+        print(f'{"os.walk":<16}{found:>10} images{elapsed:>10.2f}s')
+
+        for workers in sorted(set(args.workers)):
+            start = time.perf_counter()
+            images = discover_images([root], recursive=True, workers=workers)
+            found = sum(1 for _ in images)
+            elapsed = time.perf_counter() - start
+
+            print(f'{f"{workers} workers":<16}{found:>10} images{elapsed:>10.2f}s')
+
+
+if __name__ == '__main__':
+    main()
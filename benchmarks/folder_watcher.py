@@ -0,0 +1,142 @@
+import os
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+from pathlib import Path
+
+from image_organizer.image_utils.discovery import discover_images
+from image_organizer.image_utils.folder_watcher import SETTLE_MS, FolderState
+
+
+# * Empty files, the watcher only looks at the names and the ids
+def generate_tree(root: Path, directories: int, files_per_directory: int) -> list[Path]:
+    created: list[Path] = []
+
+    for directory_index in range(directories):
+        directory = root / f'dir{directory_index:04d}'
+        directory.mkdir()
+
+        for index in range(files_per_directory):
+            image_path = directory / f'{index:05d}.jpg'
+            image_path.touch()
+            created.append(image_path)
+
+    return created
+
+
+# * Files from before the settle time are taken as they are
+def age(image_paths: list[Path]) -> None:
+    old = time.time() - 2 * SETTLE_MS / 1000
+    for image_path in image_paths:
+        os.utime(image_path, (old, old))
+
+
+def fail(message: str) -> None:
+    print(message, file=sys.stderr)
+    sys.exit(1)
+
+
+def main() -> None:
+    ap = ArgumentParser()
+    ap.add_argument('--directories', type=int, default=200)
+    ap.add_argument('--files-per-directory', type=int, default=500)
+    ap.add_argument('--changes', type=int, default=100)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='watcher-bench-') as temporary_directory:
+        root = Path(temporary_directory)
+        image_paths = generate_tree(root, args.directories, args.files_per_directory)
+        age(image_paths)
+
+        state = FolderState(recursive=True, include=(), exclude=())
+        seeded = state.seed([root], set(image_paths))
+        if seeded.changes:
+            fail(f'seeding has reported changes: {seeded.changes}')
+
+        directory = root / 'dir0000'
+        created = [directory / f'new{index:05d}.jpg' for index in range(args.changes)]
+        for image_path in created:
+            image_path.touch()
+        age(created)
+
+        deleted = [directory / f'{index:05d}.jpg' for index in range(args.changes)]
+        for image_path in deleted:
+            image_path.unlink()
+
+        renamed = [
+            (directory / f'{index:05d}.jpg', root / 'dir0001' / f'moved{index:05d}.jpg')
+            for index in range(args.changes, 2 * args.changes)
+        ]
+        for old_path, new_path in renamed:
+            old_path.rename(new_path)
+
+        start = time.perf_counter()
+        update = state.update({str(directory), str(root / 'dir0001')})
+        elapsed = time.perf_counter() - start
+        print(f'{"update":<16}{elapsed * 1000:>10.1f}ms')
+
+        start = time.perf_counter()
+        found = sum(1 for _ in discover_images([root], recursive=True))
+        elapsed = time.perf_counter() - start
+        print(f'{"full rescan":<16}{elapsed * 1000:>10.1f}ms  {found} images')
+
+        changes = update.changes
+        if sorted(changes.created) != sorted(created):
+            fail(
+                f'{len(changes.created)} images were created '
+                f'instead of {len(created)}'
+            )
+
+        if sorted(changes.deleted) != sorted(deleted):
+            fail(
+                f'{len(changes.deleted)} images were deleted '
+                f'instead of {len(deleted)}'
+            )
+
+        if sorted(changes.renamed) != sorted(renamed):
+            fail(
+                f'{len(changes.renamed)} images were renamed '
+                f'instead of {len(renamed)}'
+            )
+
+        # * A file which is still being written to
+        # * is only reported once it stops changing
+        partial = directory / 'partial.jpg'
+        partial.write_bytes(b'\xff\xd8' * 1024)
+
+        update = state.update({str(directory)})
+        if partial in update.changes.created or not update.has_unsettled:
+            fail('an image which is still being written to has been reported')
+
+        with open(partial, 'ab') as file:
+            file.write(b'\x00' * 1024)
+
+        update = state.update(set())
+        if partial in update.changes.created:
+            fail('an image which is still growing has been reported')
+
+        time.sleep(SETTLE_MS / 1000)
+        update = state.update(set())
+        if update.changes.created != [partial] or update.has_unsettled:
+            fail('an image which has stopped changing was not reported')
+
+        # * A removed directory takes its images with it
+        subtree = root / 'dir0002'
+        for image_path in subtree.iterdir():
+            image_path.unlink()
+        subtree.rmdir()
+
+        update = state.update({str(root), str(subtree)})
+        deleted_count = len(update.changes.deleted)
+        if deleted_count != args.files_per_directory:
+            fail(f'{deleted_count} images were deleted with their directory')
+
+        if str(subtree) not in update.removed_directories:
+            fail('the removed directory was not reported')
+
+    print('ok')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,568 @@
+import mmap
+import os
+import resource
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+from collections.abc import Callable
+from dataclasses import dataclass
+from functools import partial
+from itertools import accumulate
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+from PIL import Image, ImageOps
+
+from benchmarks.corpus import photo_like
+from benchmarks.pil2pixmap import qimage_rgb
+from image_organizer.image_utils.load_and_resize import (
+    HIGH_BIT_DEPTH_MODES,
+    Dimentions,
+    decode_resized,
+    fit_size,
+    pil2qimage,
+    target_size,
+    to_pixmap_format,
+)
+from image_organizer.image_utils.mapped_decode import (
+    BITS_PER_SAMPLE_TAG,
+    EXTRA_SAMPLES_TAG,
+    IMAGE_LENGTH_TAG,
+    IMAGE_WIDTH_TAG,
+    PLANAR_CONFIGURATION_TAG,
+    ROWS_PER_STRIP_TAG,
+    SAMPLES_PER_PIXEL_TAG,
+    TILE_LENGTH_TAG,
+    TILE_OFFSETS_TAG,
+    TILE_WIDTH_TAG,
+    decode_mapped,
+    read_layout,
+    sample,
+)
+from image_organizer.image_utils.open_image import open_image
+from image_organizer.image_utils.raw_previews import (
+    COMPRESSION_TAG,
+    ORIENTATION_TAG,
+    PHOTOMETRIC_TAG,
+    STRIP_BYTE_COUNTS_TAG,
+    STRIP_OFFSETS_TAG,
+)
+from image_organizer.image_utils.tone_mapping import tone_map
+
+# * Checks the memory mapped decoder against the pixels it was given for every
+# * supported layout, then times it and measures its peak RSS against PIL on files
+# * of several gigabytes:
+# *   python -m benchmarks.mapped_decode --gigabytes 2
+# * Every measurement runs in a fresh process with the file out of the page cache,
+# * so the time includes reading from the disk and the peak RSS is that of the decode
+# * alone. Exits with 1 when any layout is sampled wrong or the preview differs from
+# * PIL's too much.
+
+SHORT = 3
+LONG = 4
+
+TILE_BYTE_COUNTS_TAG = 0x0145
+
+MAX_DIMENSIONS: Dimentions = (1280, 720)
+CHECK_SIZE = (1000, 700)
+CHECK_STEP = 3
+LARGE_WIDTH = 24_576
+TILE_SIZE = 256
+ROWS_PER_STRIP = 16
+
+# * The rows of the large files repeat this texture,
+# * generating gigabytes of it would take minutes
+TEXTURE_ROWS = 512
+
+# * Mean difference per channel between the sampled preview and PIL's,
+# * which filters every pixel
+PREVIEW_TOLERANCE = 6.0
+
+CHILD_HELP = (
+    'Internal, measures a single decode: the method, pil or mapped, and the file'
+)
+
+# * Rows for the file from the given one on, in the samples and byte order of the file
+Rows = Callable[[int, int], npt.NDArray[Any]]
+
+
+@dataclass(frozen=True)
+class TiffOptions:
+    samples: int = 3
+    bits: int = 8
+    photometric: int = 2
+    extra_samples: tuple[int, ...] = ()
+    byte_order: str = '<'
+    tile: int | None = None
+    orientation: int = 1
+
+
+def _ifd(entries: list[tuple[int, int, list[int]]], byte_order: str) -> bytes:
+    entries = sorted(entries)
+    values_offset = 8 + 2 + len(entries) * 12 + 4
+
+    table = struct.pack(byte_order + 'H', len(entries))
+    values = b''
+    for tag, field_type, tag_values in entries:
+        field_format = 'H' if field_type == SHORT else 'I'
+        value_format = f'{byte_order}{len(tag_values)}{field_format}'
+        packed = struct.pack(value_format, *tag_values)
+        count = len(tag_values)
+
+        if len(packed) <= 4:
+            entry = struct.pack(byte_order + 'HHI', tag, field_type, count)
+            table += entry + packed.ljust(4, b'\x00')
+            continue
+
+        offset = values_offset + len(values)
+        table += struct.pack(byte_order + 'HHII', tag, field_type, count, offset)
+        values += packed
+
+    return table + struct.pack(byte_order + 'I', 0) + values
+
+
+def _tiff_header(
+    width: int,
+    height: int,
+    options: TiffOptions,
+    block_sizes: list[int],
+    offsets: list[int]
+) -> bytes:
+    entries = [
+        (IMAGE_WIDTH_TAG, LONG, [width]),
+        (IMAGE_LENGTH_TAG, LONG, [height]),
+        (BITS_PER_SAMPLE_TAG, SHORT, [options.bits] * options.samples),
+        (COMPRESSION_TAG, SHORT, [1]),
+        (PHOTOMETRIC_TAG, SHORT, [options.photometric]),
+        (ORIENTATION_TAG, SHORT, [options.orientation]),
+        (SAMPLES_PER_PIXEL_TAG, SHORT, [options.samples]),
+        (PLANAR_CONFIGURATION_TAG, SHORT, [1])
+    ]
+
+    if len(options.extra_samples) > 0:
+        entries.append((EXTRA_SAMPLES_TAG, SHORT, list(options.extra_samples)))
+
+    if options.tile is not None:
+        entries.extend([
+            (TILE_WIDTH_TAG, LONG, [options.tile]),
+            (TILE_LENGTH_TAG, LONG, [options.tile]),
+            (TILE_OFFSETS_TAG, LONG, offsets),
+            (TILE_BYTE_COUNTS_TAG, LONG, block_sizes)
+        ])
+    else:
+        entries.extend([
+            (STRIP_OFFSETS_TAG, LONG, offsets),
+            (ROWS_PER_STRIP_TAG, LONG, [ROWS_PER_STRIP]),
+            (STRIP_BYTE_COUNTS_TAG, LONG, block_sizes)
+        ])
+
+    magic = b'II' if options.byte_order == '<' else b'MM'
+    header = magic + struct.pack(options.byte_order + 'HI', 42, 8)
+    return header + _ifd(entries, options.byte_order)
+
+
+def write_tiff(
+    path: Path,
+    width: int,
+    height: int,
+    rows: Rows,
+    options: TiffOptions
+) -> None:
+    pixel_bytes = options.samples * options.bits // 8
+
+    if options.tile is None:
+        block_sizes = [
+            min(ROWS_PER_STRIP, height - y) * width * pixel_bytes
+            for y in range(0, height, ROWS_PER_STRIP)
+        ]
+    else:
+        tiles = -(-width // options.tile) * -(-height // options.tile)
+        block_sizes = [options.tile * options.tile * pixel_bytes] * tiles
+
+    # * The header does not change size with the offsets,
+    # * so it is built once to find where the pixels start
+    placeholders = [0] * len(block_sizes)
+    start = len(_tiff_header(width, height, options, block_sizes, placeholders))
+    offsets = list(accumulate(block_sizes[:-1], initial=start))
+
+    with open(path, 'wb') as file:
+        file.write(_tiff_header(width, height, options, block_sizes, offsets))
+
+        if options.tile is None:
+            for y in range(0, height, ROWS_PER_STRIP):
+                file.write(rows(y, min(ROWS_PER_STRIP, height - y)).tobytes())
+
+            return
+
+        tile = options.tile
+        for y in range(0, height, tile):
+            band = rows(y, min(tile, height - y))
+            padded_width = -(-width // tile) * tile
+            padded = np.zeros((tile, padded_width, options.samples), band.dtype)
+            padded[:band.shape[0], :width] = band
+
+            for x in range(0, width, tile):
+                file.write(padded[:, x:x + tile].tobytes())
+
+
+def write_bmp(
+    path: Path,
+    width: int,
+    height: int,
+    rows: Rows,
+    top_down: bool = False,
+    bits: int = 24
+) -> None:
+    row_bytes = (width * bits + 31) // 32 * 4
+    header_size = 14 + 40
+    file_size = header_size + row_bytes * height
+    stored_height = -height if top_down else height
+
+    with open(path, 'wb') as file:
+        file.write(b'BM' + struct.pack('<IHHI', file_size, 0, 0, header_size))
+        file.write(struct.pack(
+            '<IiiHHIIiiII',
+            40, width, stored_height, 1, bits, 0, 0, 2835, 2835, 0, 0
+        ))
+
+        band_rows = max(1, 16 * 1024 ** 2 // row_bytes)
+        for first in range(0, height, band_rows):
+            count = min(band_rows, height - first)
+            y = first if top_down else height - first - count
+
+            band = rows(y, count)[:, :, 2::-1]
+            if bits == 32:
+                alpha = np.full(band.shape[:2] + (1,), 255, np.uint8)
+                band = np.concatenate([band, alpha], axis=2)
+
+            padded = np.zeros((count, row_bytes), np.uint8)
+            padded[:, :width * bits // 8] = band.reshape(count, -1)
+            file.write((padded if top_down else padded[::-1]).tobytes())
+
+
+def write_pnm(
+    path: Path,
+    width: int,
+    height: int,
+    rows: Rows,
+    samples: int,
+    max_value: int
+) -> None:
+    with open(path, 'wb') as file:
+        file.write(b'P6' if samples == 3 else b'P5')
+        file.write(b'\n# written by the mapped decode benchmark\n')
+        file.write(f'{width} {height}\n{max_value}\n'.encode())
+
+        for y in range(0, height, ROWS_PER_STRIP * 64):
+            file.write(rows(y, min(ROWS_PER_STRIP * 64, height - y)).tobytes())
+
+
+def array_rows(pixels: npt.NDArray[Any]) -> Rows:
+    return lambda y, count: pixels[y:y + count]
+
+
+def source_pixels(size: tuple[int, int], samples: int, dtype: str) -> npt.NDArray[Any]:
+    rgb = np.asarray(photo_like(size))
+    if samples == 1:
+        pixels = rgb[:, :, :1]
+    elif samples == 4:
+        alpha = np.linspace(0, 255, size[0], dtype=np.uint8)
+        alpha_channel = np.broadcast_to(alpha, rgb.shape[:2])[:, :, None]
+        pixels = np.concatenate([rgb, alpha_channel], axis=2)
+    else:
+        pixels = rgb
+
+    if np.dtype(dtype).itemsize == 2:
+        # * 12 bit values, the way scanners store 16 bit data
+        return (pixels.astype(np.uint16) << 4).astype(dtype)
+
+    return pixels.astype(dtype)
+
+
+@dataclass(frozen=True)
+class Case:
+    name: str
+    extension: str
+    samples: int
+    dtype: str
+
+    # * Samples of the file which the decoder has to keep, in the order of the mode
+    channels: tuple[int, ...]
+    write: Callable[[Path, int, int, Rows], None]
+    inverted: bool = False
+
+
+CASES = (
+    Case(
+        'tiff-rgb-strips', '.tif', 3, '<u1', (0, 1, 2),
+        partial(write_tiff, options=TiffOptions())
+    ),
+    Case(
+        'tiff-rgba-tiles', '.tif', 4, '>u1', (0, 1, 2, 3),
+        partial(
+            write_tiff,
+            options=TiffOptions(samples=4, extra_samples=(2,), byte_order='>', tile=64)
+        )
+    ),
+    Case(
+        'tiff-gray16-be', '.tif', 1, '>u2', (0,),
+        partial(
+            write_tiff,
+            options=TiffOptions(samples=1, bits=16, photometric=1, byte_order='>')
+        )
+    ),
+    Case(
+        'tiff-white-zero', '.tif', 1, '<u1', (0,),
+        partial(write_tiff, options=TiffOptions(samples=1, photometric=0)),
+        inverted=True
+    ),
+    Case(
+        'tiff-rotated', '.tif', 3, '<u1', (0, 1, 2),
+        partial(write_tiff, options=TiffOptions(tile=TILE_SIZE, orientation=6))
+    ),
+    Case('bmp-bottom-up', '.bmp', 3, '<u1', (0, 1, 2), write_bmp),
+    Case(
+        'bmp-top-down-32', '.bmp', 3, '<u1', (0, 1, 2),
+        partial(write_bmp, top_down=True, bits=32)
+    ),
+    Case(
+        'ppm', '.ppm', 3, '<u1', (0, 1, 2),
+        partial(write_pnm, samples=3, max_value=255)
+    ),
+    Case(
+        'pgm-16', '.pgm', 1, '>u2', (0,),
+        partial(write_pnm, samples=1, max_value=4095)
+    )
+)
+
+LARGE_CASES = ('tiff-rgb-strips', 'tiff-rotated', 'bmp-bottom-up', 'ppm')
+
+
+def pil_preview(image_path: Path) -> Image.Image:
+    with open_image(image_path) as image:
+        return decode_resized(image, target_size(image, MAX_DIMENSIONS))
+
+
+# * Every pixel decoded and filtered, upright and tone mapped before resizing,
+# * the way the preview should look
+def reference_preview(image_path: Path, max_dimensions: Dimentions) -> Image.Image:
+    with open_image(image_path) as image:
+        image.load()
+        upright = ImageOps.exif_transpose(image)
+
+    if upright.mode in HIGH_BIT_DEPTH_MODES:
+        upright = Image.fromarray(tone_map(np.asarray(upright)))
+
+    new_size = fit_size(upright.size, max_dimensions)
+    return upright.resize(new_size, Image.Resampling.LANCZOS)
+
+
+def check(case: Case, root: Path) -> list[str]:
+    width, height = CHECK_SIZE
+    pixels = source_pixels(CHECK_SIZE, case.samples, case.dtype)
+    image_path = root / f'{case.name}{case.extension}'
+    case.write(image_path, width, height, array_rows(pixels))
+
+    problems: list[str] = []
+
+    with (
+        open(image_path, 'rb') as file,
+        mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data
+    ):
+        layout = read_layout(data)
+        if layout is None:
+            return ['not recognized']
+
+        sampled = sample(data, layout, CHECK_STEP)
+
+    expected = pixels[::CHECK_STEP, ::CHECK_STEP][:, :, list(case.channels)]
+    if not np.array_equal(sampled, expected):
+        problems.append('sampled pixels differ from the source')
+
+    # * Small enough that load_image would not sample it,
+    # * so the mapped path is called directly
+    mapped = decode_mapped(image_path, (width // 4, height // 4))
+    if mapped is None:
+        return [*problems, 'not decoded']
+
+    reference = reference_preview(image_path, (width // 4, height // 4))
+    mapped_rgb = qimage_rgb(to_pixmap_format(pil2qimage(mapped)))
+    reference_rgb = qimage_rgb(to_pixmap_format(pil2qimage(reference)))
+
+    if mapped_rgb.shape != reference_rgb.shape:
+        mapped_height, mapped_width = mapped_rgb.shape[:2]
+        reference_height, reference_width = reference_rgb.shape[:2]
+        problems.append(
+            f'preview is {mapped_width}x{mapped_height}, '
+            f'PIL makes it {reference_width}x{reference_height}'
+        )
+    else:
+        difference = float(np.abs(mapped_rgb - reference_rgb).mean())
+        if difference > PREVIEW_TOLERANCE:
+            problems.append(f'preview differs from PIL by {difference:.1f}')
+
+    return problems
+
+
+def large_rows(width: int, samples: int, dtype: str) -> Rows:
+    texture = source_pixels((width, TEXTURE_ROWS), samples, dtype)
+
+    def rows(y: int, count: int) -> npt.NDArray[Any]:
+        indices = np.arange(y, y + count) % TEXTURE_ROWS
+        return texture[indices]
+
+    return rows
+
+
+# * Peak RSS in kilobytes. Linux keeps the peak of the parent across exec,
+# * so it is reset first when possible.
+def reset_peak_rss() -> None:
+    try:
+        Path('/proc/self/clear_refs').write_text('5')
+    except OSError:
+        pass
+
+
+def peak_rss() -> int:
+    try:
+        status = Path('/proc/self/status').read_text()
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    for line in status.splitlines():
+        if line.startswith('VmHWM:'):
+            return int(line.split()[1])
+
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+# * Both methods start from the disk, as they would for a scan opened for the first time
+def drop_from_page_cache(image_path: Path) -> None:
+    if not hasattr(os, 'posix_fadvise'):
+        return
+
+    with open(image_path, 'rb+') as file:
+        os.fsync(file.fileno())
+        os.posix_fadvise(file.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+
+
+# * Runs in its own process,
+# * prints the time and the peak RSS of decoding the file to the preview
+def measure_child(method: str, image_path: Path) -> None:
+    # * PIL refuses images of this size as decompression bombs,
+    # * which the mapped path does not need to
+    Image.MAX_IMAGE_PIXELS = None
+
+    reset_peak_rss()
+    baseline = peak_rss()
+
+    start = time.perf_counter()
+    if method == 'mapped':
+        preview = decode_mapped(image_path, MAX_DIMENSIONS)
+        assert preview is not None
+    else:
+        preview = pil_preview(image_path)
+
+    to_pixmap_format(pil2qimage(preview))
+    elapsed = time.perf_counter() - start
+
+    print(f'{elapsed} {baseline} {peak_rss()}')
+
+
+def measure(method: str, image_path: Path) -> tuple[float, float, float]:
+    drop_from_page_cache(image_path)
+
+    output = subprocess.run(
+        [
+            sys.executable, '-m', 'benchmarks.mapped_decode',
+            '--child', method, str(image_path)
+        ],
+        check=True,
+        capture_output=True,
+        text=True
+    ).stdout
+    elapsed, baseline, peak = output.split()
+
+    return float(elapsed) * 1000, int(baseline) / 1024, int(peak) / 1024
+
+
+def main() -> None:
+    ap = ArgumentParser()
+    ap.add_argument(
+        '--gigabytes',
+        type=float,
+        default=2.0,
+        help='Size of every large file'
+    )
+    ap.add_argument('--skip-large', action='store_true')
+    ap.add_argument(
+        '--directory',
+        type=Path,
+        default=None,
+        help='Where to write the large files, they need the disk space'
+    )
+    ap.add_argument('--child', nargs=2, default=None, help=CHILD_HELP)
+    args = ap.parse_args()
+
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+    if args.child is not None:
+        measure_child(args.child[0], Path(args.child[1]))
+        return
+
+    failures: list[str] = []
+
+    with tempfile.TemporaryDirectory(
+        prefix='mapped-decode-bench-',
+        dir=args.directory
+    ) as temporary_directory:
+        root = Path(temporary_directory)
+
+        for case in CASES:
+            problems = check(case, root)
+            result = 'ok' if len(problems) == 0 else '; '.join(problems)
+            print(f'{case.name:<20}{result}')
+            if len(problems) > 0:
+                failures.append(case.name)
+
+        if args.skip_large:
+            return _finish(failures)
+
+        print(
+            f'\n{"file":<20}{"GB":>6}{"method":>8}{"ms":>10}'
+            f'{"imports MB":>12}{"peak RSS MB":>14}'
+        )
+        for case in (case for case in CASES if case.name in LARGE_CASES):
+            pixel_bytes = case.samples * np.dtype(case.dtype).itemsize
+            height = int(args.gigabytes * 1024 ** 3 / (LARGE_WIDTH * pixel_bytes))
+            image_path = root / f'large-{case.name}{case.extension}'
+            rows = large_rows(LARGE_WIDTH, case.samples, case.dtype)
+            case.write(image_path, LARGE_WIDTH, height, rows)
+
+            size_gb = image_path.stat().st_size / 1024 ** 3
+            for method in ('pil', 'mapped'):
+                elapsed, imports, peak = measure(method, image_path)
+                print(
+                    f'{case.name:<20}{size_gb:>6.2f}{method:>8}{elapsed:>10.0f}'
+                    f'{imports:>12.0f}{peak:>14.0f}'
+                )
+
+            image_path.unlink()
+
+    _finish(failures)
+
+
+def _finish(failures: list[str]) -> None:
+    if len(failures) > 0:
+        failed = ', '.join(failures)
+        print(f'\nLayouts not decoded as expected: {failed}', file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+import os
+import shutil
+import tempfile
+import time
+from argparse import ArgumentParser
+from collections.abc import Callable
+from pathlib import Path
+
+from image_organizer.file_operations.move_engine import MoveEngine
+
+DEFAULT_SOURCE_ROOT = Path('/dev/shm')
+
+MoveFunction = Callable[[list[Path], Path], None]
+
+
+def generate_files(directory: Path, count: int, size: int) -> list[Path]:
+    block = os.urandom(min(size, 1024 ** 2))
+    files: list[Path] = []
+
+    for index in range(count):
+        path = directory / f'{index:05d}.bin'
+        with open(path, 'wb') as file:
+            written = 0
+            while written < size:
+                written += file.write(block[:size - written])
+
+        files.append(path)
+
+    return files
+
+
+def shutil_moves(files: list[Path], destination: Path) -> None:
+    for path in files:
+        shutil.move(path, destination)
+
+
+def engine_moves(engine: MoveEngine) -> MoveFunction:
+    def run(files: list[Path], destination: Path) -> None:
+        with engine:
+            for path in files:
+                engine.move(path, destination)
+
+    return run
+
+
+def main() -> None:
+    ap = ArgumentParser()
+    ap.add_argument('--count', type=int, default=20)
+    ap.add_argument('--size-mb', type=int, default=50)
+    ap.add_argument(
+        '--source-root',
+        type=Path,
+        default=DEFAULT_SOURCE_ROOT,
+        help='Ideally a tmpfs'
+    )
+    ap.add_argument(
+        '--destination-root',
+        type=Path,
+        default=Path.home(),
+        help='Ideally a disk'
+    )
+    args = ap.parse_args()
+
+    size = args.size_mb * 1024 ** 2
+    total_mb = args.count * args.size_mb
+
+    variants: list[tuple[str, MoveFunction]] = [
+        ('shutil.move', shutil_moves),
+        ('engine', engine_moves(MoveEngine())),
+        (
+            'engine, batched fsync',
+            engine_moves(MoveEngine(fsync_batch_size=args.count))
+        ),
+        ('engine, no fsync', engine_moves(MoveEngine(fsync=False))),
+        ('engine, verified', engine_moves(MoveEngine(verify=True)))
+    ]
+
+    print(
+        f'{args.count} files of {args.size_mb} MB, '
+        f'{args.source_root} -> {args.destination_root}'
+    )
+
+    for name, move_files in variants:
+        with tempfile.TemporaryDirectory(dir=args.source_root) as source, \
+                tempfile.TemporaryDirectory(dir=args.destination_root) as destination:
+            files = generate_files(Path(source), args.count, size)
+
+            start = time.perf_counter()
+            move_files(files, Path(destination))
+            elapsed = time.perf_counter() - start
+
+        print(f'{name:<24}{elapsed:>8.2f}s{total_mb / elapsed:>10.1f} MB/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+import os
+import sys
+import time
+from argparse import ArgumentParser
+from collections.abc import Callable
+
+import numpy as np
+import numpy.typing as npt
+from PIL import Image
+from PyQt6.QtGui import QImage, QPixmap
+from PyQt6.QtWidgets import QApplication
+
+from image_organizer.image_utils.load_and_resize import (
+    pil2pixmap,
+    pil2qimage,
+    to_pixmap_format,
+)
+
+MODES = ('RGB', 'RGBA', 'L', 'LA', '1', 'P', 'CMYK', 'YCbCr', 'I;16', 'I', 'F')
+SIZES = ((1280, 720), (1920, 1080), (3840, 2160))
+
+
+# * The conversion as it was before the zero-copy path, kept around for comparison
+def legacy_pil2pixmap(image: Image.Image) -> QPixmap:
+    from PIL import ImageOps
+
+    if image.mode == 'RGB':
+        r, g, b = image.split()
+        image = Image.merge('RGB', (b, g, r))
+    elif image.mode == 'RGBA':
+        r, g, b, a = image.split()
+        image = Image.merge('RGBA', (b, g, r, a))
+    elif image.mode == 'L':
+        image = image.convert('RGBA')
+
+    image = ImageOps.exif_transpose(image)
+
+    im2 = image.convert('RGBA')
+    data = im2.tobytes('raw', 'RGBA') # pyright: ignore[reportUnknownMemberType]
+    qim = QImage(data, image.size[0], image.size[1], QImage.Format.Format_ARGB32)
+
+    return QPixmap.fromImage(qim)
+
+
+# * The conversion of every mode without a fast path, before they got one
+def generic_pil2pixmap(image: Image.Image) -> QPixmap:
+    return QPixmap.fromImage(to_pixmap_format(pil2qimage(image.convert('RGBA'))))
+
+
+# * Noise, so no conversion gets away with a shortcut.
+# * High bit depth images use 12 bits, negative values and a float range,
+# * like scanners, RAW exports and HDR files store them
+def make_image(size: tuple[int, int], mode: str) -> Image.Image:
+    gray = Image.effect_noise(size, 64)
+    pixels = np.asarray(gray)
+
+    if mode == 'I;16':
+        return Image.fromarray(pixels.astype(np.uint16) * 16).convert('I;16')
+
+    if mode == 'I':
+        return Image.fromarray(pixels.astype(np.int32) * 257 - 32768)
+
+    if mode == 'F':
+        return Image.fromarray(pixels.astype(np.float32) / 255)
+
+    rgb = Image.merge(
+        'RGB',
+        (gray, gray.transpose(Image.Transpose.FLIP_LEFT_RIGHT), gray.rotate(180))
+    )
+    if mode == 'P':
+        return rgb.quantize(256)
+
+    if mode in ('L', 'LA', '1'):
+        return gray.convert(mode)
+
+    return rgb.convert(mode)
+
+
+# * RGB values of any QImage, for comparing converted images against each other
+def qimage_rgb(image: QImage) -> npt.NDArray[np.float32]:
+    converted = image.convertToFormat(QImage.Format.Format_RGB32) # pyright: ignore[reportUnknownMemberType]
+    width, height = converted.width(), converted.height()
+
+    bits = converted.constBits()
+    assert bits is not None
+
+    # * Rows of RGB32 are blue, green, red and padding bytes on little endian machines
+    data = np.frombuffer(bits.asstring(converted.sizeInBytes()), dtype=np.uint8)
+    rows = data.reshape(height, converted.bytesPerLine())
+    pixels = rows[:, :width * 4].reshape(height, width, 4)
+
+    return pixels[..., 2::-1].astype(np.float32)
+
+
+def measure_ms(func: Callable[[], object], repeat: int) -> float:
+    func()
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main() -> None:
+    ap = ArgumentParser()
+    ap.add_argument('--repeat', type=int, default=20)
+    ap.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES))
+    args = ap.parse_args()
+
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    app = QApplication(sys.argv)
+
+    print(
+        f'{"mode":<6}{"size":>12}{"legacy ms":>12}{"generic ms":>12}'
+        f'{"qimage ms":>12}{"pixmap ms":>12}{"speedup":>10}'
+    )
+    for mode in args.modes:
+        for size in SIZES:
+            image = make_image(size, mode)
+            image.load()
+
+            legacy = measure_ms(lambda: legacy_pil2pixmap(image), args.repeat)
+            generic = measure_ms(lambda: generic_pil2pixmap(image), args.repeat)
+            qimage = measure_ms(lambda: pil2qimage(image), args.repeat)
+            pixmap = measure_ms(lambda: pil2pixmap(image), args.repeat)
+
+            print(
+                f'{mode:<6}{f"{size[0]}x{size[1]}":>12}'
+                f'{legacy:>12.2f}{generic:>12.2f}{qimage:>12.2f}{pixmap:>12.2f}'
+                f'{generic / pixmap:>9.1f}x'
+            )
+
+    app.quit()
+
+
+if __name__ == '__main__':
+    main()
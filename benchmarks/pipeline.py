@@ -0,0 +1,328 @@
+import os
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+from collections.abc import Callable
+from pathlib import Path
+
+from PyQt6.QtGui import QPixmap
+from PyQt6.QtWidgets import QApplication
+
+from benchmarks.corpus import (
+    FORMAT_MODES,
+    SIZES,
+    CorpusImage,
+    generate_corpus,
+    in_mode,
+    photo_like,
+)
+from benchmarks.results import DEFAULT_THRESHOLD, Results, measure
+from image_organizer.image_utils.find_images import find_images
+from image_organizer.image_utils.load_and_resize import (
+    Dimentions,
+    load_and_resize,
+    pil2pixmap,
+)
+from image_organizer.image_utils.pixmap_cache import PixmapCache, pixmap_size_bytes
+from image_organizer.instrumentation.stage_timings import timings
+from image_organizer.widgets.gallery_viewer import PREFETCH_DELAY_MS, GalleryViewer
+
+# * Runs the image pipeline over a generated corpus under the offscreen Qt platform:
+# *   python -m benchmarks.pipeline --output results.json
+# *   python -m benchmarks.pipeline --baseline results.json
+# * Exits with 1 when any benchmark got slower than the baseline
+# * by more than the threshold.
+
+MAX_DIMENSIONS: Dimentions = (1280, 720)
+FIND_EXTENSIONS = ('.jpg', '.png', '.txt', '.xmp', '.tiff')
+CACHE_ENTRIES = 1000
+NAVIGATION_TIMEOUT_S = 30.0
+
+Benchmark = Callable[[Results, list[CorpusImage], int], None]
+
+
+def wait_until(
+    app: QApplication,
+    condition: Callable[[], bool],
+    timeout_s: float = NAVIGATION_TIMEOUT_S
+) -> None:
+    deadline = time.perf_counter() + timeout_s
+    while not condition():
+        if time.perf_counter() > deadline:
+            raise TimeoutError('The gallery did not show the image in time')
+
+        app.processEvents()
+        time.sleep(0.0005)
+
+
+def settle(app: QApplication, duration_s: float) -> None:
+    deadline = time.perf_counter() + duration_s
+    while time.perf_counter() < deadline:
+        app.processEvents()
+        time.sleep(0.001)
+
+
+def bench_find_images(results: Results, corpus: list[CorpusImage], repeat: int) -> None:
+    for entries in (1_000, 20_000):
+        with tempfile.TemporaryDirectory(prefix='find-images-bench-') as directory:
+            root = Path(directory)
+            for index in range(entries):
+                extension = FIND_EXTENSIONS[index % len(FIND_EXTENSIONS)]
+                (root / f'{index:06d}{extension}').touch()
+
+            results.add(
+                f'find_images/{entries}-entries',
+                measure(lambda: find_images(root), repeat)
+            )
+
+
+def bench_load_and_resize(
+    results: Results,
+    corpus: list[CorpusImage],
+    repeat: int
+) -> None:
+    for corpus_image in corpus:
+        results.add(
+            f'load_and_resize/{corpus_image.name}',
+            measure(lambda: load_and_resize(corpus_image.path, MAX_DIMENSIONS), repeat)
+        )
+
+
+def bench_pil2pixmap(results: Results, corpus: list[CorpusImage], repeat: int) -> None:
+    modes = sorted({mode for modes in FORMAT_MODES.values() for mode in modes})
+    size_names = sorted(
+        {corpus_image.size_name for corpus_image in corpus},
+        key=lambda name: SIZES[name]
+    )
+
+    for size_name in size_names:
+        source = photo_like(SIZES[size_name])
+
+        for mode in modes:
+            image = in_mode(source, mode)
+            image.load()
+
+            mode_name = mode.lower().replace(';', '')
+            results.add(
+                f'pil2pixmap/{mode_name}-{size_name}',
+                measure(lambda: pil2pixmap(image), repeat)
+            )
+
+
+def bench_pixmap_cache(
+    results: Results,
+    corpus: list[CorpusImage],
+    repeat: int
+) -> None:
+    pixmap = QPixmap(256, 256)
+    pixmap.fill()
+
+    keys = [Path(f'/benchmark/{index:05d}.jpg') for index in range(CACHE_ENTRIES)]
+    missing = [
+        Path(f'/benchmark/missing/{index:05d}.jpg') for index in range(CACHE_ENTRIES)
+    ]
+
+    # * Half of the entries fit, so every insert after that evicts one
+    limit = pixmap_size_bytes(pixmap) * CACHE_ENTRIES // 2
+
+    def insert() -> PixmapCache[Path]:
+        cache: PixmapCache[Path] = PixmapCache(limit)
+        for key in keys:
+            cache.insert(key, pixmap)
+
+        return cache
+
+    cache = insert()
+
+    def get(lookup: list[Path]) -> None:
+        for key in lookup:
+            cache.get(key)
+
+    hits = keys[CACHE_ENTRIES // 2:] * 2
+
+    results.add(
+        f'pixmap_cache/insert-evicting-x{CACHE_ENTRIES}',
+        measure(insert, repeat)
+    )
+    results.add(
+        f'pixmap_cache/get-hit-x{CACHE_ENTRIES}',
+        measure(lambda: get(hits), repeat)
+    )
+    results.add(
+        f'pixmap_cache/get-miss-x{CACHE_ENTRIES}',
+        measure(lambda: get(missing), repeat)
+    )
+
+
+def bench_navigation(results: Results, corpus: list[CorpusImage], repeat: int) -> None:
+    app = QApplication.instance()
+    assert isinstance(app, QApplication)
+
+    image_paths = [corpus_image.path for corpus_image in corpus]
+
+    # * Every step through the corpus is a sample, so a single pass is enough
+    for scenario in ('cold', 'prefetched'):
+        samples: list[float] = []
+
+        viewer = GalleryViewer(image_paths, MAX_DIMENSIONS)
+        viewer.resize(1280, 900)
+        viewer.show()
+        wait_until(app, lambda: not viewer.is_loading)
+
+        for _ in range(len(image_paths) - 1):
+            # * Gives the prefetcher the time a user looking at the image would give it
+            if scenario == 'prefetched':
+                settle(app, PREFETCH_DELAY_MS / 1000 + 0.3)
+
+            start = time.perf_counter()
+            viewer.next()
+            wait_until(app, lambda: not viewer.is_loading)
+            samples.append((time.perf_counter() - start) * 1000)
+
+        viewer.close()
+        viewer.deleteLater()
+        settle(app, 0.05)
+
+        results.add(f'navigation/{scenario}', samples)
+
+
+# * Latency of both passes of every navigation,
+# * until the preview and until the image itself is shown.
+# * With the filmstrip shown its thumbnails are the previews,
+# * without it every preview is decoded.
+def bench_progressive(
+    results: Results,
+    corpus: list[CorpusImage],
+    repeat: int
+) -> None:
+    app = QApplication.instance()
+    assert isinstance(app, QApplication)
+
+    image_paths = [corpus_image.path for corpus_image in corpus]
+    was_enabled = timings.enabled
+    timings.enable()
+
+    for scenario in ('filmstrip', 'decoded'):
+        viewer = GalleryViewer(
+            image_paths,
+            MAX_DIMENSIONS,
+            prefetch_ahead=0,
+            prefetch_behind=0
+        )
+        viewer.filmstrip.setVisible(scenario == 'filmstrip')
+        viewer.resize(1280, 900)
+        viewer.show()
+        wait_until(app, lambda: not viewer.is_loading)
+
+        first_pixel: list[float] = []
+        full_image: list[float] = []
+
+        for _ in range(len(image_paths) - 1):
+            # * Gives the filmstrip the time to decode the
+            # * thumbnails which have scrolled into view
+            settle(app, 0.3 if scenario == 'filmstrip' else 0.0)
+            timings.clear()
+
+            viewer.next()
+            wait_until(app, lambda: not viewer.is_loading)
+
+            first_pixel.extend(timings.durations('first_pixel'))
+            full_image.extend(timings.durations('full_image'))
+
+        viewer.close()
+        viewer.deleteLater()
+        settle(app, 0.05)
+
+        results.add(f'progressive/{scenario}-first-pixel', first_pixel)
+        results.add(f'progressive/{scenario}-full-image', full_image)
+
+    timings.clear()
+    timings.enabled = was_enabled
+
+
+BENCHMARKS: dict[str, Benchmark] = {
+    'find_images': bench_find_images,
+    'load_and_resize': bench_load_and_resize,
+    'pil2pixmap': bench_pil2pixmap,
+    'pixmap_cache': bench_pixmap_cache,
+    'navigation': bench_navigation,
+    'progressive': bench_progressive
+}
+
+
+def main() -> None:
+    ap = ArgumentParser()
+    ap.add_argument(
+        '--sizes',
+        nargs='+',
+        choices=list(SIZES),
+        default=['small', 'medium']
+    )
+    ap.add_argument('--formats', nargs='+', choices=list(FORMAT_MODES), default=None)
+    ap.add_argument(
+        '--only',
+        nargs='+',
+        choices=list(BENCHMARKS),
+        default=list(BENCHMARKS)
+    )
+    ap.add_argument('--repeat', type=int, default=5)
+    ap.add_argument(
+        '--corpus',
+        type=Path,
+        default=None,
+        help='Keep the generated images in this directory between runs'
+    )
+    ap.add_argument(
+        '--output',
+        type=Path,
+        default=None,
+        help='Write the results as JSON'
+    )
+    ap.add_argument(
+        '--baseline',
+        type=Path,
+        default=None,
+        help='Results of an earlier run to compare against'
+    )
+    ap.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+    args = ap.parse_args()
+
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    app = QApplication(sys.argv)
+
+    with tempfile.TemporaryDirectory(prefix='pipeline-bench-') as temporary_directory:
+        corpus_root: Path = args.corpus or Path(temporary_directory)
+
+        start = time.perf_counter()
+        corpus = generate_corpus(corpus_root, args.sizes, args.formats)
+        elapsed_s = time.perf_counter() - start
+        print(
+            f'corpus of {len(corpus)} images in {corpus_root} '
+            f'ready in {elapsed_s:.1f}s\n'
+        )
+
+        results = Results()
+        for name in args.only:
+            BENCHMARKS[name](results, corpus, args.repeat)
+
+    if args.output is not None:
+        results.dump(args.output)
+
+    regressions: list[str] = []
+    if args.baseline is not None:
+        regressions = results.compare(args.baseline, args.threshold)
+
+    app.quit()
+
+    if len(regressions) > 0:
+        print(
+            f'\n{len(regressions)} benchmarks regressed '
+            f'by more than {args.threshold:.2f}x',
+            file=sys.stderr
+        )
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,325 @@
+import io
+import os
+import struct
+import tempfile
+import time
+from argparse import ArgumentParser
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from benchmarks.corpus import photo_like
+from image_organizer.image_utils.load_and_resize import Dimentions, load_image
+from image_organizer.image_utils.open_image import open_image
+from image_organizer.image_utils.raw_previews import (
+    COMPRESSION_TAG,
+    EXIF_IFD_TAG,
+    JPEG_LENGTH_TAG,
+    JPEG_OFFSET_TAG,
+    ORIENTATION_TAG,
+    PHOTOMETRIC_TAG,
+    STRIP_BYTE_COUNTS_TAG,
+    STRIP_OFFSETS_TAG,
+    SUB_IFDS_TAG,
+    find_preview,
+)
+
+# * Times parsing and opening synthetic TIFF containers laid out the way CR2, NEF, ARW
+# * and DNG files are, against opening a small JPEG:
+# *   python -m benchmarks.raw_previews
+
+SHORT = 3
+LONG = 4
+
+PREVIEW_SIZE = (1616, 1080)
+THUMBNAIL_SIZE = (160, 120)
+SMALL_JPEG_SIZE = (1616, 1080)
+
+MAX_DIMENSIONS: Dimentions = (1280, 720)
+
+# * Stands in for the sensor data, which opening a RAW must never read
+SENSOR_DATA_BYTES = 48 * 1024 ** 2
+
+# * The header of a lossless JPEG, which is how CR2 and DNG store the sensor data
+LOSSLESS_JPEG = b'\xff\xd8\xff\xc3\x00\x0b\x0c\x17\x70\x1f\x40\x01\x01\x11\x00'
+
+# * Tags which point at a blob, paired with the tag holding its length
+BLOB_TAGS = {
+    JPEG_OFFSET_TAG: JPEG_LENGTH_TAG,
+    STRIP_OFFSETS_TAG: STRIP_BYTE_COUNTS_TAG
+}
+
+# * Type and values of every tag
+Tags = dict[int, tuple[int, list[int]]]
+
+
+@dataclass
+class Ifd:
+    tags: Tags = field(default_factory=Tags)
+    blobs: dict[int, bytes] = field(default_factory=dict[int, bytes])
+    sub_ifds: list['Ifd'] = field(default_factory=list['Ifd'])
+    exif: 'Ifd | None' = None
+
+    offset: int = 0
+
+    def all_tags(self) -> Tags:
+        tags = dict(self.tags)
+        for tag, blob in self.blobs.items():
+            tags[tag] = (LONG, [0])
+            tags[BLOB_TAGS[tag]] = (LONG, [len(blob)])
+
+        if len(self.sub_ifds) > 0:
+            tags[SUB_IFDS_TAG] = (LONG, [0] * len(self.sub_ifds))
+
+        if self.exif is not None:
+            tags[EXIF_IFD_TAG] = (LONG, [0])
+
+        return tags
+
+
+def _flatten(chain: list[Ifd]) -> list[Ifd]:
+    ifds: list[Ifd] = []
+    for ifd in chain:
+        ifds.append(ifd)
+        ifds.extend(_flatten(ifd.sub_ifds))
+        if ifd.exif is not None:
+            ifds.append(ifd.exif)
+
+    return ifds
+
+
+# * Header, IFDs, values which do not fit into the entries and then the blobs,
+# * like a camera writes them
+def build_container(chain: list[Ifd], byte_order: str = '<', magic: int = 42) -> bytes:
+    ifds = _flatten(chain)
+    formats = {SHORT: 'H', LONG: 'I'}
+
+    position = 8
+    for ifd in ifds:
+        ifd.offset = position
+        position += 2 + len(ifd.all_tags()) * 12 + 4
+
+    external: dict[tuple[int, int], int] = {}
+    for ifd in ifds:
+        for tag, (field_type, values) in sorted(ifd.all_tags().items()):
+            size = struct.calcsize(formats[field_type]) * len(values)
+            if size > 4:
+                external[(ifd.offset, tag)] = position
+                position += size
+
+    blob_offsets: dict[tuple[int, int], int] = {}
+    for ifd in ifds:
+        for tag, blob in ifd.blobs.items():
+            blob_offsets[(ifd.offset, tag)] = position
+            position += len(blob)
+
+    next_offsets = {
+        id(ifd): chain[index + 1].offset for index, ifd in enumerate(chain[:-1])
+    }
+
+    output = bytearray(position)
+    output[:2] = b'II' if byte_order == '<' else b'MM'
+    struct.pack_into(byte_order + 'HI', output, 2, magic, chain[0].offset)
+
+    for ifd in ifds:
+        tags = ifd.all_tags()
+        for tag in ifd.blobs:
+            tags[tag] = (LONG, [blob_offsets[(ifd.offset, tag)]])
+
+        if len(ifd.sub_ifds) > 0:
+            tags[SUB_IFDS_TAG] = (LONG, [sub_ifd.offset for sub_ifd in ifd.sub_ifds])
+
+        if ifd.exif is not None:
+            tags[EXIF_IFD_TAG] = (LONG, [ifd.exif.offset])
+
+        struct.pack_into(byte_order + 'H', output, ifd.offset, len(tags))
+        for index, (tag, (field_type, values)) in enumerate(sorted(tags.items())):
+            entry = ifd.offset + 2 + index * 12
+            count = len(values)
+            value_format = f'{byte_order}{count}{formats[field_type]}'
+
+            struct.pack_into(byte_order + 'HHI', output, entry, tag, field_type, count)
+            values_offset = external.get((ifd.offset, tag))
+            if values_offset is not None:
+                struct.pack_into(byte_order + 'I', output, entry + 8, values_offset)
+                struct.pack_into(value_format, output, values_offset, *values)
+            else:
+                struct.pack_into(value_format, output, entry + 8, *values)
+
+        next_entry = ifd.offset + 2 + len(tags) * 12
+        next_offset = next_offsets.get(id(ifd), 0)
+        struct.pack_into(byte_order + 'I', output, next_entry, next_offset)
+
+        for tag, blob in ifd.blobs.items():
+            offset = blob_offsets[(ifd.offset, tag)]
+            output[offset:offset + len(blob)] = blob
+
+    return bytes(output)
+
+
+def jpeg(size: tuple[int, int]) -> bytes:
+    data = io.BytesIO()
+    photo_like(size).save(data, 'JPEG', quality=85)
+
+    return data.getvalue()
+
+
+def sensor_data() -> bytes:
+    return bytes(SENSOR_DATA_BYTES)
+
+
+@dataclass(frozen=True)
+class Case:
+    name: str
+    extension: str
+    build: Callable[[], bytes]
+
+
+# * IFD0 is the full size preview as an old style JPEG strip, IFD1 the thumbnail,
+# * IFD3 the sensor data as a lossless JPEG strip,
+# * which must not be mistaken for a preview
+def cr2() -> bytes:
+    return build_container([
+        Ifd(
+            {ORIENTATION_TAG: (SHORT, [6]), COMPRESSION_TAG: (SHORT, [6])},
+            {STRIP_OFFSETS_TAG: jpeg(PREVIEW_SIZE)}
+        ),
+        Ifd({COMPRESSION_TAG: (SHORT, [6])}, {JPEG_OFFSET_TAG: jpeg(THUMBNAIL_SIZE)}),
+        Ifd({COMPRESSION_TAG: (SHORT, [1])}),
+        Ifd(
+            {COMPRESSION_TAG: (SHORT, [6])},
+            {STRIP_OFFSETS_TAG: LOSSLESS_JPEG + sensor_data()}
+        )
+    ])
+
+
+# * Big endian, with the preview and the sensor data in SubIFDs of IFD0
+def nef() -> bytes:
+    return build_container([
+        Ifd(
+            {ORIENTATION_TAG: (SHORT, [8])},
+            {JPEG_OFFSET_TAG: jpeg(THUMBNAIL_SIZE)},
+            sub_ifds=[
+                Ifd(
+                    {COMPRESSION_TAG: (SHORT, [6])},
+                    {JPEG_OFFSET_TAG: jpeg(PREVIEW_SIZE)}
+                ),
+                Ifd(
+                    {COMPRESSION_TAG: (SHORT, [1]), PHOTOMETRIC_TAG: (SHORT, [32803])},
+                    {STRIP_OFFSETS_TAG: sensor_data()}
+                )
+            ],
+            exif=Ifd({0x9000: (LONG, [230])})
+        )
+    ], byte_order='>')
+
+
+def arw() -> bytes:
+    return build_container([
+        Ifd(
+            {ORIENTATION_TAG: (SHORT, [3])},
+            {JPEG_OFFSET_TAG: jpeg(PREVIEW_SIZE)},
+            sub_ifds=[
+                Ifd(
+                    {COMPRESSION_TAG: (SHORT, [32767])},
+                    {STRIP_OFFSETS_TAG: sensor_data()}
+                )
+            ],
+            exif=Ifd({0x9000: (LONG, [230])})
+        )
+    ])
+
+
+# * An uncompressed thumbnail in IFD0,
+# * the preview and the sensor data as JPEG compressed SubIFDs.
+# * The sensor data is even a baseline JPEG here,
+# * only its photometric interpretation tells it apart
+def dng() -> bytes:
+    return build_container([
+        Ifd(
+            {COMPRESSION_TAG: (SHORT, [1]), PHOTOMETRIC_TAG: (SHORT, [2])},
+            {STRIP_OFFSETS_TAG: bytes(THUMBNAIL_SIZE[0] * THUMBNAIL_SIZE[1] * 3)},
+            sub_ifds=[
+                Ifd(
+                    {COMPRESSION_TAG: (SHORT, [7]), PHOTOMETRIC_TAG: (SHORT, [32803])},
+                    {STRIP_OFFSETS_TAG: jpeg((2400, 1600))}
+                ),
+                Ifd(
+                    {COMPRESSION_TAG: (SHORT, [7]), PHOTOMETRIC_TAG: (SHORT, [6])},
+                    {STRIP_OFFSETS_TAG: jpeg(PREVIEW_SIZE)}
+                )
+            ]
+        )
+    ])
+
+
+CASES = (
+    Case('cr2', '.cr2', cr2),
+    Case('nef', '.nef', nef),
+    Case('arw', '.arw', arw),
+    Case('dng', '.dng', dng)
+)
+
+
+def measure_ms(func: Callable[[], object], repeat: int) -> float:
+    func()
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def open_and_load(image_path: Path) -> None:
+    with open_image(image_path) as image:
+        image.load()
+
+
+def main() -> None:
+    ap = ArgumentParser()
+    ap.add_argument('--repeat', type=int, default=20)
+    args = ap.parse_args()
+
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+    with tempfile.TemporaryDirectory(prefix='raw-previews-bench-') as directory:
+        root = Path(directory)
+
+        small_jpeg = root / 'small.jpg'
+        small_jpeg.write_bytes(jpeg(SMALL_JPEG_SIZE))
+
+        print(
+            f'{"case":<12}{"file MB":>10}{"parse ms":>10}{"open ms":>10}'
+            f'{"load_image ms":>15}'
+        )
+        for case in CASES:
+            data = case.build()
+            image_path = root / f'{case.name}{case.extension}'
+            image_path.write_bytes(data)
+
+            parse = measure_ms(lambda: find_preview(data), args.repeat)
+            open_ms = measure_ms(lambda: open_and_load(image_path), args.repeat)
+            load = measure_ms(
+                lambda: load_image(image_path, MAX_DIMENSIONS),
+                args.repeat
+            )
+
+            print(
+                f'{case.name:<12}{len(data) / 1024 ** 2:>10.1f}{parse:>10.3f}'
+                f'{open_ms:>10.2f}{load:>15.2f}'
+            )
+
+        small_open = measure_ms(lambda: open_and_load(small_jpeg), args.repeat)
+        small_load = measure_ms(
+            lambda: load_image(small_jpeg, MAX_DIMENSIONS),
+            args.repeat
+        )
+        print(
+            f'{"small jpeg":<12}{small_jpeg.stat().st_size / 1024 ** 2:>10.1f}{"":>10}'
+            f'{small_open:>10.2f}{small_load:>15.2f}'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+import json
+import platform
+import statistics
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+import PIL
+from PyQt6.QtCore import PYQT_VERSION_STR, QT_VERSION_STR
+
+# * A benchmark is reported as a regression once its
+# * median is this much slower than the baseline
+DEFAULT_THRESHOLD = 1.2
+
+Result = dict[str, float | int]
+
+
+def measure(func: Callable[[], object], repeat: int, warmup: int = 1) -> list[float]:
+    for _ in range(warmup):
+        func()
+
+    samples: list[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+
+    return samples
+
+
+def summarize(samples: list[float]) -> Result:
+    ordered = sorted(samples)
+
+    return {
+        'median_ms': statistics.median(ordered),
+        'p95_ms': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        'min_ms': ordered[0],
+        'samples': len(ordered)
+    }
+
+
+def environment() -> dict[str, str]:
+    return {
+        'python': platform.python_version(),
+        'pillow': PIL.__version__,
+        'qt': QT_VERSION_STR,
+        'pyqt': PYQT_VERSION_STR,
+        'machine': platform.machine(),
+        'system': platform.platform()
+    }
+
+
+class Results:
+    def __init__(self) -> None:
+        self.results: dict[str, Result] = {}
+
+    def add(self, name: str, samples: list[float], **extra: float | int) -> Result:
+        result = summarize(samples)
+        result.update(extra)
+
+        self.results[name] = result
+        print(
+            f'{name:<56}{result["median_ms"]:>10.3f} ms'
+            f'{result["p95_ms"]:>10.3f} ms p95'
+        )
+
+        return result
+
+    def to_json(self) -> dict[str, Any]:
+        return {
+            'environment': environment(),
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'results': self.results
+        }
+
+    def dump(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_json(), indent=2))
+
+    # * Benchmarks missing on either side are skipped,
+    # * so the suite can grow without a new baseline
+    def compare(
+        self,
+        baseline_path: Path,
+        threshold: float = DEFAULT_THRESHOLD
+    ) -> list[str]:
+        baseline: dict[str, Result] = json.loads(baseline_path.read_text())['results']
+        regressions: list[str] = []
+
+        title = f'compared to {baseline_path}'
+        print(f'\n{title:<56}{"baseline":>13}{"now":>13}{"ratio":>9}')
+        for name, result in self.results.items():
+            previous = baseline.get(name)
+            if previous is None:
+                continue
+
+            ratio = result['median_ms'] / max(previous['median_ms'], 1e-9)
+            marker = ''
+            if ratio > threshold:
+                marker = '  REGRESSION'
+                regressions.append(name)
+
+            print(
+                f'{name:<56}{previous["median_ms"]:>10.3f} ms'
+                f'{result["median_ms"]:>10.3f} ms{ratio:>8.2f}x{marker}'
+            )
+
+        return regressions
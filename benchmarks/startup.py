@@ -0,0 +1,149 @@
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+from pathlib import Path
+
+from benchmarks.corpus import generate_corpus
+from benchmarks.results import DEFAULT_THRESHOLD, Results
+from image_organizer.image_utils.extensions import EXTENSIONS_CACHE_NAME
+
+# * Measures cold starts in fresh interpreters,
+# * from spawning the process to the first paint of the window:
+# *   python -m benchmarks.startup --output startup.json
+# *   python -m benchmarks.startup --baseline startup.json
+
+# * Runs the GUI as python -m cli would,
+# * printing the wall clock time of the first paint and quitting
+FIRST_PAINT_DRIVER = '''
+import sys
+import time
+
+from PyQt6.QtCore import QEvent, QObject, QTimer
+from PyQt6.QtWidgets import QApplication, QWidget
+
+
+class FirstPaint(QObject):
+    def eventFilter(self, watched, event):
+        painted = event.type() == QEvent.Type.Paint and isinstance(watched, QWidget)
+        if painted and watched.window().isVisible():
+            print(time.time(), flush=True)
+
+            QApplication.instance().removeEventFilter(self)
+            QTimer.singleShot(0, QApplication.closeAllWindows)
+
+        return False
+
+
+exec_ = QApplication.exec
+
+
+def exec_until_painted(self):
+    first_paint = FirstPaint(self)
+    self.installEventFilter(first_paint)
+
+    return exec_()
+
+
+QApplication.exec = exec_until_painted
+
+from cli.__main__ import main
+
+sys.argv = ['cli', *sys.argv[1:]]
+main()
+'''
+
+
+def run(arguments: list[str], environment: dict[str, str]) -> tuple[float, str]:
+    start = time.time()
+    completed = subprocess.run(
+        [sys.executable, *arguments],
+        env=environment,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+
+    return start, completed.stdout
+
+
+def main() -> None:
+    ap = ArgumentParser()
+    ap.add_argument('--repeat', type=int, default=10)
+    ap.add_argument(
+        '--output',
+        type=Path,
+        default=None,
+        help='Write the results as JSON'
+    )
+    ap.add_argument(
+        '--baseline',
+        type=Path,
+        default=None,
+        help='Results of an earlier run to compare against'
+    )
+    ap.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='startup-bench-') as temporary_directory:
+        root = Path(temporary_directory)
+        source = root / 'source'
+        destination = root / 'destination'
+        destination.mkdir()
+
+        generate_corpus(source, ['small'], ['JPEG'])
+
+        # * Nothing from the real session of the user is read or written
+        environment = {
+            **os.environ,
+            'QT_QPA_PLATFORM': 'offscreen',
+            'XDG_CACHE_HOME': str(root / 'cache'),
+            'XDG_STATE_HOME': str(root / 'state')
+        }
+        extensions_cache = root / 'cache' / 'image-organizer' / EXTENSIONS_CACHE_NAME
+
+        gui_arguments = [
+            str(source),
+            str(destination),
+            '--no-journal',
+            '--no-duplicates'
+        ]
+        first_paint = ['-c', FIRST_PAINT_DRIVER, *gui_arguments]
+        # * name, arguments, whether the extensions stay cached,
+        # * whether the end is the first paint or the exit
+        scenarios: list[tuple[str, list[str], bool, bool]] = [
+            ('startup/python', ['-c', 'pass'], True, False),
+            ('startup/help', ['-m', 'cli', '--help'], True, False),
+            ('startup/first-paint', first_paint, True, True),
+            ('startup/first-paint-no-extensions-cache', first_paint, False, True)
+        ]
+
+        results = Results()
+        for name, arguments, cache_extensions, until_paint in scenarios:
+            samples: list[float] = []
+
+            # * The first run fills the caches, the operating system ones included
+            for index in range(args.repeat + 1):
+                if not cache_extensions:
+                    extensions_cache.unlink(missing_ok=True)
+
+                start, output = run(arguments, environment)
+                end = float(output.split()[-1]) if until_paint else time.time()
+
+                if index > 0:
+                    samples.append((end - start) * 1000)
+
+            results.add(name, samples)
+
+    if args.output is not None:
+        results.dump(args.output)
+
+    if args.baseline is not None:
+        if len(results.compare(args.baseline, args.threshold)) > 0:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
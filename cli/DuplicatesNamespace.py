@@ -0,0 +1,16 @@
+from argparse import Namespace
+from pathlib import Path
+
+from image_organizer.duplicates.hash_store import HashKind
+
+
+class DuplicatesNamespace(Namespace):
+    to_scan: list[Path]
+    hash: HashKind
+    radius: int
+    json: bool
+    no_store: bool
+    processes: int
+    recursive: bool
+    include: list[str]
+    exclude: list[str]
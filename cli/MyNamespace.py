@@ -1,7 +1,42 @@
 from argparse import Namespace
+from datetime import date
 from pathlib import Path
 
+from image_organizer.catalog.catalog import CatalogFilter, SortKey
+from image_organizer.defaults import Quality
+
 
 class MyNamespace(Namespace):
-    to_move: Path | list[Path]
+    to_move: list[Path]
     move_to: Path
+    prefetch_ahead: int
+    prefetch_behind: int
+    quality: Quality
+    cache_size: int
+    no_disk_cache: bool
+    clear_disk_cache: bool
+    disk_cache_size: int
+    recursive: bool
+    include: list[str]
+    exclude: list[str]
+    no_journal: bool
+    no_duplicates: bool
+    no_hash_cache: bool
+    no_catalog: bool
+    no_watch: bool
+    sort_by: SortKey
+    camera: str | None
+    taken_after: date | None
+    taken_before: date | None
+    min_megapixels: float | None
+    show_timings: bool
+    trace: Path | None
+
+    @property
+    def catalog_filter(self) -> CatalogFilter:
+        return CatalogFilter(
+            self.camera,
+            self.taken_after,
+            self.taken_before,
+            self.min_megapixels
+        )
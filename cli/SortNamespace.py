@@ -0,0 +1,16 @@
+from argparse import Namespace
+from pathlib import Path
+
+
+class SortNamespace(Namespace):
+    to_move: list[Path]
+    move_to: Path
+    rules: Path
+    dry_run: bool
+    json: bool
+    verify: bool
+    processes: int
+    chunk_size: int
+    recursive: bool
+    include: list[str]
+    exclude: list[str]
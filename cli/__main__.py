@@ -1,53 +1,25 @@
 import sys
-from argparse import ArgumentDefaultsHelpFormatter, ArgumentParser
-from pathlib import Path
+from importlib import import_module
 
-from PyQt6.QtCore import QSize
-from PyQt6.QtWidgets import QApplication
+# * Headless commands, each module has a main(argv) returning the exit code
+COMMANDS = {
+    'sort': 'cli.sort',
+    'duplicates': 'cli.duplicates'
+}
 
-from cli.actions.accessible_directory import AccessibleDirectory
-from cli.actions.directory_or_glob import DirectoryOrGlob
-from cli.MyNamespace import MyNamespace
-from image_organizer import MainWindow
 
+def main() -> None:
+    # * The headless commands are dispatched before anything imports PyQt6
+    if len(sys.argv) > 1 and sys.argv[1] in COMMANDS:
+        command = import_module(COMMANDS[sys.argv[1]])
 
-def parse_args() -> MyNamespace:
-    ap = ArgumentParser(
-        formatter_class=ArgumentDefaultsHelpFormatter
-    )
+        sys.exit(command.main(sys.argv[2:]))
 
-    ap.add_argument(
-        'to_move',
-        help='The directory or a glob which specifies which files you would like to move',
-        type=Path,
-        action=DirectoryOrGlob
-    )
+    from cli.gui import main as gui_main
 
-    ap.add_argument(
-        'move_to',
-        help='A directory to which the files will be moved',
-        type=Path,
-        action=AccessibleDirectory
-    )
+    gui_main()
 
-    nsp = MyNamespace()
-    ap.parse_args(namespace=nsp)
 
-    return nsp
-
-
-def main():
-    args = parse_args()
-    app = QApplication(sys.argv)
-
-    window = MainWindow(
-        args.to_move,
-        args.move_to
-    )
-
-    window.resize(QSize(1280, 720))
-
-    window.show()
-    app.exec()
-
-main()
+# * Worker processes started with spawn or forkserver import the main module again
+if __name__ == '__main__':
+    main()
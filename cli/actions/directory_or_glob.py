@@ -4,7 +4,7 @@ from pathlib import Path
 from typing import NoReturn
 
 from cli.actions.accessible_directory import AccessibleDirectory
-from image_organizer.image_utils.find_images import find_images
+from image_organizer.image_utils.find_images import iter_images
 
 
 class DirectoryOrGlob(AccessibleDirectory):
@@ -17,15 +17,15 @@ class DirectoryOrGlob(AccessibleDirectory):
     def _run_path_checks(self, value: Path) -> Path:
         return super()._run_checks(value)
 
-    def _run_glob_checks(self, pattern: str) -> list[Path]:
-        glob_paths = find_images(pattern)
-
-        if len(glob_paths) <= 0:
+    # * Globs are only checked for a first match here,
+    # * they are expanded later by the discovery engine
+    def _run_glob_checks(self, pattern: Path) -> Path:
+        if next(iter_images(str(pattern)), None) is None:
             self._raise_error(
                 f'The glob pattern provided as {self.dest} did not match any images'
             )
 
-        return glob_paths
+        return pattern
 
 
     def __call__(
@@ -46,15 +46,12 @@ class DirectoryOrGlob(AccessibleDirectory):
             if values.is_dir():
                 result = self._run_path_checks(single_path_or_glob)
             else:
-                result = self._run_glob_checks(str(single_path_or_glob))
+                result = self._run_glob_checks(single_path_or_glob)
         else:
             for value in values:
                 if value.is_dir():
                     result.append(self._run_path_checks(value))
                 else:
-                    map(
-                        lambda item: result.append(item),
-                        self._run_glob_checks(str(value))
-                    )
+                    result.append(self._run_glob_checks(value))
 
         setattr(namespace, self.dest, result)
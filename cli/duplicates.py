@@ -0,0 +1,136 @@
+import json
+import sys
+import time
+from argparse import ArgumentDefaultsHelpFormatter, ArgumentParser
+from collections.abc import Sequence
+from pathlib import Path
+
+from cli.actions.directory_or_glob import DirectoryOrGlob
+from cli.DuplicatesNamespace import DuplicatesNamespace
+from image_organizer.duplicates.duplicate_index import DEFAULT_RADIUS, DuplicateIndex
+from image_organizer.duplicates.hash_store import (
+    DEFAULT_HASH_KIND,
+    HASH_KINDS,
+    HashStore,
+)
+from image_organizer.duplicates.hashing import DEFAULT_PROCESSES, compute_hashes
+from image_organizer.image_utils.discovery import discover_images
+
+
+def parse_args(argv: Sequence[str]) -> DuplicatesNamespace:
+    ap = ArgumentParser(
+        prog='python -m cli duplicates',
+        description='Group visually similar images, without opening the GUI',
+        formatter_class=ArgumentDefaultsHelpFormatter
+    )
+
+    ap.add_argument(
+        'to_scan',
+        help='The directories or globs which specify which images to compare',
+        type=Path,
+        nargs='+',
+        action=DirectoryOrGlob
+    )
+
+    ap.add_argument(
+        '--hash',
+        help='The perceptual hash images are compared by',
+        choices=HASH_KINDS,
+        default=DEFAULT_HASH_KIND
+    )
+
+    ap.add_argument(
+        '--radius',
+        help=(
+            'How many of the 64 bits of the hashes may '
+            'differ for the images to count as duplicates'
+        ),
+        type=int,
+        default=DEFAULT_RADIUS
+    )
+
+    ap.add_argument(
+        '--json',
+        help='Print every group as a JSON list rather than text',
+        action='store_true'
+    )
+
+    ap.add_argument(
+        '--no-store',
+        help='Do not read or write the hashes cached on disk between runs',
+        action='store_true'
+    )
+
+    ap.add_argument(
+        '--processes',
+        help='How many worker processes compute the hashes',
+        type=int,
+        default=DEFAULT_PROCESSES
+    )
+
+    ap.add_argument(
+        '-r',
+        '--recursive',
+        help='Look for images in the subdirectories of the source directories as well',
+        action='store_true'
+    )
+
+    ap.add_argument(
+        '--include',
+        help='Only use images which match the pattern, can be specified multiple times',
+        action='append',
+        default=[]
+    )
+
+    ap.add_argument(
+        '--exclude',
+        help=(
+            'Skip files and directories which match the pattern, '
+            'can be specified multiple times'
+        ),
+        action='append',
+        default=[]
+    )
+
+    nsp = DuplicatesNamespace()
+    ap.parse_args(argv, namespace=nsp)
+
+    return nsp
+
+
+def main(argv: Sequence[str]) -> int:
+    args = parse_args(argv)
+
+    sources = [args.to_scan] if isinstance(args.to_scan, Path) else args.to_scan
+    source_folders = [source for source in sources if source.is_dir()]
+    source_globs = [str(source) for source in sources if not source.is_dir()]
+
+    start = time.perf_counter()
+    image_paths = discover_images(
+        source_folders,
+        source_globs,
+        recursive=args.recursive,
+        include=args.include,
+        exclude=args.exclude
+    )
+
+    index = DuplicateIndex(args.hash, args.radius)
+    store = None if args.no_store else HashStore()
+    index.add_many(compute_hashes(image_paths, store, args.processes))
+
+    groups = index.groups()
+
+    for group in groups:
+        if args.json:
+            print(json.dumps([str(image_path) for image_path in group]))
+            continue
+
+        print('\n'.join(str(image_path) for image_path in group), end='\n\n')
+
+    print(
+        f'{len(groups)} groups with {sum(map(len, groups))} of {len(index)} images '
+        f'in {time.perf_counter() - start:.2f}s',
+        file=sys.stderr
+    )
+
+    return 0
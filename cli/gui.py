@@ -0,0 +1,291 @@
+import sys
+from argparse import ArgumentDefaultsHelpFormatter, ArgumentParser
+from datetime import date
+from pathlib import Path
+
+from cli.actions.accessible_directory import AccessibleDirectory
+from cli.actions.directory_or_glob import DirectoryOrGlob
+from cli.MyNamespace import MyNamespace
+from image_organizer.catalog.catalog import SORT_KEYS, Catalog
+from image_organizer.defaults import (
+    DEFAULT_CACHE_LIMIT,
+    DEFAULT_DISK_CACHE_LIMIT,
+    DEFAULT_PREFETCH_AHEAD,
+    DEFAULT_PREFETCH_BEHIND,
+    DEFAULT_QUALITY,
+    QUALITIES,
+)
+from image_organizer.duplicates.hash_store import HashStore
+from image_organizer.file_operations.journal import Journal
+from image_organizer.instrumentation.stage_timings import timings
+from image_organizer.instrumentation.trace import TraceRecorder
+
+
+def parse_args() -> MyNamespace:
+    ap = ArgumentParser(
+        epilog=(
+            'Run "python -m cli sort --help" or "python -m cli duplicates --help" '
+            'for the commands which work without the GUI'
+        ),
+        formatter_class=ArgumentDefaultsHelpFormatter
+    )
+
+    ap.add_argument(
+        'to_move',
+        help=(
+            'The directories or globs which specify '
+            'which files you would like to move'
+        ),
+        type=Path,
+        nargs='+',
+        action=DirectoryOrGlob
+    )
+
+    ap.add_argument(
+        'move_to',
+        help='A directory to which the files will be moved',
+        type=Path,
+        action=AccessibleDirectory
+    )
+
+    ap.add_argument(
+        '--prefetch-ahead',
+        help=(
+            'How many images in the direction of '
+            'navigation are decoded in the background'
+        ),
+        type=int,
+        default=DEFAULT_PREFETCH_AHEAD
+    )
+
+    ap.add_argument(
+        '--prefetch-behind',
+        help=(
+            'How many images against the direction of '
+            'navigation are decoded in the background'
+        ),
+        type=int,
+        default=DEFAULT_PREFETCH_BEHIND
+    )
+
+    ap.add_argument(
+        '--quality',
+        help=(
+            'Trade-off between decoding speed and '
+            'the quality of the downscaled previews'
+        ),
+        choices=QUALITIES,
+        default=DEFAULT_QUALITY
+    )
+
+    ap.add_argument(
+        '--cache-size',
+        help='How many megabytes of decoded images are kept in memory',
+        type=int,
+        default=DEFAULT_CACHE_LIMIT // 1024 ** 2
+    )
+
+    ap.add_argument(
+        '--no-disk-cache',
+        help='Do not read or write the previews cached on disk between sessions',
+        action='store_true'
+    )
+
+    ap.add_argument(
+        '--clear-disk-cache',
+        help='Remove all of the previews cached on disk before starting',
+        action='store_true'
+    )
+
+    ap.add_argument(
+        '--disk-cache-size',
+        help='How many megabytes of previews are kept on disk',
+        type=int,
+        default=DEFAULT_DISK_CACHE_LIMIT // 1024 ** 2
+    )
+
+    ap.add_argument(
+        '-r',
+        '--recursive',
+        help='Look for images in the subdirectories of the source directories as well',
+        action='store_true'
+    )
+
+    ap.add_argument(
+        '--include',
+        help='Only use images which match the pattern, can be specified multiple times',
+        action='append',
+        default=[]
+    )
+
+    ap.add_argument(
+        '--exclude',
+        help=(
+            'Skip files and directories which match the pattern, '
+            'can be specified multiple times'
+        ),
+        action='append',
+        default=[]
+    )
+
+    ap.add_argument(
+        '--no-duplicates',
+        help='Do not look for similar images in the background',
+        action='store_true'
+    )
+
+    ap.add_argument(
+        '--no-hash-cache',
+        help=(
+            'Do not read or write the hashes of the images '
+            'cached on disk between sessions'
+        ),
+        action='store_true'
+    )
+
+    ap.add_argument(
+        '--no-journal',
+        help=(
+            'Do not keep a journal of the file operations, '
+            'which disables undo and resuming the session'
+        ),
+        action='store_true'
+    )
+
+    ap.add_argument(
+        '--no-catalog',
+        help=(
+            'Do not keep the listings and the metadata of the images in a catalog '
+            'between sessions, which disables sorting and filtering the images'
+        ),
+        action='store_true'
+    )
+
+    ap.add_argument(
+        '--no-watch',
+        help=(
+            'Do not follow images being added, removed or renamed '
+            'in the source directories while the app is open'
+        ),
+        action='store_true'
+    )
+
+    ap.add_argument(
+        '--sort-by',
+        help='Order of the images, applied once their metadata has been read',
+        choices=SORT_KEYS,
+        default='name'
+    )
+
+    ap.add_argument(
+        '--camera',
+        help=(
+            'Only show images taken with a camera whose model matches the pattern, '
+            'case insensitive'
+        )
+    )
+
+    ap.add_argument(
+        '--taken-after',
+        help='Only show images taken on or after the date, in the YYYY-MM-DD format',
+        type=date.fromisoformat
+    )
+
+    ap.add_argument(
+        '--taken-before',
+        help='Only show images taken on or before the date, in the YYYY-MM-DD format',
+        type=date.fromisoformat
+    )
+
+    ap.add_argument(
+        '--min-megapixels',
+        help='Only show images with at least this many megapixels',
+        type=float
+    )
+
+    ap.add_argument(
+        '--show-timings',
+        help=(
+            'Show the rolling percentiles of every stage of image loading '
+            'next to the image info, F12 toggles them'
+        ),
+        action='store_true'
+    )
+
+    ap.add_argument(
+        '--trace',
+        help=(
+            'Write the timings of the session to a file in the Chrome trace event '
+            'format on exit, it can be opened in chrome://tracing or '
+            'https://ui.perfetto.dev'
+        ),
+        type=Path,
+        metavar='PATH'
+    )
+
+    nsp = MyNamespace()
+    ap.parse_args(namespace=nsp)
+
+    if nsp.no_catalog and (nsp.sort_by != 'name' or not nsp.catalog_filter.is_empty):
+        ap.error(
+            'sorting and filtering the images needs the catalog, '
+            '--no-catalog can not be used with them'
+        )
+
+    return nsp
+
+
+def main():
+    args = parse_args()
+
+    # * Qt and the rest of the GUI are only imported once the arguments are known
+    # * to be valid, so --help and mistakes in the arguments are reported right away
+    from PyQt6.QtCore import QSize
+    from PyQt6.QtWidgets import QApplication
+
+    from image_organizer import MainWindow
+    from image_organizer.image_utils.disk_cache import DiskCache
+
+    app = QApplication(sys.argv)
+
+    disk_cache = DiskCache(limit_bytes=args.disk_cache_size * 1024 ** 2)
+    if args.clear_disk_cache:
+        disk_cache.clear()
+
+    trace = TraceRecorder()
+    if args.trace is not None:
+        timings.enable(trace)
+
+    journal = None
+    if not args.no_journal:
+        journal = Journal.for_sources(args.to_move)
+
+    window = MainWindow(
+        to_move=args.to_move,
+        move_to=args.move_to,
+        prefetch_ahead=args.prefetch_ahead,
+        prefetch_behind=args.prefetch_behind,
+        quality=args.quality,
+        cache_limit=args.cache_size * 1024 ** 2,
+        disk_cache=None if args.no_disk_cache else disk_cache,
+        recursive=args.recursive,
+        include=args.include,
+        exclude=args.exclude,
+        journal=journal,
+        find_duplicates=not args.no_duplicates,
+        hash_store=None if args.no_hash_cache else HashStore(),
+        show_timings=args.show_timings,
+        catalog=None if args.no_catalog else Catalog(),
+        sort_by=args.sort_by,
+        catalog_filter=args.catalog_filter,
+        watch=not args.no_watch
+    )
+
+    window.resize(QSize(1280, 720))
+
+    window.show()
+    app.exec()
+
+    if args.trace is not None:
+        trace.dump(args.trace)
+        print(f'Wrote {len(trace)} trace events to {args.trace}', file=sys.stderr)
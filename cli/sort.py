@@ -0,0 +1,213 @@
+import json
+import sys
+import time
+from argparse import ArgumentDefaultsHelpFormatter, ArgumentParser
+from collections.abc import Sequence
+from pathlib import Path
+
+from cli.actions.accessible_directory import AccessibleDirectory
+from cli.actions.directory_or_glob import DirectoryOrGlob
+from cli.SortNamespace import SortNamespace
+from image_organizer.batch_sort.batch import (
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_PROCESSES,
+    Plan,
+    build_plan,
+    execute_plan,
+)
+from image_organizer.batch_sort.rules import load_rules
+from image_organizer.image_utils.discovery import discover_images
+
+RULES_EXAMPLE = '''
+rules are read from a TOML file, the first matching rule decides where an image goes:
+
+  [[rule]]
+  camera = "Canon*"
+  date_from = 2020-01-01
+  destination = "canon/{year}/{month}"
+
+  [[rule]]
+  aspect = "portrait"
+  min_megapixels = 12
+  destination = "portraits/{orientation}"
+
+destination fields: year, month, day, date, camera, make, width, height,
+megapixels, orientation, extension
+'''
+
+
+def parse_args(argv: Sequence[str]) -> SortNamespace:
+    ap = ArgumentParser(
+        prog='python -m cli sort',
+        description='Sort images into directories by rules, without opening the GUI',
+        epilog=RULES_EXAMPLE,
+        formatter_class=ArgumentDefaultsHelpFormatter
+    )
+
+    ap.add_argument(
+        'to_move',
+        help=(
+            'The directories or globs which specify '
+            'which files you would like to sort'
+        ),
+        type=Path,
+        nargs='+',
+        action=DirectoryOrGlob
+    )
+
+    ap.add_argument(
+        'move_to',
+        help='A directory in which the destinations of the rules are created',
+        type=Path,
+        action=AccessibleDirectory
+    )
+
+    ap.add_argument(
+        '--rules',
+        help='A TOML file with the [[rule]] tables to apply',
+        type=Path,
+        required=True
+    )
+
+    ap.add_argument(
+        '-n',
+        '--dry-run',
+        help='Only print where every image would be moved to',
+        action='store_true'
+    )
+
+    ap.add_argument(
+        '--json',
+        help='Print the dry run plan as JSON lines rather than text',
+        action='store_true'
+    )
+
+    ap.add_argument(
+        '--verify',
+        help=(
+            'Compare the contents of files copied between '
+            'devices before removing the originals'
+        ),
+        action='store_true'
+    )
+
+    ap.add_argument(
+        '--processes',
+        help='How many worker processes read the images and move them',
+        type=int,
+        default=DEFAULT_PROCESSES
+    )
+
+    ap.add_argument(
+        '--chunk-size',
+        help='How many files are handed to a worker process at once',
+        type=int,
+        default=DEFAULT_CHUNK_SIZE
+    )
+
+    ap.add_argument(
+        '-r',
+        '--recursive',
+        help='Look for images in the subdirectories of the source directories as well',
+        action='store_true'
+    )
+
+    ap.add_argument(
+        '--include',
+        help='Only use images which match the pattern, can be specified multiple times',
+        action='append',
+        default=[]
+    )
+
+    ap.add_argument(
+        '--exclude',
+        help=(
+            'Skip files and directories which match the pattern, '
+            'can be specified multiple times'
+        ),
+        action='append',
+        default=[]
+    )
+
+    nsp = SortNamespace()
+    ap.parse_args(argv, namespace=nsp)
+
+    if not nsp.rules.is_file():
+        ap.error(f'The rules file {nsp.rules} does not exist')
+
+    return nsp
+
+
+def print_plan(plan: Plan, as_json: bool) -> None:
+    for move in plan.moves:
+        if as_json:
+            print(json.dumps({'source': str(move.source), 'target': str(move.target)}))
+        else:
+            print(f'{move.source} -> {move.target}')
+
+
+def report(plan: Plan) -> None:
+    for move in plan.conflicts:
+        print(
+            f'Skipping {move.source}, {move.target} '
+            'is already the target of another image',
+            file=sys.stderr
+        )
+
+    for image_path, message in plan.failures:
+        print(f'Could not read {image_path}: {message}', file=sys.stderr)
+
+
+def main(argv: Sequence[str]) -> int:
+    args = parse_args(argv)
+
+    try:
+        rules = load_rules(args.rules)
+    except ValueError as e:
+        print(f'Invalid rules in {args.rules}: {e}', file=sys.stderr)
+        return 2
+
+    sources = [args.to_move] if isinstance(args.to_move, Path) else args.to_move
+    source_folders = [source for source in sources if source.is_dir()]
+    source_globs = [str(source) for source in sources if not source.is_dir()]
+
+    start = time.perf_counter()
+    image_paths = discover_images(
+        source_folders,
+        source_globs,
+        recursive=args.recursive,
+        include=args.include,
+        exclude=args.exclude
+    )
+
+    plan = build_plan(image_paths, rules, args.move_to, args.processes, args.chunk_size)
+    planned_in = time.perf_counter() - start
+
+    report(plan)
+
+    if args.dry_run:
+        print_plan(plan, args.json)
+        print(
+            f'{len(plan.moves)} to move, {len(plan.unmatched)} unmatched, '
+            f'{len(plan.conflicts)} conflicts, {len(plan.failures)} unreadable '
+            f'out of {plan.total} images, planned in {planned_in:.2f}s',
+            file=sys.stderr
+        )
+
+        return 0
+
+    start = time.perf_counter()
+    failures = execute_plan(plan, args.processes, args.chunk_size, args.verify)
+    moved_in = time.perf_counter() - start
+
+    for image_path, message in failures:
+        print(f'Could not move {image_path}: {message}', file=sys.stderr)
+
+    print(
+        f'Moved {len(plan.moves) - len(failures)} of {plan.total} images '
+        f'({len(failures)} failed, {len(plan.unmatched)} '
+        f'unmatched) in {planned_in + moved_in:.2f}s',
+        file=sys.stderr
+    )
+
+    return 1 if len(failures) > 0 or len(plan.failures) > 0 else 0
@@ -1 +1,14 @@
-from image_organizer.main_window import MainWindow as MainWindow
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from image_organizer.main_window import MainWindow as MainWindow
+
+
+# * The window pulls in PyQt6, which the headless tools never import
+def __getattr__(name: str) -> Any:
+    if name == 'MainWindow':
+        from image_organizer.main_window import MainWindow
+
+        return MainWindow
+
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
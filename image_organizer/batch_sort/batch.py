@@ -0,0 +1,191 @@
+import os
+from collections.abc import Callable, Iterable
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import NamedTuple
+
+from image_organizer.batch_sort.rules import Rule, read_metadata
+from image_organizer.file_operations.move_engine import MoveEngine
+from image_organizer.utils.chunked import chunked
+
+DEFAULT_PROCESSES = os.cpu_count() or 1
+
+# * Files are handed to the workers in chunks,
+# * so the pickling overhead is paid per chunk
+DEFAULT_CHUNK_SIZE = 256
+
+ChunkCallback = Callable[[int], None]
+
+
+class PlannedMove(NamedTuple):
+    source: Path
+    target: Path
+
+
+class Plan:
+    def __init__(self) -> None:
+        self.moves: list[PlannedMove] = []
+        self.unmatched: list[Path] = []
+
+        # * Moves which would end up at the same path as an earlier one
+        self.conflicts: list[PlannedMove] = []
+        self.failures: list[tuple[Path, str]] = []
+
+    @property
+    def total(self) -> int:
+        planned = len(self.moves) + len(self.unmatched)
+        return planned + len(self.conflicts) + len(self.failures)
+
+
+# * Rules are sent to every worker once, rather than with each chunk
+_worker_rules: list[Rule] = []
+
+
+def _init_worker(rules: list[Rule]) -> None:
+    global _worker_rules
+    _worker_rules = rules
+
+
+# * The destination relative to the target directory,
+# * None if no rule matched, or an error
+PlanResult = tuple[str, str | None, str | None]
+
+
+def plan_file(image_path: Path, rules: list[Rule]) -> Path | None:
+    candidates = [rule for rule in rules if rule.matches_path(image_path)]
+    if len(candidates) == 0:
+        return None
+
+    metadata = read_metadata(image_path, any(rule.uses_exif for rule in candidates))
+
+    for rule in candidates:
+        if rule.matches(metadata):
+            return rule.destination_for(metadata, image_path)
+
+    return None
+
+
+def _plan_chunk(image_paths: list[str]) -> list[PlanResult]:
+    results: list[PlanResult] = []
+
+    for image_path in image_paths:
+        try:
+            destination = plan_file(Path(image_path), _worker_rules)
+        except (OSError, ValueError, SyntaxError) as e:
+            results.append((image_path, None, str(e)))
+            continue
+
+        if destination is None:
+            results.append((image_path, None, None))
+        else:
+            results.append((image_path, str(destination), None))
+
+    return results
+
+
+def build_plan(
+    image_paths: Iterable[Path],
+    rules: list[Rule],
+    move_to: Path,
+    processes: int = DEFAULT_PROCESSES,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    on_chunk: ChunkCallback | None = None
+) -> Plan:
+    plan = Plan()
+    targets: set[Path] = set()
+
+    chunks = chunked(map(str, image_paths), chunk_size)
+
+    with ProcessPoolExecutor(
+        processes,
+        initializer=_init_worker,
+        initargs=(rules,)
+    ) as pool:
+        for results in pool.map(_plan_chunk, chunks):
+            for image_path, destination, error in results:
+                source = Path(image_path)
+
+                if error is not None:
+                    plan.failures.append((source, error))
+                elif destination is None:
+                    plan.unmatched.append(source)
+                else:
+                    move = PlannedMove(source, move_to / destination / source.name)
+
+                    if move.target in targets:
+                        plan.conflicts.append(move)
+                    else:
+                        targets.add(move.target)
+                        plan.moves.append(move)
+
+            if on_chunk is not None:
+                on_chunk(len(results))
+
+    return plan
+
+
+# * Moves a chunk of files with a single fsync at the end,
+# * returning the ones which have failed
+def _move_chunk(moves: list[tuple[str, str]], verify: bool) -> list[tuple[str, str]]:
+    failures: list[tuple[str, str]] = []
+    created: set[Path] = set()
+
+    # * Never flushed in the middle of a move,
+    # * so an error of the flush is not mistaken for one of the move
+    engine = MoveEngine(verify=verify, fsync_batch_size=len(moves) + 1)
+
+    try:
+        for source, target in moves:
+            target_path = Path(target)
+
+            try:
+                if target_path.parent not in created:
+                    target_path.parent.mkdir(parents=True, exist_ok=True)
+                    created.add(target_path.parent)
+
+                engine.move(Path(source), target_path)
+            except OSError as e:
+                failures.append((source, str(e)))
+    finally:
+        try:
+            engine.flush()
+        except OSError as e:
+            # * The files are in place already, only syncing them or removing
+            # * the copied sources has failed. It is reported along with the
+            # * rest of the chunk instead of aborting the whole sort.
+            failed_path = str(e.filename or moves[-1][0])
+            failures.append((failed_path, f'Could not finish the chunk: {e}'))
+
+    return failures
+
+
+def execute_plan(
+    plan: Plan,
+    processes: int = DEFAULT_PROCESSES,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    verify: bool = False,
+    on_chunk: ChunkCallback | None = None
+) -> list[tuple[Path, str]]:
+    # * Files going to the same directory end up in the same chunk,
+    # * which keeps directory fsyncs down
+    moves = sorted(plan.moves, key=lambda move: move.target)
+    chunks = [
+        [
+            (str(move.source), str(move.target))
+            for move in moves[start:start + chunk_size]
+        ]
+        for start in range(0, len(moves), chunk_size)
+    ]
+
+    failures: list[tuple[Path, str]] = []
+
+    with ProcessPoolExecutor(processes) as pool:
+        futures = [pool.submit(_move_chunk, chunk, verify) for chunk in chunks]
+
+        for chunk, future in zip(chunks, futures):
+            failures.extend((Path(source), error) for source, error in future.result())
+
+            if on_chunk is not None:
+                on_chunk(len(chunk))
+
+    return failures
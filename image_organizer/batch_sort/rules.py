@@ -0,0 +1,294 @@
+import tomllib
+from datetime import date, datetime
+from fnmatch import fnmatch
+from pathlib import Path
+from string import Formatter
+from typing import Any, Literal, cast, get_args
+
+from PIL import ExifTags
+
+from image_organizer.image_utils.exif import (
+    TRANSPOSING_ORIENTATIONS,
+    get_date_taken,
+)
+from image_organizer.image_utils.open_image import open_image
+
+AspectName = Literal['landscape', 'portrait', 'square']
+ASPECT_NAMES: tuple[AspectName, ...] = get_args(AspectName)
+
+# * How far from 1:1 an image can be to still count as square
+SQUARE_TOLERANCE = 0.02
+
+UNKNOWN = 'unknown'
+
+# * Template fields which can only be filled in from EXIF
+EXIF_FIELDS = {'year', 'month', 'day', 'date', 'camera', 'make'}
+TEMPLATE_FIELDS = EXIF_FIELDS | {
+    'width',
+    'height',
+    'megapixels',
+    'orientation',
+    'extension'
+}
+
+
+class ImageMetadata:
+    __slots__ = (
+        'width',
+        'height',
+        'date',
+        'make',
+        'model',
+        'orientation',
+        'image_format'
+    )
+
+    def __init__(
+        self,
+        width: int,
+        height: int,
+        date: datetime | None = None,
+        make: str | None = None,
+        model: str | None = None,
+        orientation: int = 1,
+        image_format: str | None = None
+    ) -> None:
+        self.width = width
+        self.height = height
+        self.date = date
+        self.make = make
+        self.model = model
+        self.orientation = orientation
+        self.image_format = image_format
+
+    @property
+    def aspect_ratio(self) -> float:
+        return self.width / max(self.height, 1)
+
+    @property
+    def aspect_name(self) -> AspectName:
+        if abs(self.aspect_ratio - 1) <= SQUARE_TOLERANCE:
+            return 'square'
+
+        return 'landscape' if self.width > self.height else 'portrait'
+
+    @property
+    def megapixels(self) -> float:
+        return self.width * self.height / 1_000_000
+
+
+def _exif_string(value: object) -> str | None:
+    if not isinstance(value, str):
+        return None
+
+    value = value.strip('\x00 ')
+    return value or None
+
+
+# * Only the header is read, the pixel data is never decoded
+def read_metadata(image_path: Path | str, with_exif: bool = True) -> ImageMetadata:
+    with open_image(image_path) as image:
+        width, height = image.size
+        image_format = image.format
+
+        if not with_exif:
+            return ImageMetadata(width, height, image_format=image_format)
+
+        exif = image.getexif()
+
+    orientation = exif.get(ExifTags.Base.Orientation, 1)
+    if not isinstance(orientation, int):
+        orientation = 1
+
+    # * Dimensions are matched as the image is displayed
+    if orientation in TRANSPOSING_ORIENTATIONS:
+        width, height = height, width
+
+    return ImageMetadata(
+        width,
+        height,
+        get_date_taken(exif),
+        _exif_string(exif.get(ExifTags.Base.Make)),
+        _exif_string(exif.get(ExifTags.Base.Model)),
+        orientation,
+        image_format
+    )
+
+
+def _path_component(value: str) -> str:
+    return value.replace('/', '_').replace('\\', '_').strip() or UNKNOWN
+
+
+def template_fields(metadata: ImageMetadata, image_path: Path) -> dict[str, str]:
+    taken = metadata.date
+
+    return {
+        'year': UNKNOWN if taken is None else f'{taken.year:04d}',
+        'month': UNKNOWN if taken is None else f'{taken.month:02d}',
+        'day': UNKNOWN if taken is None else f'{taken.day:02d}',
+        'date': UNKNOWN if taken is None else taken.strftime('%Y-%m-%d'),
+        'camera': _path_component(metadata.model or UNKNOWN),
+        'make': _path_component(metadata.make or UNKNOWN),
+        'width': str(metadata.width),
+        'height': str(metadata.height),
+        'megapixels': f'{metadata.megapixels:.0f}',
+        'orientation': metadata.aspect_name,
+        'extension': image_path.suffix.lower().lstrip('.')
+    }
+
+
+def _to_date(value: object, key: str) -> date | None:
+    if value is None:
+        return None
+
+    if isinstance(value, datetime):
+        return value.date()
+
+    if isinstance(value, date):
+        return value
+
+    if isinstance(value, str):
+        return date.fromisoformat(value)
+
+    raise ValueError(f'{key} has to be a date, got {value!r}')
+
+
+class Rule:
+    def __init__(
+        self,
+        destination: str,
+        camera: str | None = None,
+        make: str | None = None,
+        extensions: list[str] | None = None,
+        date_from: date | None = None,
+        date_to: date | None = None,
+        min_width: int | None = None,
+        max_width: int | None = None,
+        min_height: int | None = None,
+        max_height: int | None = None,
+        min_megapixels: float | None = None,
+        max_megapixels: float | None = None,
+        aspect: AspectName | None = None,
+        min_aspect_ratio: float | None = None,
+        max_aspect_ratio: float | None = None
+    ) -> None:
+        self.destination = destination
+        self.camera = camera
+        self.make = make
+        self.extensions = None if extensions is None else {
+            f'.{extension.lower().lstrip(".")}' for extension in extensions
+        }
+        self.date_from = date_from
+        self.date_to = date_to
+        self.min_width = min_width
+        self.max_width = max_width
+        self.min_height = min_height
+        self.max_height = max_height
+        self.min_megapixels = min_megapixels
+        self.max_megapixels = max_megapixels
+        self.aspect = aspect
+        self.min_aspect_ratio = min_aspect_ratio
+        self.max_aspect_ratio = max_aspect_ratio
+
+        self.fields = {
+            field
+            for _, field, _, _ in Formatter().parse(destination)
+            if field is not None
+        }
+
+        unknown_fields = self.fields - TEMPLATE_FIELDS
+        if len(unknown_fields) > 0:
+            raise ValueError(
+                f'Unknown fields in the destination {destination!r}: '
+                f'{", ".join(sorted(unknown_fields))}'
+            )
+
+        if aspect is not None and aspect not in ASPECT_NAMES:
+            raise ValueError(
+                f'aspect has to be one of {", ".join(ASPECT_NAMES)}, got {aspect!r}'
+            )
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> 'Rule':
+        data = dict(data)
+
+        if 'destination' not in data:
+            raise ValueError('Every rule needs a destination')
+
+        for key in ('date_from', 'date_to'):
+            data[key] = _to_date(data.get(key), key)
+
+        try:
+            return cls(**data)
+        except TypeError as e:
+            raise ValueError(f'Invalid rule {data!r}: {e}') from e
+
+    # * Whether the rule can be checked with just the image header
+    @property
+    def uses_exif(self) -> bool:
+        return any((
+            self.camera is not None,
+            self.make is not None,
+            self.date_from is not None,
+            self.date_to is not None,
+            len(self.fields & EXIF_FIELDS) > 0
+        ))
+
+    # * Checks which only need the path come first,
+    # * so the file is not opened for nothing
+    def matches_path(self, image_path: Path) -> bool:
+        return self.extensions is None or image_path.suffix.lower() in self.extensions
+
+    def matches(self, metadata: ImageMetadata) -> bool:
+        model = (metadata.model or '').lower()
+        if self.camera is not None and not fnmatch(model, self.camera.lower()):
+            return False
+
+        make = (metadata.make or '').lower()
+        if self.make is not None and not fnmatch(make, self.make.lower()):
+            return False
+
+        if self.date_from is not None or self.date_to is not None:
+            if metadata.date is None:
+                return False
+
+            taken = metadata.date.date()
+            if self.date_from is not None and taken < self.date_from:
+                return False
+
+            if self.date_to is not None and taken > self.date_to:
+                return False
+
+        ranges = (
+            (metadata.width, self.min_width, self.max_width),
+            (metadata.height, self.min_height, self.max_height),
+            (metadata.megapixels, self.min_megapixels, self.max_megapixels),
+            (metadata.aspect_ratio, self.min_aspect_ratio, self.max_aspect_ratio)
+        )
+
+        for value, minimum, maximum in ranges:
+            if minimum is not None and value < minimum:
+                return False
+
+            if maximum is not None and value > maximum:
+                return False
+
+        return self.aspect is None or metadata.aspect_name == self.aspect
+
+    def destination_for(self, metadata: ImageMetadata, image_path: Path) -> Path:
+        return Path(self.destination.format_map(template_fields(metadata, image_path)))
+
+
+def parse_rules(data: dict[str, Any]) -> list[Rule]:
+    # * tomllib reads an array of tables as a list of dicts
+    tables: object = data.get('rule', [])
+    rules = cast(list[dict[str, Any]], tables) if isinstance(tables, list) else []
+    if len(rules) == 0:
+        raise ValueError('At least one [[rule]] table is required')
+
+    return [Rule.from_dict(rule) for rule in rules]
+
+
+def load_rules(rules_path: Path) -> list[Rule]:
+    with open(rules_path, 'rb') as file:
+        return parse_rules(tomllib.load(file))
@@ -0,0 +1,588 @@
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import Iterable
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Literal, NamedTuple, get_args
+
+from image_organizer.duplicates.hash_store import HashedImage
+from image_organizer.image_utils.discovery import Listing
+from image_organizer.utils.app_dirs import app_state_dir
+
+CATALOG_FILE_NAME = 'catalog.sqlite3'
+
+# * Catalogs written with another version are dropped and built again from the files
+SCHEMA_VERSION = 1
+
+SCHEMA = (
+    '''
+    CREATE TABLE directories (
+        path TEXT PRIMARY KEY,
+        mtime_ns INTEGER NOT NULL
+    )
+    ''',
+    '''
+    CREATE TABLE subdirectories (
+        parent TEXT NOT NULL,
+        name TEXT NOT NULL,
+        device INTEGER NOT NULL,
+        inode INTEGER NOT NULL,
+        PRIMARY KEY (parent, name)
+    )
+    ''',
+    # * Rows are added by the listings without any metadata, checked is set once the
+    # * size and the modification time of the file have been compared with the metadata
+    '''
+    CREATE TABLE files (
+        path TEXT PRIMARY KEY,
+        directory TEXT NOT NULL,
+        name TEXT NOT NULL,
+        device INTEGER NOT NULL,
+        inode INTEGER NOT NULL,
+        checked INTEGER NOT NULL DEFAULT 0,
+        size INTEGER,
+        mtime_ns INTEGER,
+        width INTEGER,
+        height INTEGER,
+        pixels INTEGER,
+        format TEXT,
+        taken TEXT,
+        make TEXT,
+        model TEXT,
+        orientation INTEGER,
+        dhash INTEGER,
+        phash INTEGER
+    )
+    ''',
+    'CREATE INDEX files_directory ON files (directory, name)',
+    'CREATE INDEX files_taken ON files (taken)',
+    'CREATE INDEX files_size ON files (size)',
+    'CREATE INDEX files_pixels ON files (pixels)',
+    'CREATE INDEX files_camera ON files (make, model)',
+    # * Kept apart from the files, as the files the decisions are about are moved away
+    '''
+    CREATE TABLE decisions (
+        path TEXT PRIMARY KEY,
+        decision TEXT NOT NULL,
+        target TEXT,
+        decided_at REAL NOT NULL
+    )
+    '''
+)
+
+TABLES = ('directories', 'subdirectories', 'files', 'decisions')
+
+# * Sortable as text, the way EXIF stores the date without the separators
+TAKEN_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+SortKey = Literal['name', 'date', 'size', 'resolution', 'camera']
+SORT_KEYS: tuple[SortKey, ...] = get_args(SortKey)
+
+# * Images without the value go last, ties keep the order of the names
+SORT_COLUMNS: dict[SortKey, str] = {
+    'name': 'files.path',
+    'date': 'files.taken IS NULL, files.taken',
+    'size': 'files.size IS NULL, files.size DESC',
+    'resolution': 'files.pixels IS NULL, files.pixels DESC',
+    'camera': 'files.model IS NULL, files.make, files.model, files.taken'
+}
+
+Decision = Literal['move', 'trash']
+
+# * SQLite integers are signed, hashes use all of the 64 bits
+HASH_BITS = 64
+
+
+class CatalogRecord(NamedTuple):
+    path: Path
+    device: int
+    inode: int
+    size: int
+    mtime_ns: int
+
+    # * Dimensions as the image is displayed,
+    # * all of the metadata is None for files which could not be read
+    width: int | None = None
+    height: int | None = None
+    image_format: str | None = None
+    taken: datetime | None = None
+    make: str | None = None
+    model: str | None = None
+    orientation: int = 1
+
+    @property
+    def pixels(self) -> int | None:
+        if self.width is None or self.height is None:
+            return None
+
+        return self.width * self.height
+
+
+class CatalogFilter(NamedTuple):
+    # * Matched like the camera of the batch sort rules, case insensitive with * and ?
+    camera: str | None = None
+    date_from: date | None = None
+    date_to: date | None = None
+    min_megapixels: float | None = None
+
+    @property
+    def is_empty(self) -> bool:
+        return all(value is None for value in self)
+
+
+def _signed(value: int) -> int:
+    return value - (1 << HASH_BITS) if value >= 1 << (HASH_BITS - 1) else value
+
+
+def _unsigned(value: int) -> int:
+    return value + (1 << HASH_BITS) if value < 0 else value
+
+
+def _key(image_path: Path | str) -> str:
+    return os.path.abspath(image_path)
+
+
+# * Names which are not valid UTF-8 can not be stored,
+# * directories with them are listed every time
+def _is_storable(name: str) -> bool:
+    try:
+        name.encode()
+    except UnicodeEncodeError:
+        return False
+
+    return True
+
+
+# * Paths inside of a directory, as a range which the primary keys can be searched with
+def _subtree(directory: str) -> tuple[str, str]:
+    prefix = directory.rstrip(os.sep) + os.sep
+    return prefix, prefix[:-1] + chr(ord(os.sep) + 1)
+
+
+class Catalog:
+    def __init__(self, path: Path | None = None) -> None:
+        self.path = path or app_state_dir() / CATALOG_FILE_NAME
+
+        # * A single connection is shared by the scanning threads,
+        # * SQLite serializes them anyway
+        self._lock = threading.Lock()
+        self._connection: sqlite3.Connection | None = None
+
+    def _open(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, check_same_thread=False)
+        connection.execute('PRAGMA journal_mode = WAL')
+        connection.execute('PRAGMA synchronous = NORMAL')
+
+        version, = connection.execute('PRAGMA user_version').fetchone()
+        if version != SCHEMA_VERSION:
+            with connection:
+                for table in TABLES:
+                    connection.execute(f'DROP TABLE IF EXISTS {table}')
+
+                for statement in SCHEMA:
+                    connection.execute(statement)
+
+                connection.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+
+        return connection
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is not None:
+            return self._connection
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        # * Everything in the catalog can be found again, a damaged one is started over
+        try:
+            self._connection = self._open()
+        except sqlite3.DatabaseError:
+            for suffix in ('', '-wal', '-shm'):
+                Path(f'{self.path}{suffix}').unlink(missing_ok=True)
+
+            self._connection = self._open()
+
+        return self._connection
+
+    def listing(self, directory: str, mtime_ns: int) -> Listing | None:
+        directory = _key(directory)
+
+        with self._lock:
+            connection = self._connect()
+
+            row = connection.execute(
+                'SELECT mtime_ns FROM directories WHERE path = ?',
+                (directory,)
+            ).fetchone()
+            if row is None or row[0] != mtime_ns:
+                return None
+
+            files = connection.execute(
+                'SELECT device, inode, name FROM files '
+                'WHERE directory = ? ORDER BY name',
+                (directory,)
+            ).fetchall()
+            subdirectories = connection.execute(
+                'SELECT device, inode, name FROM subdirectories '
+                'WHERE parent = ? ORDER BY name',
+                (directory,)
+            ).fetchall()
+
+        return Listing(
+            [((device, inode), name) for device, inode, name in files],
+            [((device, inode), name) for device, inode, name in subdirectories]
+        )
+
+    # * Files which are still there keep their metadata,
+    # * unless they have been replaced by another one, which is then read
+    # * again even when the size and the modification time are the same
+    def put_listing(self, directory: str, mtime_ns: int, listing: Listing) -> None:
+        entries = [*listing.files, *listing.subdirectories]
+        if not all(_is_storable(name) for _, name in entries):
+            return
+
+        directory = _key(directory)
+
+        with self._lock:
+            connection = self._connect()
+
+            with connection:
+                stored = {
+                    name: (device, inode)
+                    for name, device, inode in connection.execute(
+                        'SELECT name, device, inode FROM files WHERE directory = ?',
+                        (directory,)
+                    )
+                }
+                stored_subdirectories = {
+                    name for name, in connection.execute(
+                        'SELECT name FROM subdirectories WHERE parent = ?',
+                        (directory,)
+                    )
+                }
+
+                listed = {name for _, name in listing.files}
+                connection.executemany(
+                    'DELETE FROM files WHERE path = ?',
+                    [
+                        (os.path.join(directory, name),)
+                        for name in stored.keys() - listed
+                    ]
+                )
+                connection.executemany(
+                    '''
+                    INSERT INTO files (path, directory, name, device, inode)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT (path) DO UPDATE SET
+                        device = excluded.device,
+                        inode = excluded.inode,
+                        checked = 0,
+                        size = NULL,
+                        mtime_ns = NULL
+                    ''',
+                    [
+                        (os.path.join(directory, name), directory, name, *entry_id)
+                        for entry_id, name in listing.files
+                        if stored.get(name) != entry_id
+                    ]
+                )
+
+                # * Whatever was inside of the subdirectories
+                # * which are gone is forgotten as well
+                listed_subdirectories = {name for _, name in listing.subdirectories}
+                for name in stored_subdirectories - listed_subdirectories:
+                    self._forget_subtree(connection, os.path.join(directory, name))
+
+                connection.execute(
+                    'DELETE FROM subdirectories WHERE parent = ?',
+                    (directory,)
+                )
+                connection.executemany(
+                    'INSERT INTO subdirectories (parent, name, device, inode) '
+                    'VALUES (?, ?, ?, ?)',
+                    [
+                        (directory, name, *entry_id)
+                        for entry_id, name in listing.subdirectories
+                    ]
+                )
+
+                connection.execute(
+                    '''
+                    INSERT INTO directories (path, mtime_ns) VALUES (?, ?)
+                    ON CONFLICT (path) DO UPDATE SET mtime_ns = excluded.mtime_ns
+                    ''',
+                    (directory, mtime_ns)
+                )
+
+    def _forget_subtree(self, connection: sqlite3.Connection, directory: str) -> None:
+        start, end = _subtree(directory)
+
+        connection.execute(
+            'DELETE FROM directories WHERE path = ? OR (path >= ? AND path < ?)',
+            (directory, start, end)
+        )
+        connection.execute(
+            'DELETE FROM subdirectories '
+            'WHERE parent = ? OR (parent >= ? AND parent < ?)',
+            (directory, start, end)
+        )
+        connection.execute(
+            'DELETE FROM files WHERE path >= ? AND path < ?',
+            (start, end)
+        )
+
+    # * Images which are not in the catalog yet,
+    # * or whose file has not been checked since it was listed
+    def pending(self, image_paths: Iterable[Path]) -> list[Path]:
+        with self._lock:
+            checked = {
+                path
+                for path, in self._connect().execute(
+                    'SELECT path FROM files WHERE checked = 1'
+                )
+            }
+
+        return [
+            image_path for image_path in image_paths if _key(image_path) not in checked
+        ]
+
+    # * Size and modification time of the files whose metadata has been read
+    def stored_keys(self, image_paths: Iterable[Path]) -> dict[Path, tuple[int, int]]:
+        keys: dict[Path, tuple[int, int]] = {}
+
+        with self._lock:
+            connection = self._connect()
+
+            for image_path in image_paths:
+                row = connection.execute(
+                    'SELECT size, mtime_ns FROM files '
+                    'WHERE path = ? AND size IS NOT NULL',
+                    (_key(image_path),)
+                ).fetchone()
+
+                if row is not None:
+                    keys[image_path] = row
+
+        return keys
+
+    def mark_checked(self, image_paths: Iterable[Path]) -> None:
+        with self._lock:
+            connection = self._connect()
+
+            with connection:
+                connection.executemany(
+                    'UPDATE files SET checked = 1 WHERE path = ?',
+                    [(_key(image_path),) for image_path in image_paths]
+                )
+
+    # * The hashes are dropped along with the old metadata,
+    # * they belong to what the file used to be
+    def put_records(self, records: Iterable[CatalogRecord]) -> None:
+        rows = [
+            (
+                _key(record.path),
+                _key(record.path.parent),
+                record.path.name,
+                record.device,
+                record.inode,
+                record.size,
+                record.mtime_ns,
+                record.width,
+                record.height,
+                record.pixels,
+                record.image_format,
+                None if record.taken is None else record.taken.strftime(TAKEN_FORMAT),
+                record.make,
+                record.model,
+                record.orientation
+            )
+            for record in records
+            if _is_storable(str(record.path))
+        ]
+
+        with self._lock:
+            connection = self._connect()
+
+            with connection:
+                connection.executemany(
+                    '''
+                    INSERT INTO files (
+                        path, directory, name, device, inode, checked, size, mtime_ns,
+                        width, height, pixels, format, taken, make, model, orientation
+                    ) VALUES (?, ?, ?, ?, ?, 1, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (path) DO UPDATE SET
+                        device = excluded.device,
+                        inode = excluded.inode,
+                        checked = 1,
+                        size = excluded.size,
+                        mtime_ns = excluded.mtime_ns,
+                        width = excluded.width,
+                        height = excluded.height,
+                        pixels = excluded.pixels,
+                        format = excluded.format,
+                        taken = excluded.taken,
+                        make = excluded.make,
+                        model = excluded.model,
+                        orientation = excluded.orientation,
+                        dhash = NULL,
+                        phash = NULL
+                    ''',
+                    rows
+                )
+
+    # * Only hashes of checked files,
+    # * the others might have changed since they were hashed
+    def hashes(self, image_paths: Iterable[Path]) -> list[HashedImage]:
+        with self._lock:
+            stored = {
+                path: (_unsigned(dhash), _unsigned(phash))
+                for path, dhash, phash in self._connect().execute(
+                    'SELECT path, dhash, phash FROM files '
+                    'WHERE checked = 1 AND dhash IS NOT NULL'
+                )
+            }
+
+        return [
+            (image_path, stored[key])
+            for image_path in image_paths
+            if (key := _key(image_path)) in stored
+        ]
+
+    def put_hashes(self, hashed: Iterable[HashedImage]) -> None:
+        with self._lock:
+            connection = self._connect()
+
+            with connection:
+                connection.executemany(
+                    'UPDATE files SET dhash = ?, phash = ? WHERE path = ?',
+                    [
+                        (_signed(dhash), _signed(phash), _key(image_path))
+                        for image_path, (dhash, phash) in hashed
+                    ]
+                )
+
+    def set_decision(
+        self,
+        image_path: Path,
+        decision: Decision,
+        target: Path | None = None
+    ) -> None:
+        with self._lock:
+            connection = self._connect()
+
+            with connection:
+                connection.execute(
+                    '''
+                    INSERT INTO decisions (path, decision, target, decided_at)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT (path) DO UPDATE SET
+                        decision = excluded.decision,
+                        target = excluded.target,
+                        decided_at = excluded.decided_at
+                    ''',
+                    (
+                        _key(image_path),
+                        decision,
+                        None if target is None else _key(target),
+                        time.time()
+                    )
+                )
+
+    def clear_decision(self, image_path: Path) -> None:
+        with self._lock:
+            connection = self._connect()
+
+            with connection:
+                connection.execute(
+                    'DELETE FROM decisions WHERE path = ?',
+                    (_key(image_path),)
+                )
+
+    def decision(self, image_path: Path) -> tuple[Decision, Path | None] | None:
+        with self._lock:
+            row = self._connect().execute(
+                'SELECT decision, target FROM decisions WHERE path = ?',
+                (_key(image_path),)
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        decision, target = row
+        return decision, None if target is None else Path(target)
+
+    # * The images of the session in the order of the sort key,
+    # * without the ones the filter leaves out.
+    # * The sorting and the filtering are done by SQLite,
+    # * with the indexes of the columns.
+    def ordered(
+        self,
+        image_paths: list[Path],
+        sort_by: SortKey = 'name',
+        catalog_filter: CatalogFilter = CatalogFilter()
+    ) -> list[Path]:
+        by_key = {_key(image_path): image_path for image_path in image_paths}
+
+        conditions: list[str] = []
+        parameters: list[str | float] = []
+
+        if catalog_filter.camera is not None:
+            conditions.append('lower(files.model) GLOB ?')
+            parameters.append(catalog_filter.camera.lower())
+
+        if catalog_filter.date_from is not None:
+            conditions.append('files.taken >= ?')
+            parameters.append(catalog_filter.date_from.strftime(TAKEN_FORMAT))
+
+        if catalog_filter.date_to is not None:
+            conditions.append('files.taken < ?')
+            date_to = catalog_filter.date_to + timedelta(days=1)
+            parameters.append(date_to.strftime(TAKEN_FORMAT))
+
+        if catalog_filter.min_megapixels is not None:
+            conditions.append('files.pixels >= ?')
+            parameters.append(catalog_filter.min_megapixels * 1_000_000)
+
+        where = ' AND '.join(conditions) or '1'
+
+        with self._lock:
+            connection = self._connect()
+
+            with connection:
+                connection.execute(
+                    'CREATE TEMP TABLE IF NOT EXISTS session (path TEXT PRIMARY KEY)'
+                )
+                connection.execute('DELETE FROM temp.session')
+                connection.executemany(
+                    'INSERT OR IGNORE INTO temp.session (path) VALUES (?)',
+                    [(key,) for key in by_key]
+                )
+
+            rows = connection.execute(
+                f'''
+                SELECT files.path FROM files
+                JOIN temp.session ON temp.session.path = files.path
+                WHERE {where}
+                ORDER BY {SORT_COLUMNS[sort_by]}, files.path
+                ''',
+                parameters
+            ).fetchall()
+
+        ordered = [by_key[path] for path, in rows]
+
+        # * Images the catalog does not know yet are only left out by filters,
+        # * they keep their place at the end
+        if catalog_filter.is_empty:
+            known = {path for path, in rows}
+            ordered.extend(
+                image_path for key, image_path in by_key.items() if key not in known
+            )
+
+        return ordered
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
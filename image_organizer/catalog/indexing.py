@@ -0,0 +1,104 @@
+import os
+import time
+from collections.abc import Generator
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from image_organizer.batch_sort.rules import read_metadata
+from image_organizer.catalog.catalog import Catalog, CatalogRecord
+
+# * Reading the headers waits on the disk most of the time, a few threads keep it busy
+DEFAULT_INDEX_WORKERS = 4
+
+MAX_BATCH_SIZE = 256
+MAX_BATCH_INTERVAL_S = 0.5
+
+
+# * None for files which are gone,
+# * the record without metadata for the ones which could not be read
+def index_image(
+    image_path: Path,
+    stored_key: tuple[int, int] | None
+) -> CatalogRecord | Path | None:
+    try:
+        stat = os.stat(image_path)
+    except OSError:
+        return None
+
+    # * The metadata is still right for a file which only had to be listed again
+    if stored_key == (stat.st_size, stat.st_mtime_ns):
+        return image_path
+
+    record = CatalogRecord(
+        image_path,
+        stat.st_dev,
+        stat.st_ino,
+        stat.st_size,
+        stat.st_mtime_ns
+    )
+
+    try:
+        metadata = read_metadata(image_path)
+    except Exception:
+        return record
+
+    return record._replace(
+        width=metadata.width,
+        height=metadata.height,
+        image_format=metadata.image_format,
+        taken=metadata.date,
+        make=metadata.make,
+        model=metadata.model,
+        orientation=metadata.orientation
+    )
+
+
+# * Reads the metadata of the images the catalog has not checked yet, once per file.
+# * Yields how many images are done after every batch written to the catalog,
+# * closing the generator drops the images which have not been started yet.
+def index_images(
+    image_paths: list[Path],
+    catalog: Catalog,
+    workers: int = DEFAULT_INDEX_WORKERS
+) -> Generator[int, None, None]:
+    pending = catalog.pending(image_paths)
+    if len(pending) == 0:
+        return
+
+    stored_keys = catalog.stored_keys(pending)
+
+    records: list[CatalogRecord] = []
+    unchanged: list[Path] = []
+    done = 0
+    last_flush = time.monotonic()
+
+    executor = ThreadPoolExecutor(workers)
+
+    try:
+        stored = [stored_keys.get(image_path) for image_path in pending]
+        results = executor.map(index_image, pending, stored)
+
+        for result in results:
+            if isinstance(result, CatalogRecord):
+                records.append(result)
+            elif result is not None:
+                unchanged.append(result)
+
+            now = time.monotonic()
+            is_full = len(records) + len(unchanged) >= MAX_BATCH_SIZE
+            if is_full or now - last_flush >= MAX_BATCH_INTERVAL_S:
+                catalog.put_records(records)
+                catalog.mark_checked(unchanged)
+                done += len(records) + len(unchanged)
+                yield done
+
+                records = []
+                unchanged = []
+                last_flush = now
+
+        if len(records) + len(unchanged) > 0:
+            catalog.put_records(records)
+            catalog.mark_checked(unchanged)
+            yield done + len(records) + len(unchanged)
+    finally:
+        executor.shutdown(cancel_futures=True)
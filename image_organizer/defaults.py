@@ -0,0 +1,15 @@
+from typing import Literal
+
+# * Free of Qt and PIL, so the command line can
+# * be parsed before either of them is imported
+
+Quality = Literal['fast', 'balanced', 'best']
+
+QUALITIES: tuple[Quality, ...] = ('fast', 'balanced', 'best')
+DEFAULT_QUALITY: Quality = 'fast'
+
+DEFAULT_CACHE_LIMIT = 1024 ** 3 # 1GB
+DEFAULT_DISK_CACHE_LIMIT = 2 * 1024 ** 3 # 2GB
+
+DEFAULT_PREFETCH_AHEAD = 3
+DEFAULT_PREFETCH_BEHIND = 1
@@ -0,0 +1,89 @@
+from collections.abc import Hashable, Iterator
+from typing import Generic, TypeVar
+
+T = TypeVar('T', bound=Hashable)
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+class BKNode(Generic[T]):
+    __slots__ = ('value', 'items', 'children')
+
+    def __init__(self, value: int, item: T) -> None:
+        self.value = value
+        self.items: list[T] = [item]
+        self.children: dict[int, BKNode[T]] = {}
+
+
+# * Metric tree over the Hamming distance,
+# * a query only visits the children whose distance to the node is
+# * within the radius of the distance between the node and the query
+class BKTree(Generic[T]):
+    def __init__(self) -> None:
+        self._root: BKNode[T] | None = None
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, value: int, item: T) -> None:
+        self._size += 1
+
+        if self._root is None:
+            self._root = BKNode(value, item)
+            return
+
+        node = self._root
+        while True:
+            distance = hamming_distance(value, node.value)
+
+            # * Identical hashes share a node,
+            # * which keeps exact duplicates from making the tree deeper
+            if distance == 0:
+                node.items.append(item)
+                return
+
+            child = node.children.get(distance)
+            if child is None:
+                node.children[distance] = BKNode(value, item)
+                return
+
+            node = child
+
+    def remove(self, value: int, item: T) -> bool:
+        node = self._root
+
+        while node is not None:
+            distance = hamming_distance(value, node.value)
+            if distance == 0:
+                if item not in node.items:
+                    return False
+
+                # * The node stays as a routing point even when it has no items left
+                node.items.remove(item)
+                self._size -= 1
+
+                return True
+
+            node = node.children.get(distance)
+
+        return False
+
+    def query(self, value: int, radius: int) -> Iterator[tuple[int, T]]:
+        if self._root is None:
+            return
+
+        stack = [self._root]
+        while len(stack) > 0:
+            node = stack.pop()
+            distance = hamming_distance(value, node.value)
+
+            if distance <= radius:
+                for item in node.items:
+                    yield distance, item
+
+            for child_distance, child in node.children.items():
+                if distance - radius <= child_distance <= distance + radius:
+                    stack.append(child)
@@ -0,0 +1,120 @@
+from collections.abc import Iterable
+from pathlib import Path
+
+from image_organizer.duplicates.bk_tree import BKTree
+from image_organizer.duplicates.hash_store import (
+    DEFAULT_HASH_KIND,
+    HASH_KINDS,
+    HashKind,
+    ImageHashes,
+)
+
+# * Out of 64 bits, resaved, resized and slightly edited copies stay well within this
+DEFAULT_RADIUS = 6
+
+
+class DuplicateIndex:
+    def __init__(
+        self,
+        hash_kind: HashKind = DEFAULT_HASH_KIND,
+        radius: int = DEFAULT_RADIUS
+    ) -> None:
+        self.hash_kind = hash_kind
+        self.radius = radius
+
+        self._hash_position = HASH_KINDS.index(hash_kind)
+        self._hashes: dict[Path, int] = {}
+        self._tree: BKTree[Path] = BKTree()
+
+    def __len__(self) -> int:
+        return len(self._hashes)
+
+    def __contains__(self, image_path: Path) -> bool:
+        return image_path in self._hashes
+
+    def add(self, image_path: Path, hashes: ImageHashes) -> None:
+        self.remove(image_path)
+
+        value = hashes[self._hash_position]
+        self._hashes[image_path] = value
+        self._tree.add(value, image_path)
+
+    def add_many(self, hashed: Iterable[tuple[Path, ImageHashes]]) -> None:
+        for image_path, hashes in hashed:
+            self.add(image_path, hashes)
+
+    def remove(self, image_path: Path) -> bool:
+        value = self._hashes.pop(image_path, None)
+        if value is None:
+            return False
+
+        return self._tree.remove(value, image_path)
+
+    def rename(self, image_path: Path, new_path: Path) -> bool:
+        value = self._hashes.get(image_path)
+        if value is None:
+            return False
+
+        self.remove(image_path)
+
+        self._hashes[new_path] = value
+        self._tree.add(value, new_path)
+
+        return True
+
+    # * Closest first, the image itself is left out
+    def similar(
+        self,
+        image_path: Path,
+        radius: int | None = None
+    ) -> list[tuple[int, Path]]:
+        value = self._hashes.get(image_path)
+        if value is None:
+            return []
+
+        if radius is None:
+            radius = self.radius
+
+        matches = [
+            (distance, match)
+            for distance, match in self._tree.query(value, radius)
+            if match != image_path
+        ]
+
+        return sorted(matches, key=lambda match: (match[0], str(match[1])))
+
+    # * Images are grouped transitively,
+    # * so a burst where every shot is close to the next one ends up as a single group
+    def groups(self) -> list[list[Path]]:
+        parents: dict[Path, Path] = {}
+
+        def find(image_path: Path) -> Path:
+            root = image_path
+            while parents[root] != root:
+                root = parents[root]
+
+            while image_path != root:
+                parents[image_path], image_path = root, parents[image_path]
+
+            return root
+
+        for image_path, value in self._hashes.items():
+            for _, match in self._tree.query(value, self.radius):
+                if match == image_path:
+                    continue
+
+                parents.setdefault(image_path, image_path)
+                parents.setdefault(match, match)
+
+                first, second = find(image_path), find(match)
+                if first != second:
+                    parents[second] = first
+
+        groups: dict[Path, list[Path]] = {}
+        for image_path in parents:
+            groups.setdefault(find(image_path), []).append(image_path)
+
+        return sorted(
+            (sorted(group) for group in groups.values() if len(group) > 1),
+            key=lambda group: (-len(group), group[0])
+        )
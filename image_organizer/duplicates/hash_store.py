@@ -0,0 +1,127 @@
+import hashlib
+import os
+import struct
+import threading
+from pathlib import Path
+from typing import Literal, get_args
+
+from image_organizer.utils.app_dirs import app_cache_dir
+
+HASHES_FILE_NAME = 'perceptual_hashes.bin'
+
+# * magic, format version
+HEADER = struct.Struct('<4sH')
+MAGIC = b'IOPH'
+VERSION = 1
+
+KEY_SIZE = 16
+
+# * key, dHash, pHash
+RECORD = struct.Struct(f'<{KEY_SIZE}sQQ')
+
+# * Hashes of files which have changed or are gone are never removed one by one,
+# * the file is rewritten with only the latest records once it grows past this
+MAX_RECORDS = 1_000_000
+
+StoreKey = bytes
+
+# * In the order they are stored in ImageHashes. Kept apart from the hashing itself,
+# * so looking the hashes up does not import numpy.
+HashKind = Literal['dhash', 'phash']
+HASH_KINDS: tuple[HashKind, ...] = get_args(HashKind)
+DEFAULT_HASH_KIND: HashKind = 'phash'
+
+ImageHashes = tuple[int, int]
+HashedImage = tuple[Path, ImageHashes]
+
+
+def store_key(image_path: Path) -> StoreKey | None:
+    try:
+        stat = image_path.stat()
+    except OSError:
+        return None
+
+    digest = hashlib.blake2b(digest_size=KEY_SIZE)
+    digest.update(str(image_path.absolute()).encode())
+    digest.update(struct.pack('<qq', stat.st_size, stat.st_mtime_ns))
+
+    return digest.digest()
+
+
+class HashStore:
+    def __init__(self, path: Path | None = None) -> None:
+        self.path = path or app_cache_dir() / HASHES_FILE_NAME
+
+        self._lock = threading.Lock()
+        self._hashes: dict[StoreKey, ImageHashes] | None = None
+
+        # * Whether records can be appended to the file as it is. New and broken files
+        # * are only written once there is something to put into them.
+        self._appendable = False
+
+    def _load(self) -> dict[StoreKey, ImageHashes]:
+        if self._hashes is not None:
+            return self._hashes
+
+        hashes: dict[StoreKey, ImageHashes] = {}
+        record_count = 0
+
+        try:
+            data = self.path.read_bytes()
+        except OSError:
+            data = b''
+
+        if len(data) >= HEADER.size and HEADER.unpack_from(data) == (MAGIC, VERSION):
+            # * A record cut short by a crash is left out
+            end = HEADER.size + (len(data) - HEADER.size) // RECORD.size * RECORD.size
+
+            for key, dhash, phash in RECORD.iter_unpack(data[HEADER.size:end]):
+                hashes[key] = (dhash, phash)
+                record_count += 1
+
+            self._appendable = end == len(data)
+
+        self._hashes = hashes
+
+        if record_count > MAX_RECORDS:
+            self._rewrite(list(hashes.items())[-MAX_RECORDS // 2:])
+            return self._load()
+
+        return hashes
+
+    def _rewrite(self, records: list[tuple[StoreKey, ImageHashes]]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temporary_path = self.path.with_name(f'{self.path.name}.tmp')
+
+        with open(temporary_path, 'wb') as file:
+            file.write(HEADER.pack(MAGIC, VERSION))
+            file.write(b''.join(RECORD.pack(key, *hashes) for key, hashes in records))
+
+        os.replace(temporary_path, self.path)
+        self._hashes = dict(records)
+        self._appendable = True
+
+    def get(self, key: StoreKey) -> ImageHashes | None:
+        with self._lock:
+            return self._load().get(key)
+
+    def put_many(self, records: list[tuple[StoreKey, ImageHashes]]) -> None:
+        if len(records) == 0:
+            return
+
+        with self._lock:
+            hashes = self._load()
+            if not self._appendable:
+                self._rewrite(list(hashes.items()))
+                hashes = self._load()
+
+            with open(self.path, 'ab') as file:
+                file.write(b''.join(
+                    RECORD.pack(key, *image_hashes) for key, image_hashes in records
+                ))
+
+            hashes.update(records)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._rewrite([])
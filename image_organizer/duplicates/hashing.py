@@ -0,0 +1,96 @@
+import os
+from collections.abc import Generator, Iterable
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.context import BaseContext
+from pathlib import Path
+
+from PIL import Image
+
+from image_organizer.duplicates.hash_store import (
+    HashedImage,
+    HashStore,
+    ImageHashes,
+    StoreKey,
+    store_key,
+)
+from image_organizer.utils.chunked import chunked
+
+DEFAULT_PROCESSES = os.cpu_count() or 1
+
+# * Frames of a chunk are hashed together,
+# * so chunks have to be big enough for the vectorization to pay off
+DEFAULT_CHUNK_SIZE = 128
+
+
+def _hash_chunk(image_paths: list[str]) -> list[tuple[str, ImageHashes | None]]:
+    # * Only the worker processes need numpy, the GUI would otherwise import it on start
+    from image_organizer.duplicates.perceptual_hash import hash_frames, load_frame
+
+    frames: list[Image.Image] = []
+    loaded: list[str] = []
+    results: list[tuple[str, ImageHashes | None]] = []
+
+    for image_path in image_paths:
+        try:
+            frames.append(load_frame(image_path))
+        except Exception:
+            # * Corrupt and oversized images raise all sorts of errors from PIL,
+            # * only the image itself is left out
+            results.append((image_path, None))
+            continue
+
+        loaded.append(image_path)
+
+    if len(frames) > 0:
+        dhashes, phashes = hash_frames(frames)
+        results.extend(zip(loaded, zip(dhashes, phashes)))
+
+    return results
+
+
+# * Hashes come from the store when the file has not changed,
+# * the rest are computed in a process pool.
+# * Images which can not be read are left out.
+def compute_hashes(
+    image_paths: Iterable[Path],
+    store: HashStore | None = None,
+    processes: int = DEFAULT_PROCESSES,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    mp_context: BaseContext | None = None
+) -> Generator[HashedImage, None, None]:
+    missing: dict[str, StoreKey | None] = {}
+
+    for image_path in image_paths:
+        key = store_key(image_path) if store is not None else None
+        hashes = store.get(key) if store is not None and key is not None else None
+
+        if hashes is None:
+            missing[str(image_path)] = key
+        else:
+            yield image_path, hashes
+
+    if len(missing) == 0:
+        return
+
+    pool = ProcessPoolExecutor(processes, mp_context)
+
+    try:
+        for results in pool.map(_hash_chunk, chunked(missing, chunk_size)):
+            computed: list[tuple[StoreKey, ImageHashes]] = []
+
+            for image_path, hashes in results:
+                if hashes is None:
+                    continue
+
+                key = missing[image_path]
+                if key is not None:
+                    computed.append((key, hashes))
+
+                yield Path(image_path), hashes
+
+            if store is not None:
+                store.put_many(computed)
+    finally:
+        # * Chunks which have not been started yet
+        # * are dropped when the caller stops early
+        pool.shutdown(cancel_futures=True)
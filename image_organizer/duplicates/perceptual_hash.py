@@ -0,0 +1,90 @@
+from collections.abc import Sequence
+from functools import cache
+from pathlib import Path
+
+import numpy as np
+import numpy.typing as npt
+from PIL import Image
+
+from image_organizer.image_utils.open_image import open_image
+
+HASH_SIZE = 8
+
+# * pHash keeps the lowest frequencies of a DCT over
+# * a frame this many times bigger than the hash
+PHASH_FACTOR = 4
+PHASH_FRAME = HASH_SIZE * PHASH_FACTOR
+
+# * The smallest frame both of the hashes can be computed from,
+# * JPEGs are decoded straight to around it
+FRAME_SIZE = (PHASH_FRAME, PHASH_FRAME)
+
+Frames = npt.NDArray[np.float32]
+
+
+def load_frame(image_path: Path | str) -> Image.Image:
+    with open_image(image_path) as image:
+        image.draft('L', FRAME_SIZE)
+        return image.convert('L').resize(
+            FRAME_SIZE,
+            Image.Resampling.BILINEAR,
+            reducing_gap=2.0
+        )
+
+
+def _resize_frames(frames: Frames, size: tuple[int, int]) -> Frames:
+    height, width = size
+    count, frame_height, frame_width = frames.shape
+
+    # * Box filter, frames are always a whole
+    # * multiple of the target size along the height
+    boxes = frames.reshape(count, height, frame_height // height, frame_width)
+    rows = boxes.mean(axis=2)
+
+    # * dHash needs one column more than it has bits, so the columns are interpolated
+    # * instead. The shape is untyped, the end is made a float for a typed linspace.
+    positions = np.linspace(0.0, float(frame_width - 1), width)
+    left = np.floor(positions).astype(np.intp)
+    right = np.minimum(left + 1, frame_width - 1)
+    weight = (positions - left).astype(np.float32)
+
+    return rows[:, :, left] * (1 - weight) + rows[:, :, right] * weight
+
+
+def _pack_bits(bits: npt.NDArray[np.bool_]) -> list[int]:
+    packed = np.packbits(bits.reshape(len(bits), -1), axis=1)
+    return [int.from_bytes(row.tobytes(), 'big') for row in packed]
+
+
+def dhash_frames(frames: Frames) -> list[int]:
+    small = _resize_frames(frames, (HASH_SIZE, HASH_SIZE + 1))
+    return _pack_bits(small[:, :, 1:] > small[:, :, :-1])
+
+
+@cache
+def dct_matrix(size: int) -> npt.NDArray[np.float32]:
+    positions = np.arange(size)
+    angles = np.pi * (2 * positions[None, :] + 1) * positions[:, None] / (2 * size)
+    matrix = np.cos(angles)
+    matrix[0] /= np.sqrt(2)
+
+    return (matrix * np.sqrt(2 / size)).astype(np.float32)
+
+
+def phash_frames(frames: Frames) -> list[int]:
+    dct = dct_matrix(PHASH_FRAME)
+
+    # * 2D DCT of every frame at once
+    coefficients = (dct @ frames @ dct.T)[:, :HASH_SIZE, :HASH_SIZE]
+    flat = coefficients.reshape(len(frames), -1)
+
+    # * The DC coefficient is left out of the median,
+    # * as it only reflects the overall brightness
+    medians = np.median(flat[:, 1:], axis=1, keepdims=True)
+
+    return _pack_bits(flat > medians)
+
+
+def hash_frames(frames: Sequence[Image.Image]) -> tuple[list[int], list[int]]:
+    stacked = np.stack([np.asarray(frame, dtype=np.float32) for frame in frames])
+    return dhash_frames(stacked), phash_frames(stacked)
@@ -0,0 +1,414 @@
+import hashlib
+import json
+import os
+import threading
+from collections import deque
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Any
+
+from image_organizer.file_operations.move_engine import PARTIAL_SUFFIX, file_digest
+from image_organizer.file_operations.trash import find_in_trash
+from image_organizer.utils.app_dirs import app_state_dir
+
+JOURNALS_DIR_NAME = 'journals'
+
+# * Records are written and fsynced together once either of the limits is reached,
+# * or right away when an operation is about to start and is waiting for its record
+DEFAULT_GROUP_SIZE = 64
+DEFAULT_GROUP_INTERVAL_S = 1.0
+
+DEFAULT_UNDO_DEPTH = 1000
+
+# * Journals with more records than this are
+# * rewritten with just what is still needed on load
+COMPACTION_THRESHOLD = 10_000
+
+Record = dict[str, Any]
+
+
+class JournalEntry:
+    def __init__(
+        self,
+        seq: int,
+        kind: str,
+        source: Path,
+        target: Path | None,
+        index: int
+    ) -> None:
+        self.seq = seq
+        self.kind = kind
+        self.source = source
+        self.target = target
+        self.index = index
+
+    @classmethod
+    def from_record(cls, record: Record) -> 'JournalEntry':
+        target = record.get('target')
+
+        return cls(
+            record['seq'],
+            record['kind'],
+            Path(record['source']),
+            None if target is None else Path(target),
+            record.get('index', 0)
+        )
+
+    def to_record(self) -> Record:
+        return {
+            'type': 'begin',
+            'seq': self.seq,
+            'kind': self.kind,
+            'source': str(self.source),
+            'target': None if self.target is None else str(self.target),
+            'index': self.index
+        }
+
+
+def journal_path_for(sources: Iterable[Path | str]) -> Path:
+    key = '\0'.join(sorted(str(Path(source).absolute()) for source in sources))
+    digest = hashlib.blake2b(key.encode(), digest_size=12).hexdigest()
+
+    return app_state_dir() / JOURNALS_DIR_NAME / f'{digest}.jsonl'
+
+
+class Journal:
+    def __init__(
+        self,
+        path: Path,
+        group_size: int = DEFAULT_GROUP_SIZE,
+        group_interval_s: float = DEFAULT_GROUP_INTERVAL_S,
+        undo_depth: int = DEFAULT_UNDO_DEPTH
+    ) -> None:
+        self.path = path
+        self.group_size = group_size
+        self.group_interval_s = group_interval_s
+
+        # * Where the session has stopped, the index
+        # * is used when the image itself is gone
+        self.position: Path | None = None
+        self.position_index = 0
+
+        self._seq = 0
+        self._undo: deque[JournalEntry] = deque(maxlen=undo_depth)
+        self._incomplete: dict[int, JournalEntry] = {}
+
+        # * Operations are journaled from the worker thread,
+        # * while undo happens on the GUI thread
+        self._condition = threading.Condition(threading.RLock())
+        self._buffer: list[str] = []
+        self._closed = False
+
+        # * Records appended to the buffer and the ones which are on the disk,
+        # * counted since the start
+        self._appended = 0
+        self._synced = 0
+        self._sync_requested = False
+
+        # * Held while writing, so the groups reach the file
+        # * in the order they were taken from the buffer
+        self._file_lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        record_count = self._load()
+
+        if record_count > COMPACTION_THRESHOLD:
+            self._compact()
+
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+        self._flusher = threading.Thread(
+            target=self._flush_loop,
+            name='journal-flusher',
+            daemon=True
+        )
+        self._flusher.start()
+
+    @classmethod
+    def for_sources(cls, sources: Iterable[Path | str]) -> 'Journal':
+        return cls(journal_path_for(sources))
+
+    # * Replays the raw records, only the entries
+    # * which are still needed are turned into paths
+    def _load(self) -> int:
+        if not self.path.exists():
+            return 0
+
+        incomplete: dict[int, Record] = {}
+        undo: deque[Record] = deque(maxlen=self._undo.maxlen)
+        position: Record | None = None
+
+        record_count = 0
+        with open(self.path, encoding='utf-8') as file:
+            for line in file:
+                try:
+                    record: Record = json.loads(line)
+                except json.JSONDecodeError:
+                    # * A torn write from a crash, everything before it is still valid
+                    continue
+
+                record_count += 1
+                record_type = record.get('type')
+
+                if record_type == 'position':
+                    position = record
+                    continue
+
+                seq: int = record['seq']
+                self._seq = max(self._seq, seq)
+
+                if record_type == 'begin':
+                    incomplete[seq] = record
+                elif record_type == 'commit':
+                    begin = incomplete.pop(seq, None)
+                    if begin is not None:
+                        begin['target'] = record.get('target')
+                        undo.append(begin)
+                elif record_type == 'abort':
+                    incomplete.pop(seq, None)
+                elif record_type == 'undo':
+                    self._remove_undoable(undo, record['ref'])
+
+        self._undo.extend(JournalEntry.from_record(record) for record in undo)
+        self._incomplete = {
+            seq: JournalEntry.from_record(record) for seq, record in incomplete.items()
+        }
+
+        if position is not None:
+            self.position = Path(position['path'])
+            self.position_index = position.get('index', 0)
+
+        return record_count
+
+    @staticmethod
+    def _remove_undoable(undo: deque[Record], seq: int) -> None:
+        for record in reversed(undo):
+            if record['seq'] == seq:
+                undo.remove(record)
+                return
+
+    def _compact(self) -> None:
+        lines: list[str] = []
+
+        for entry in [*self._undo, *self._incomplete.values()]:
+            lines.append(json.dumps(entry.to_record()))
+
+            if entry.seq not in self._incomplete:
+                lines.append(json.dumps(self._commit_record(entry.seq, entry.target)))
+
+        if self.position is not None:
+            position = self._position_record(self.position, self.position_index)
+            lines.append(json.dumps(position))
+
+        temporary_path = self.path.with_name(f'{self.path.name}.tmp')
+        with open(temporary_path, 'w', encoding='utf-8') as file:
+            file.write(''.join(f'{line}\n' for line in lines))
+            file.flush()
+            os.fsync(file.fileno())
+
+        os.replace(temporary_path, self.path)
+
+    def _write(self, record: Record) -> None:
+        line = json.dumps(record)
+
+        with self._condition:
+            if self._closed:
+                return
+
+            # * Only the latest position matters,
+            # * there is no point in writing all of them
+            if record['type'] == 'position' and len(self._buffer) > 0 \
+                    and self._buffer[-1].startswith('{"type": "position"'):
+                self._buffer[-1] = line
+            else:
+                self._buffer.append(line)
+                self._appended += 1
+
+            if len(self._buffer) >= self.group_size:
+                self._request_sync()
+
+    def _request_sync(self) -> None:
+        self._sync_requested = True
+        self._condition.notify_all()
+
+    def _flush_loop(self) -> None:
+        while True:
+            with self._condition:
+                if not self._sync_requested and not self._closed:
+                    self._condition.wait(self.group_interval_s)
+
+                if self._closed:
+                    return
+
+                self._sync_requested = False
+
+            self._flush()
+
+    # * The buffer is swapped out under the lock, the disk is only waited on outside
+    # * of it, so recording the position on the GUI thread never waits for an fsync
+    def _flush(self) -> None:
+        with self._file_lock:
+            with self._condition:
+                if len(self._buffer) == 0:
+                    return
+
+                lines = self._buffer
+                self._buffer = []
+                appended = self._appended
+
+            self._file.write(''.join(f'{line}\n' for line in lines))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+            with self._condition:
+                self._synced = appended
+                self._condition.notify_all()
+
+    def flush(self) -> None:
+        self._flush()
+
+    def close(self) -> None:
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+        self._flusher.join()
+        self._flush()
+        self._file.close()
+
+    @staticmethod
+    def _commit_record(seq: int, target: Path | None) -> Record:
+        return {
+            'type': 'commit',
+            'seq': seq,
+            'target': None if target is None else str(target)
+        }
+
+    @staticmethod
+    def _position_record(image_path: Path, index: int) -> Record:
+        return {'type': 'position', 'path': str(image_path), 'index': index}
+
+    # * Write-ahead, returns once the record is on the disk.
+    # * Operations which begin at the same time wait for the same fsync,
+    # * the records of the other kinds are written with the next group.
+    def begin(self, kind: str, source: Path, target: Path | None, index: int) -> int:
+        with self._condition:
+            self._seq += 1
+            entry = JournalEntry(self._seq, kind, source, target, index)
+
+            self._incomplete[entry.seq] = entry
+            self._write(entry.to_record())
+
+            appended = self._appended
+            self._request_sync()
+
+            while self._synced < appended and not self._closed:
+                self._condition.wait()
+
+        return entry.seq
+
+    def commit(self, seq: int, target: Path | None) -> None:
+        with self._condition:
+            entry = self._incomplete.pop(seq, None)
+            if entry is not None:
+                entry.target = target
+                self._undo.append(entry)
+
+            self._write(self._commit_record(seq, target))
+
+    def abort(self, seq: int, message: str = '') -> None:
+        with self._condition:
+            self._incomplete.pop(seq, None)
+            self._write({'type': 'abort', 'seq': seq, 'message': message})
+
+    def record_undo(self, entry: JournalEntry) -> None:
+        with self._condition:
+            self._seq += 1
+            self._write({'type': 'undo', 'seq': self._seq, 'ref': entry.seq})
+
+    def record_position(self, image_path: Path, index: int) -> None:
+        with self._condition:
+            self.position = image_path
+            self.position_index = index
+            self._write(self._position_record(image_path, index))
+
+    def pop_undo(self) -> JournalEntry | None:
+        with self._condition:
+            if len(self._undo) == 0:
+                return None
+
+            return self._undo.pop()
+
+    # * Puts back an entry which could not be undone
+    def push_undo(self, entry: JournalEntry) -> None:
+        with self._condition:
+            self._undo.append(entry)
+
+    @property
+    def undo_count(self) -> int:
+        return len(self._undo)
+
+    def recover(self) -> list[str]:
+        messages: list[str] = []
+
+        with self._condition:
+            incomplete = list(self._incomplete.values())
+
+        for entry in incomplete:
+            message = self._recover_entry(entry)
+            if message is not None:
+                messages.append(message)
+
+        self.flush()
+        return messages
+
+    # * Works out how far an operation got before
+    # * the crash from the state of the file system
+    def _recover_entry(self, entry: JournalEntry) -> str | None:
+        source_exists = entry.source.exists()
+        target = entry.target
+
+        if entry.kind == 'trash' or target is None:
+            if source_exists:
+                self.abort(entry.seq, 'interrupted')
+                return None
+
+            self.commit(entry.seq, find_in_trash(entry.source))
+            return f'{entry.source} was moved to trash before the interruption'
+
+        if target.is_dir():
+            target = target / entry.source.name
+
+        partial = target.with_name(f'{target.name}{PARTIAL_SUFFIX}')
+        partial.unlink(missing_ok=True)
+
+        target_exists = target.exists()
+
+        if source_exists and not target_exists:
+            self.abort(entry.seq, 'interrupted')
+            return None
+
+        if not source_exists and target_exists:
+            self.commit(entry.seq, target)
+            return f'{entry.source} was moved to {target} before the interruption'
+
+        if source_exists and target_exists:
+            # * The copy went through, but the source was not removed yet
+            if file_digest(entry.source) == file_digest(target):
+                entry.source.unlink()
+                self.commit(entry.seq, target)
+
+                return f'Finished moving {entry.source} to {target}'
+
+            # * Copies only get their name once they are complete,
+            # * so this is a file which was there before, most likely the one
+            # * which made the move fail before its abort record was written
+            self.abort(entry.seq, 'target already exists')
+
+            return (
+                f'{entry.source} was not moved, '
+                f'{target} is a different file which already exists'
+            )
+
+        self.abort(entry.seq, 'both files are missing')
+        return f'{entry.source} is missing and was not found at {target}'
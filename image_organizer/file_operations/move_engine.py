@@ -0,0 +1,275 @@
+import errno
+import hashlib
+import os
+import shutil
+from collections.abc import Callable
+from pathlib import Path
+
+ProgressCallback = Callable[[int, int], None]
+
+COPY_CHUNK_SIZE = 64 * 1024 ** 2
+HASH_CHUNK_SIZE = 4 * 1024 ** 2
+PARTIAL_SUFFIX = '.partial'
+
+# * Errors meaning the kernel can not do the copy for this pair of files,
+# * rather than a real failure
+UNSUPPORTED_COPY_ERRNOS = {
+    errno.EXDEV,
+    errno.ENOSYS,
+    errno.EOPNOTSUPP,
+    errno.EINVAL,
+    errno.EBADF,
+    errno.ENOTSOCK
+}
+
+# * Errors of link() meaning the file system can not hard link this file,
+# * rather than a real failure
+UNSUPPORTED_LINK_ERRNOS = {
+    errno.EPERM,
+    errno.EOPNOTSUPP,
+    errno.ENOSYS,
+    errno.EMLINK
+}
+
+
+class VerificationError(OSError):
+    ...
+
+
+def target_path(source: Path, destination: Path) -> Path:
+    if destination.is_dir():
+        return destination / source.name
+
+    return destination
+
+
+def file_digest(path: Path) -> bytes:
+    digest = hashlib.blake2b()
+
+    with open(path, 'rb') as file:
+        while chunk := file.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+
+    return digest.digest()
+
+
+def fsync_path(path: Path) -> None:
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+# * Unlike rename(), link() fails instead of replacing a target which appeared
+# * after it was checked
+def rename_no_replace(source: Path, target: Path) -> None:
+    try:
+        os.link(source, target, follow_symlinks=False)
+    except OSError as e:
+        if e.errno not in UNSUPPORTED_LINK_ERRNOS:
+            raise
+
+        if target.exists():
+            raise FileExistsError(
+                errno.EEXIST,
+                'Destination path already exists',
+                str(target)
+            ) from e
+
+        os.rename(source, target)
+        return
+
+    os.unlink(source)
+
+
+def _copy_range(source_fd: int, target_fd: int, count: int) -> int:
+    # * Only available on Linux, the fallbacks take over elsewhere
+    if not hasattr(os, 'copy_file_range'):
+        raise OSError(errno.ENOSYS, 'copy_file_range is not available')
+
+    return os.copy_file_range(source_fd, target_fd, count)
+
+
+def _copy_sendfile(source_fd: int, target_fd: int, count: int) -> int:
+    return os.sendfile(target_fd, source_fd, None, count)
+
+
+def _copy_read_write(source_fd: int, target_fd: int, count: int) -> int:
+    data = os.read(source_fd, count)
+    written = 0
+    while written < len(data):
+        written += os.write(target_fd, data[written:])
+
+    return written
+
+
+COPY_METHODS: list[Callable[[int, int, int], int]] = [
+    _copy_range,
+    _copy_sendfile,
+    _copy_read_write
+]
+
+
+def copy_contents(
+    source_fd: int,
+    target_fd: int,
+    total: int,
+    progress: ProgressCallback | None = None
+) -> int:
+    methods = list(COPY_METHODS)
+    copied = 0
+
+    while True:
+        count = COPY_CHUNK_SIZE if total == 0 else min(COPY_CHUNK_SIZE, total - copied)
+        if count <= 0:
+            break
+
+        try:
+            chunk = methods[0](source_fd, target_fd, count)
+        except OSError as e:
+            # * Falls back to the next method, picking up from the same file offsets
+            if e.errno not in UNSUPPORTED_COPY_ERRNOS or len(methods) == 1:
+                raise
+
+            methods.pop(0)
+            continue
+
+        if chunk == 0:
+            break
+
+        copied += chunk
+        if progress is not None:
+            progress(copied, total)
+
+    return copied
+
+
+class MoveEngine:
+    def __init__(
+        self,
+        verify: bool = False,
+        fsync: bool = True,
+        fsync_batch_size: int = 1
+    ) -> None:
+        self.verify = verify
+        self.fsync = fsync
+        self.fsync_batch_size = max(1, fsync_batch_size)
+
+        # * Copied files which are only made durable,
+        # * and have their sources removed, on flush
+        self._unsynced: list[tuple[Path, Path]] = []
+        self._renamed_directories: set[Path] = set()
+        self._moves_since_flush = 0
+
+    def move(
+        self,
+        source: Path,
+        destination: Path,
+        progress: ProgressCallback | None = None
+    ) -> Path:
+        target = target_path(source, destination)
+        if target.exists():
+            raise FileExistsError(
+                errno.EEXIST,
+                'Destination path already exists',
+                str(target)
+            )
+
+        source_stat = source.stat()
+
+        try:
+            rename_no_replace(source, target)
+        except OSError as e:
+            # * Bind mounts and overlay file systems share st_dev,
+            # * so only the rename itself can tell
+            if e.errno != errno.EXDEV:
+                raise
+
+            self._copy(source, target, source_stat.st_size, progress)
+            self._unsynced.append((source, target))
+        else:
+            if self.fsync:
+                self._renamed_directories.update((source.parent, target.parent))
+
+            if progress is not None:
+                progress(source_stat.st_size, source_stat.st_size)
+
+        self._moves_since_flush += 1
+        if self._moves_since_flush >= self.fsync_batch_size:
+            self.flush()
+
+        return target
+
+    def _copy(
+        self,
+        source: Path,
+        target: Path,
+        total: int,
+        progress: ProgressCallback | None
+    ) -> None:
+        partial = target.with_name(f'{target.name}{PARTIAL_SUFFIX}')
+
+        try:
+            with open(source, 'rb') as source_file, open(partial, 'xb') as target_file:
+                copy_contents(
+                    source_file.fileno(),
+                    target_file.fileno(),
+                    total,
+                    progress
+                )
+
+            shutil.copystat(source, partial)
+
+            if self.verify:
+                self._verify(source, partial)
+
+            rename_no_replace(partial, target)
+        except BaseException:
+            partial.unlink(missing_ok=True)
+            raise
+
+    def _verify(self, source: Path, copy: Path) -> None:
+        fd = os.open(copy, os.O_RDONLY)
+        try:
+            # * Makes sure the copy is read back from
+            # * the disk rather than from the page cache
+            os.fsync(fd)
+            if hasattr(os, 'posix_fadvise'):
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+
+        if file_digest(source) != file_digest(copy):
+            raise VerificationError(
+                errno.EIO,
+                'The copy does not match the original file',
+                str(copy)
+            )
+
+    def flush(self) -> None:
+        directories = set(self._renamed_directories)
+
+        if self.fsync:
+            for _, target in self._unsynced:
+                fsync_path(target)
+                directories.add(target.parent)
+
+        # * Sources are only removed once their copies are safely on the disk
+        for source, _ in self._unsynced:
+            source.unlink()
+            directories.add(source.parent)
+
+        if self.fsync:
+            for directory in directories:
+                fsync_path(directory)
+
+        self._unsynced.clear()
+        self._renamed_directories.clear()
+        self._moves_since_flush = 0
+
+    def __enter__(self) -> 'MoveEngine':
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self.flush()
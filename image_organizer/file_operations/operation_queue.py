@@ -0,0 +1,209 @@
+import itertools
+from pathlib import Path
+from typing import Literal
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+from image_organizer.file_operations.journal import Journal, JournalEntry
+from image_organizer.file_operations.move_engine import MoveEngine, ProgressCallback
+from image_organizer.file_operations.trash import trash, trash_info_path
+
+OperationKind = Literal['move', 'trash', 'restore']
+
+_operation_ids = itertools.count(1)
+
+
+class FileOperation:
+    def __init__(
+        self,
+        kind: OperationKind,
+        source: Path,
+        destination: Path | None = None,
+        index: int = 0,
+        undo_of: JournalEntry | None = None
+    ) -> None:
+        self.id = next(_operation_ids)
+        self.kind: OperationKind = kind
+        self.source = source
+        self.destination = destination
+
+        # * Position of the image in the gallery,
+        # * so the view can be rolled back on failure
+        self.index = index
+
+        # * The journaled operation which a restore reverses
+        self.undo_of = undo_of
+
+        self.attempts = 0
+        self.error: str | None = None
+
+    @property
+    def description(self) -> str:
+        if self.kind == 'move':
+            return f'Moving {self.source.name} to {self.destination}'
+
+        if self.kind == 'restore':
+            return f'Restoring {self.source.name}'
+
+        return f'Moving {self.source.name} to trash'
+
+
+def restore(
+    entry: JournalEntry,
+    engine: MoveEngine,
+    progress: ProgressCallback
+) -> Path:
+    if entry.target is None:
+        raise ValueError(f'Could not find where {entry.source.name} was moved to')
+
+    restored = engine.move(entry.target, entry.source, progress)
+    if entry.kind == 'trash':
+        trash_info_path(entry.target).unlink(missing_ok=True)
+
+    return restored
+
+
+def execute(
+    operation: FileOperation,
+    engine: MoveEngine,
+    progress: ProgressCallback
+) -> Path | None:
+    if operation.kind == 'move':
+        if operation.destination is None:
+            raise ValueError('A destination is required to move a file')
+
+        return engine.move(operation.source, operation.destination, progress)
+
+    if operation.kind == 'restore':
+        if operation.undo_of is None:
+            raise ValueError('Only journaled operations can be restored')
+
+        return restore(operation.undo_of, engine, progress)
+
+    try:
+        total = operation.source.stat().st_size
+    except OSError:
+        total = 0
+
+    progress(0, total)
+    trashed = trash(operation.source)
+    progress(total, total)
+
+    return trashed
+
+
+class OperationSignals(QObject):
+    started = pyqtSignal(object)
+    progress = pyqtSignal(object, int, int)
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(object, str)
+
+
+class OperationTask(QRunnable):
+    def __init__(
+        self,
+        operation: FileOperation,
+        engine: MoveEngine,
+        signals: OperationSignals,
+        journal: Journal | None = None
+    ) -> None:
+        super().__init__()
+
+        self.operation = operation
+        self.engine = engine
+        self.signals = signals
+        self.journal = journal
+
+    def _progress(self, done: int, total: int) -> None:
+        self.signals.progress.emit(self.operation, done, total)
+
+    def run(self) -> None:
+        operation = self.operation
+
+        operation.attempts += 1
+        self.signals.started.emit(operation)
+
+        # * Restores are not journaled as operations of their own,
+        # * they only cancel the one they undo
+        seq: int | None = None
+        if self.journal is not None and operation.kind != 'restore':
+            seq = self.journal.begin(
+                operation.kind,
+                operation.source,
+                operation.destination,
+                operation.index
+            )
+
+        try:
+            target = execute(operation, self.engine, self._progress)
+        except (OSError, ValueError) as e:
+            if self.journal is not None and seq is not None:
+                self.journal.abort(seq, str(e))
+
+            operation.error = str(e)
+            self.signals.failed.emit(operation, str(e))
+            return
+
+        if self.journal is not None:
+            if seq is not None:
+                self.journal.commit(seq, target)
+            elif operation.undo_of is not None:
+                self.journal.record_undo(operation.undo_of)
+
+        operation.error = None
+        self.signals.finished.emit(operation)
+
+
+class FileOperationQueue(QObject):
+    started = pyqtSignal(object)
+    progress = pyqtSignal(object, int, int)
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(object, str)
+
+    def __init__(
+        self,
+        engine: MoveEngine | None = None,
+        journal: Journal | None = None,
+        parent: QObject | None = None
+    ) -> None:
+        super().__init__(parent)
+
+        self.engine = engine or MoveEngine()
+        self.journal = journal
+
+        # * Operations run one after another,
+        # * so they hit the disk in the order they were made
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(1)
+
+        self._pending: dict[int, FileOperation] = {}
+
+        self._signals = OperationSignals()
+        self._signals.started.connect(self.started)
+        self._signals.progress.connect(self.progress)
+        self._signals.finished.connect(self._finished_handler)
+        self._signals.failed.connect(self._failed_handler)
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    def submit(self, operation: FileOperation) -> None:
+        self._pending[operation.id] = operation
+        self._pool.start(
+            OperationTask(operation, self.engine, self._signals, self.journal)
+        )
+
+    def retry(self, operation: FileOperation) -> None:
+        self.submit(operation)
+
+    def wait_for_done(self, timeout_ms: int = -1) -> bool:
+        return self._pool.waitForDone(timeout_ms)
+
+    def _finished_handler(self, operation: FileOperation) -> None:
+        self._pending.pop(operation.id, None)
+        self.finished.emit(operation)
+
+    def _failed_handler(self, operation: FileOperation, message: str) -> None:
+        self._pending.pop(operation.id, None)
+        self.failed.emit(operation, message)
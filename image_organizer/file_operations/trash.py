@@ -0,0 +1,80 @@
+import os
+import sys
+from pathlib import Path
+from urllib.parse import unquote
+
+TRASH_INFO_SUFFIX = '.trashinfo'
+
+
+def xdg_data_home() -> Path:
+    return Path(os.environ.get('XDG_DATA_HOME') or Path.home() / '.local' / 'share')
+
+
+def home_trash_dir() -> Path:
+    return xdg_data_home() / 'Trash'
+
+
+def _info_source(info_path: Path) -> tuple[Path, str] | None:
+    source: Path | None = None
+    deletion_date = ''
+
+    try:
+        lines = info_path.read_text(encoding='utf-8').splitlines()
+    except OSError:
+        return None
+
+    for line in lines:
+        key, _, value = line.partition('=')
+        if key == 'Path':
+            source = Path(unquote(value))
+        elif key == 'DeletionDate':
+            deletion_date = value
+
+    if source is None:
+        return None
+
+    # * Relative paths in the home trash are relative to the data home
+    if not source.is_absolute():
+        source = xdg_data_home() / source
+
+    return source, deletion_date
+
+
+# * Only the freedesktop.org home trash used on Linux is supported,
+# * send2trash does not report where it put the file
+def find_in_trash(source: Path) -> Path | None:
+    if not sys.platform.startswith('linux'):
+        return None
+
+    info_dir = home_trash_dir() / 'info'
+    if not info_dir.is_dir():
+        return None
+
+    source = source.absolute()
+    latest: tuple[str, Path] | None = None
+
+    for info_path in info_dir.glob(f'{source.stem}*{TRASH_INFO_SUFFIX}'):
+        parsed = _info_source(info_path)
+        if parsed is None or parsed[0] != source:
+            continue
+
+        trashed_name = info_path.name.removesuffix(TRASH_INFO_SUFFIX)
+        trashed_path = home_trash_dir() / 'files' / trashed_name
+        if trashed_path.exists() and (latest is None or parsed[1] >= latest[0]):
+            latest = (parsed[1], trashed_path)
+
+    return None if latest is None else latest[1]
+
+
+def trash(source: Path) -> Path | None:
+    # * Only imported once something is trashed,
+    # * as it pulls in a platform specific backend
+    from send2trash import send2trash
+
+    send2trash(source)
+    return find_in_trash(source)
+
+
+def trash_info_path(trashed_path: Path) -> Path:
+    info_name = f'{trashed_path.name}{TRASH_INFO_SUFFIX}'
+    return trashed_path.parent.parent / 'info' / info_name
@@ -0,0 +1,39 @@
+from pathlib import Path
+
+from PyQt6.QtCore import QObject, QThread, pyqtSignal
+
+from image_organizer.catalog.catalog import Catalog
+from image_organizer.catalog.indexing import DEFAULT_INDEX_WORKERS, index_images
+
+
+class CatalogIndexer(QThread):
+    indexed = pyqtSignal(int)
+
+    def __init__(
+        self,
+        image_paths: list[Path],
+        catalog: Catalog,
+        workers: int = DEFAULT_INDEX_WORKERS,
+        parent: QObject | None = None
+    ) -> None:
+        super().__init__(parent)
+
+        self.image_paths = image_paths
+        self.catalog = catalog
+        self.workers = workers
+
+    def run(self) -> None:
+        progress = index_images(self.image_paths, self.catalog, self.workers)
+
+        try:
+            for done in progress:
+                self.indexed.emit(done)
+
+                if self.isInterruptionRequested():
+                    break
+        finally:
+            progress.close()
+
+    def stop(self) -> None:
+        self.requestInterruption()
+        self.wait()
@@ -0,0 +1,248 @@
+import glob
+import os
+from collections.abc import Iterable, Iterator, Sequence
+from concurrent.futures import Future, ThreadPoolExecutor
+from fnmatch import fnmatch
+from pathlib import Path
+from queue import SimpleQueue
+from typing import TYPE_CHECKING, NamedTuple
+
+from image_organizer.image_utils.find_images import is_supported
+
+if TYPE_CHECKING:
+    from image_organizer.catalog.catalog import Catalog
+
+# * Scanning is bound by file system latency rather than the CPU,
+# * especially on network shares
+DEFAULT_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+FileId = tuple[int, int]
+Patterns = Sequence[str]
+
+# * Found images, with their ids, and the subdirectories which still have to be scanned
+ScanResult = tuple[list[tuple[FileId, Path]], list[tuple[FileId, str]]]
+
+
+def matches_any(path: str, name: str, patterns: Patterns) -> bool:
+    for pattern in patterns:
+        # * Patterns with a separator are matched against the whole path,
+        # * others only against the name
+        target = path if os.sep in pattern else name
+        if fnmatch(target, pattern):
+            return True
+
+    return False
+
+
+def is_wanted(path: str, name: str, include: Patterns, exclude: Patterns) -> bool:
+    if matches_any(path, name, exclude):
+        return False
+
+    return len(include) == 0 or matches_any(path, name, include)
+
+
+def file_id(stat: os.stat_result) -> FileId:
+    return stat.st_dev, stat.st_ino
+
+
+# * Supported files and subdirectories of a directory by name,
+# * before any patterns are applied
+class Listing(NamedTuple):
+    files: list[tuple[FileId, str]]
+    subdirectories: list[tuple[FileId, str]]
+
+
+def list_directory(
+    directory: str,
+    device: int,
+    with_subdirectories: bool
+) -> Listing | None:
+    files: list[tuple[FileId, str]] = []
+    subdirectories: list[tuple[FileId, str]] = []
+
+    try:
+        with os.scandir(directory) as iterator:
+            entries = sorted(iterator, key=lambda entry: entry.name)
+    except OSError:
+        return None
+
+    for entry in entries:
+        try:
+            # * Checking the name first avoids most of the calls into the DirEntry
+            if not is_supported(entry.name) or not entry.is_file():
+                if with_subdirectories and entry.is_dir():
+                    subdirectories.append((file_id(entry.stat()), entry.name))
+
+                continue
+
+            # * The inode comes for free from the directory listing,
+            # * symlinks need a stat
+            if entry.is_symlink():
+                entry_id = file_id(entry.stat())
+            else:
+                entry_id = (device, entry.inode())
+        except OSError:
+            continue
+
+        files.append((entry_id, entry.name))
+
+    return Listing(files, subdirectories)
+
+
+def filter_listing(
+    directory: str,
+    listing: Listing,
+    recursive: bool,
+    include: Patterns,
+    exclude: Patterns
+) -> ScanResult:
+    images: list[tuple[FileId, Path]] = []
+    subdirectories: list[tuple[FileId, str]] = []
+
+    has_patterns = len(include) > 0 or len(exclude) > 0
+
+    for entry_id, name in listing.files:
+        path = os.path.join(directory, name)
+        if has_patterns and not is_wanted(path, name, include, exclude):
+            continue
+
+        images.append((entry_id, Path(path)))
+
+    if not recursive:
+        return images, subdirectories
+
+    for entry_id, name in listing.subdirectories:
+        path = os.path.join(directory, name)
+        if not matches_any(path, name, exclude):
+            subdirectories.append((entry_id, path))
+
+    return images, subdirectories
+
+
+# * With a catalog, directories which have not changed
+# * since they were last listed are not listed again.
+# * Adding, removing or renaming an entry
+# * changes the modification time of its directory.
+def scan_directory(
+    directory: str,
+    device: int,
+    recursive: bool,
+    include: Patterns,
+    exclude: Patterns,
+    catalog: 'Catalog | None' = None
+) -> ScanResult:
+    if catalog is None:
+        listing = list_directory(directory, device, recursive)
+        if listing is None:
+            return [], []
+
+        return filter_listing(directory, listing, recursive, include, exclude)
+
+    try:
+        mtime_ns = os.stat(directory).st_mtime_ns
+    except OSError:
+        return [], []
+
+    listing = catalog.listing(directory, mtime_ns)
+    if listing is None:
+        # * Subdirectories are always listed,
+        # * so the listing can be used for recursive scans later on
+        listing = list_directory(directory, device, True)
+        if listing is None:
+            return [], []
+
+        catalog.put_listing(directory, mtime_ns, listing)
+
+    return filter_listing(directory, listing, recursive, include, exclude)
+
+
+def expand_glob(pattern: str, include: Patterns, exclude: Patterns) -> ScanResult:
+    images: list[tuple[FileId, Path]] = []
+
+    for match in sorted(glob.iglob(pattern, recursive=True)):
+        path = Path(os.getcwd()) / match
+        if not is_supported(path.name):
+            continue
+
+        if not is_wanted(str(path), path.name, include, exclude):
+            continue
+
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+
+        if path.is_file():
+            images.append((file_id(stat), path))
+
+    return images, []
+
+
+def discover_images(
+    roots: Iterable[Path],
+    globs: Iterable[str] = (),
+    *,
+    recursive: bool = False,
+    include: Patterns = (),
+    exclude: Patterns = (),
+    workers: int = DEFAULT_WORKERS,
+    catalog: 'Catalog | None' = None
+) -> Iterator[Path]:
+    seen_files: set[FileId] = set()
+    seen_directories: set[FileId] = set()
+
+    with ThreadPoolExecutor(workers, thread_name_prefix='discovery') as executor:
+        pending: set[Future[ScanResult]] = set()
+        finished: SimpleQueue[Future[ScanResult]] = SimpleQueue()
+
+        def submit(future: Future[ScanResult]) -> None:
+            pending.add(future)
+            future.add_done_callback(finished.put)
+
+        def submit_directory(directory_id: FileId, directory: str) -> None:
+            if directory_id in seen_directories:
+                return
+
+            seen_directories.add(directory_id)
+            submit(
+                executor.submit(
+                    scan_directory,
+                    directory,
+                    directory_id[0],
+                    recursive,
+                    include,
+                    exclude,
+                    catalog
+                )
+            )
+
+        for root in roots:
+            try:
+                submit_directory(file_id(root.stat()), str(root))
+            except OSError:
+                continue
+
+        for pattern in globs:
+            submit(executor.submit(expand_glob, pattern, include, exclude))
+
+        try:
+            while len(pending) > 0:
+                future = finished.get()
+                pending.discard(future)
+
+                images, subdirectories = future.result()
+
+                for subdirectory_id, subdirectory in subdirectories:
+                    submit_directory(subdirectory_id, subdirectory)
+
+                for image_id, image_path in images:
+                    if image_id in seen_files:
+                        continue
+
+                    seen_files.add(image_id)
+                    yield image_path
+        finally:
+            # * The consumer might stop early,
+            # * there is no point in finishing the walk then
+            for future in pending:
+                future.cancel()
@@ -0,0 +1,253 @@
+import hashlib
+import mmap
+import os
+import shutil
+import struct
+import threading
+from pathlib import Path
+from typing import cast
+
+from PyQt6.QtGui import QImage
+
+from image_organizer.defaults import DEFAULT_DISK_CACHE_LIMIT
+from image_organizer.utils.app_dirs import app_cache_dir
+
+PREVIEWS_DIR_NAME = 'previews'
+
+# * After going over the limit, the oldest entries
+# * are removed until this share of it is left
+GC_TARGET_RATIO = 0.8
+PARTIAL_HASH_CHUNK = 64 * 1024
+
+# * magic, format version, width, height, bytes per line, QImage.Format
+HEADER = struct.Struct('<4sHIIII')
+MAGIC = b'IOPV'
+VERSION = 1
+
+# * Palette images are left out, their color table is not stored
+STORABLE_FORMATS = {
+    QImage.Format.Format_RGB32,
+    QImage.Format.Format_ARGB32_Premultiplied,
+    QImage.Format.Format_Grayscale8
+}
+
+
+def partial_hash(image_path: Path, st_size: int) -> bytes:
+    digest = hashlib.blake2b(digest_size=16)
+
+    with open(image_path, 'rb') as file:
+        digest.update(file.read(PARTIAL_HASH_CHUNK))
+
+        if st_size > PARTIAL_HASH_CHUNK * 2:
+            file.seek(-PARTIAL_HASH_CHUNK, os.SEEK_END)
+            digest.update(file.read(PARTIAL_HASH_CHUNK))
+
+    return digest.digest()
+
+
+class DiskCache:
+    def __init__(
+        self,
+        directory: Path | None = None,
+        limit_bytes: int = DEFAULT_DISK_CACHE_LIMIT,
+        use_partial_hash: bool = False
+    ) -> None:
+        self.directory = directory or app_cache_dir() / PREVIEWS_DIR_NAME
+        self.limit_bytes = limit_bytes
+        self.use_partial_hash = use_partial_hash
+
+        self._lock = threading.Lock()
+        self._size: int | None = None
+
+    def _key(
+        self,
+        image_path: Path,
+        max_dimensions: tuple[int, int],
+        variant: str
+    ) -> str | None:
+        try:
+            stat = image_path.stat()
+        except OSError:
+            return None
+
+        width, height = max_dimensions
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(
+            f'{image_path.resolve()}\0{stat.st_size}\0{stat.st_mtime_ns}\0'
+            f'{width}x{height}\0{variant}'.encode()
+        )
+
+        if self.use_partial_hash:
+            try:
+                digest.update(partial_hash(image_path, stat.st_size))
+            except OSError:
+                return None
+
+        return digest.hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.directory / key[:2] / key[2:]
+
+    def get(
+        self,
+        image_path: Path,
+        max_dimensions: tuple[int, int],
+        variant: str
+    ) -> QImage | None:
+        key = self._key(image_path, max_dimensions, variant)
+        if key is None:
+            return None
+
+        entry_path = self._entry_path(key)
+
+        try:
+            with open(entry_path, 'rb') as file, \
+                    mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                image = self._read_entry(mapped)
+
+            # * Marks the entry as recently used for the garbage collection
+            os.utime(entry_path)
+        except (OSError, ValueError):
+            return None
+
+        return image
+
+    def _read_entry(self, mapped: mmap.mmap) -> QImage | None:
+        if len(mapped) < HEADER.size:
+            return None
+
+        header = HEADER.unpack_from(mapped)
+        magic, version, width, height, bytes_per_line, qt_format = header
+        if magic != MAGIC or version != VERSION:
+            return None
+
+        if len(mapped) < HEADER.size + bytes_per_line * height:
+            return None
+
+        with memoryview(mapped)[HEADER.size:] as pixels:
+            # * QImage takes any buffer without copying it, its stubs only name bytes
+            data = cast(bytes, pixels)
+            view = QImage(data, width, height, bytes_per_line, QImage.Format(qt_format))
+
+            # * Detaches from the mapping before it gets closed
+            image = view.copy()
+            del view
+
+        return image
+
+    def put(
+        self,
+        image_path: Path,
+        max_dimensions: tuple[int, int],
+        variant: str,
+        image: QImage
+    ) -> None:
+        if image.format() not in STORABLE_FORMATS:
+            return
+
+        key = self._key(image_path, max_dimensions, variant)
+        if key is None:
+            return
+
+        entry_path = self._entry_path(key)
+        temporary_name = f'{entry_path.name}.{threading.get_ident()}.tmp'
+        temporary_path = entry_path.with_name(temporary_name)
+
+        header = HEADER.pack(
+            MAGIC,
+            VERSION,
+            image.width(),
+            image.height(),
+            image.bytesPerLine(),
+            image.format().value
+        )
+
+        # * Null images never get here, their format is not storable
+        pixels = image.constBits().asstring(image.sizeInBytes())
+
+        try:
+            entry_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(temporary_path, 'wb') as file:
+                file.write(header)
+                file.write(pixels)
+
+            os.replace(temporary_path, entry_path)
+        except OSError:
+            temporary_path.unlink(missing_ok=True)
+            return
+
+        self._account(HEADER.size + image.sizeInBytes())
+
+    def _account(self, added_bytes: int) -> None:
+        with self._lock:
+            if self._size is None:
+                self._size = self._scan_size()
+            else:
+                self._size += added_bytes
+
+            if self._size > self.limit_bytes:
+                self._collect_garbage()
+
+    def _entries(self) -> list[tuple[str, os.stat_result]]:
+        entries: list[tuple[str, os.stat_result]] = []
+        if not self.directory.is_dir():
+            return entries
+
+        with os.scandir(self.directory) as shards:
+            for shard in shards:
+                if not shard.is_dir():
+                    continue
+
+                with os.scandir(shard.path) as shard_entries:
+                    for entry in shard_entries:
+                        if entry.name.endswith('.tmp'):
+                            continue
+
+                        # * Entries can disappear while other
+                        # * threads are collecting garbage
+                        try:
+                            entries.append((entry.path, entry.stat()))
+                        except OSError:
+                            continue
+
+        return entries
+
+    def _scan_size(self) -> int:
+        return sum(stat.st_size for _, stat in self._entries())
+
+    def _collect_garbage(self) -> None:
+        entries = self._entries()
+        entries.sort(key=lambda item: item[1].st_mtime_ns)
+
+        size = sum(stat.st_size for _, stat in entries)
+        target_size = self.limit_bytes * GC_TARGET_RATIO
+
+        for entry_path, stat in entries:
+            if size <= target_size:
+                break
+
+            try:
+                os.unlink(entry_path)
+            except OSError:
+                continue
+
+            size -= stat.st_size
+
+        self._size = size
+
+    def collect_garbage(self) -> None:
+        with self._lock:
+            self._collect_garbage()
+
+    def clear(self) -> None:
+        with self._lock:
+            shutil.rmtree(self.directory, ignore_errors=True)
+            self._size = 0
+
+    @property
+    def size_bytes(self) -> int:
+        with self._lock:
+            if self._size is None:
+                self._size = self._scan_size()
+
+            return self._size
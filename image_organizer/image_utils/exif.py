@@ -0,0 +1,88 @@
+from datetime import datetime
+
+from PIL import ExifTags, Image
+
+# * EXIF orientations which swap width and height once applied
+TRANSPOSING_ORIENTATIONS = {5, 6, 7, 8}
+
+# * What has to be done to an image stored with an orientation to display it upright
+ORIENTATION_TRANSPOSES = {
+    2: Image.Transpose.FLIP_LEFT_RIGHT,
+    3: Image.Transpose.ROTATE_180,
+    4: Image.Transpose.FLIP_TOP_BOTTOM,
+    5: Image.Transpose.TRANSPOSE,
+    6: Image.Transpose.ROTATE_270,
+    7: Image.Transpose.TRANSVERSE,
+    8: Image.Transpose.ROTATE_90
+}
+
+# * Tags of IFD1 pointing to the embedded JPEG thumbnail,
+# * relative to the start of the TIFF header
+THUMBNAIL_OFFSET_TAG = 0x0201
+THUMBNAIL_LENGTH_TAG = 0x0202
+
+EXIF_HEADER = b'Exif\x00\x00'
+
+EXIF_DATE_FORMAT = '%Y:%m:%d %H:%M:%S'
+
+
+def get_orientation(image: Image.Image) -> int:
+    return image.getexif().get(ExifTags.Base.Orientation, 1)
+
+
+def apply_orientation(image: Image.Image, orientation: int) -> Image.Image:
+    transpose = ORIENTATION_TRANSPOSES.get(orientation)
+    if transpose is None:
+        return image
+
+    return image.transpose(transpose)
+
+
+# * The thumbnail cameras store next to the EXIF data,
+# * it is read without decoding the image itself
+def exif_thumbnail(image: Image.Image) -> bytes | None:
+    data = image.info.get('exif')
+    if not isinstance(data, bytes):
+        return None
+
+    thumbnail_ifd = image.getexif().get_ifd(ExifTags.IFD.IFD1)
+    offset = thumbnail_ifd.get(THUMBNAIL_OFFSET_TAG)
+    length = thumbnail_ifd.get(THUMBNAIL_LENGTH_TAG)
+    if not isinstance(offset, int) or not isinstance(length, int) or length == 0:
+        return None
+
+    start = len(EXIF_HEADER) + offset if data.startswith(EXIF_HEADER) else offset
+    thumbnail = data[start:start + length]
+
+    # * Some files have offsets pointing outside of the EXIF segment
+    if len(thumbnail) != length or not thumbnail.startswith(b'\xff\xd8'):
+        return None
+
+    return thumbnail
+
+
+def parse_exif_date(value: object) -> datetime | None:
+    if not isinstance(value, str):
+        return None
+
+    try:
+        return datetime.strptime(value.strip('\x00 '), EXIF_DATE_FORMAT)
+    except ValueError:
+        return None
+
+
+# * The time the photo was taken, falling back to
+# * when the file was last changed by the camera
+def get_date_taken(exif: Image.Exif) -> datetime | None:
+    exif_ifd = exif.get_ifd(ExifTags.IFD.Exif)
+
+    for value in (
+        exif_ifd.get(ExifTags.Base.DateTimeOriginal),
+        exif_ifd.get(ExifTags.Base.DateTimeDigitized),
+        exif.get(ExifTags.Base.DateTime)
+    ):
+        date = parse_exif_date(value)
+        if date is not None:
+            return date
+
+    return None
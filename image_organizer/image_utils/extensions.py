@@ -0,0 +1,55 @@
+import json
+import os
+from pathlib import Path
+
+import PIL
+
+from image_organizer.image_utils.raw_previews import RAW_EXTENSIONS
+from image_organizer.utils.app_dirs import app_cache_dir
+
+EXTENSIONS_CACHE_NAME = 'extensions.json'
+
+
+# * Imports every single plugin PIL has, which is what the cache is there to avoid.
+# * RAW files are opened through their embedded previews, which PIL knows nothing about.
+def registered_extensions() -> set[str]:
+    from PIL import Image
+
+    extensions = Image.registered_extensions()
+    registered = {
+        extension.lower()
+        for extension, image_format in extensions.items()
+        if image_format in Image.OPEN
+    }
+
+    return registered | RAW_EXTENSIONS
+
+
+# * Which plugins there are depends on the version of PIL and on how it was built
+def _cache_key() -> str:
+    return f'{PIL.__version__} {PIL.__file__} {" ".join(sorted(RAW_EXTENSIONS))}'
+
+
+def load_supported_extensions(cache_path: Path | None = None) -> set[str]:
+    cache_path = cache_path or app_cache_dir() / EXTENSIONS_CACHE_NAME
+
+    try:
+        cached = json.loads(cache_path.read_text())
+        if cached['key'] == _cache_key():
+            return set(cached['extensions'])
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+
+    extensions = registered_extensions()
+
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+
+        partial_path = cache_path.with_name(f'{cache_path.name}.{os.getpid()}.partial')
+        cache = {'key': _cache_key(), 'extensions': sorted(extensions)}
+        partial_path.write_text(json.dumps(cache))
+        partial_path.replace(cache_path)
+    except OSError:
+        pass
+
+    return extensions
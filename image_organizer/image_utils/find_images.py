@@ -1,23 +1,32 @@
 import os
+from collections.abc import Iterator
 from pathlib import Path
 
-from PIL import Image
+from image_organizer.image_utils.extensions import load_supported_extensions
 
-exts = Image.registered_extensions()
-supported_extensions = {ex for ex, f in exts.items() if f in Image.OPEN}
+# * Cached on disk, so PIL only loads the plugins
+# * of the images which are actually opened
+supported_extensions = load_supported_extensions()
 
 
-def find_images(folder_path_or_glob: Path | str) -> list[Path]:
+# * Called for every directory entry while scanning, so it avoids os.path.splitext
+def is_supported(file_name: str) -> bool:
+    return file_name[file_name.rfind('.'):].lower() in supported_extensions
+
+
+def iter_images(folder_path_or_glob: Path | str) -> Iterator[Path]:
     if isinstance(folder_path_or_glob, Path):
-        files = folder_path_or_glob.iterdir()
-    else:
-        files = Path(os.getcwd()).glob(folder_path_or_glob)
+        with os.scandir(folder_path_or_glob) as entries:
+            for entry in entries:
+                if is_supported(entry.name) and entry.is_file():
+                    yield Path(entry.path)
 
-    result: list[Path] = []
-    for item in files:
-        if item.suffix not in supported_extensions:
-            continue
+        return
 
-        result.append(item)
+    for item in Path(os.getcwd()).glob(folder_path_or_glob):
+        if is_supported(item.name):
+            yield item
 
-    return result
+
+def find_images(folder_path_or_glob: Path | str) -> list[Path]:
+    return list(iter_images(folder_path_or_glob))
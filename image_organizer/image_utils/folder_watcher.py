@@ -0,0 +1,398 @@
+import os
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, NamedTuple
+
+from PyQt6.QtCore import QFileSystemWatcher, QObject, QTimer, pyqtSignal
+
+from image_organizer.image_utils.discovery import (
+    FileId,
+    Patterns,
+    file_id,
+    filter_listing,
+    list_directory,
+    scan_directory,
+)
+
+if TYPE_CHECKING:
+    from image_organizer.catalog.catalog import Catalog
+
+# * Copying a batch of files changes the directory many times a second,
+# * they are handled together
+DEBOUNCE_MS = 250
+
+# * Changes are never held back for longer than this,
+# * even when the directory keeps changing
+MAX_DELAY_MS = 2000
+
+# * New files are only added once their size and modification time stop changing,
+# * so images which are still being copied are not decoded half way
+SETTLE_MS = 1000
+
+
+class FolderChanges(NamedTuple):
+    created: list[Path]
+    deleted: list[Path]
+    renamed: list[tuple[Path, Path]]
+
+    # * Replaced by another file under the same name
+    modified: list[Path]
+
+    def __bool__(self) -> bool:
+        return any(len(changes) > 0 for changes in self)
+
+
+# * Watched directories to add and to drop, along with the changes themselves
+class Update(NamedTuple):
+    changes: FolderChanges
+    added_directories: list[str]
+    removed_directories: list[str]
+    has_unsettled: bool
+
+
+class DirectoryState(NamedTuple):
+    images: dict[Path, FileId]
+    subdirectories: dict[str, FileId]
+
+
+# * What the watched directories held when they were last listed.
+# * Only ever used from a single thread.
+class FolderState:
+    def __init__(
+        self,
+        recursive: bool,
+        include: Patterns,
+        exclude: Patterns,
+        catalog: 'Catalog | None' = None
+    ) -> None:
+        self.recursive = recursive
+        self.include = include
+        self.exclude = exclude
+        self.catalog = catalog
+
+        self._directories: dict[str, DirectoryState] = {}
+        self._directory_ids: dict[str, FileId] = {}
+
+        # * New files which are still being written to,
+        # * with the size and the modification time they had
+        self._unsettled: dict[Path, tuple[int, int]] = {}
+
+    def _add_subtree(
+        self,
+        root: str,
+        root_id: FileId,
+        images: dict[FileId, Path]
+    ) -> list[str]:
+        added: list[str] = []
+        queue = [(root_id, root)]
+        known_ids = set(self._directory_ids.values())
+
+        while len(queue) > 0:
+            directory_id, directory = queue.pop(0)
+            if directory_id in known_ids:
+                continue
+
+            known_ids.add(directory_id)
+
+            found, subdirectories = scan_directory(
+                directory,
+                directory_id[0],
+                self.recursive,
+                self.include,
+                self.exclude,
+                self.catalog
+            )
+
+            self._directories[directory] = DirectoryState(
+                {image_path: image_id for image_id, image_path in found},
+                {path: subdirectory_id for subdirectory_id, path in subdirectories}
+            )
+            self._directory_ids[directory] = directory_id
+            added.append(directory)
+
+            images.update(found)
+            queue.extend(subdirectories)
+
+        return added
+
+    def _forget_subtree(self, directory: str, images: dict[FileId, Path]) -> list[str]:
+        state = self._directories.pop(directory, None)
+        self._directory_ids.pop(directory, None)
+        if state is None:
+            return []
+
+        removed = [directory]
+        images.update(
+            (image_id, image_path) for image_path, image_id in state.images.items()
+        )
+
+        for subdirectory in state.subdirectories:
+            removed.extend(self._forget_subtree(subdirectory, images))
+
+        return removed
+
+    # * The directory is listed again, bypassing the listing the catalog has for it,
+    # * as the modification time does not always change more than once in its resolution
+    def _list(
+        self,
+        directory: str
+    ) -> tuple[dict[Path, FileId], dict[str, FileId]] | None:
+        try:
+            stat = os.stat(directory)
+        except OSError:
+            return None
+
+        with_subdirectories = self.recursive or self.catalog is not None
+        listing = list_directory(directory, stat.st_dev, with_subdirectories)
+        if listing is None:
+            return None
+
+        if self.catalog is not None:
+            self.catalog.put_listing(directory, stat.st_mtime_ns, listing)
+
+        images, subdirectories = filter_listing(
+            directory,
+            listing,
+            self.recursive,
+            self.include,
+            self.exclude
+        )
+        return (
+            {image_path: image_id for image_id, image_path in images},
+            {path: subdirectory_id for subdirectory_id, path in subdirectories}
+        )
+
+    # * Images the gallery has, which are not there anymore,
+    # * and the ones it does not have yet
+    def seed(self, roots: list[Path], known: set[Path]) -> Update:
+        images: dict[FileId, Path] = {}
+        directories: list[str] = []
+
+        for root in roots:
+            try:
+                root_id = file_id(root.stat())
+                directories.extend(self._add_subtree(str(root), root_id, images))
+            except OSError:
+                continue
+
+        found = set(images.values())
+        deleted = [
+            image_path for image_path in known
+            if str(image_path.parent) in self._directories and image_path not in found
+        ]
+
+        created = self._settle([
+            image_path for image_path in images.values() if image_path not in known
+        ])
+
+        return Update(
+            FolderChanges(created, deleted, [], []),
+            directories,
+            [],
+            len(self._unsettled) > 0
+        )
+
+    def _settle(self, new_paths: list[Path]) -> list[Path]:
+        settled: list[Path] = []
+        now_ns = time.time_ns()
+
+        for image_path in [*self._unsettled, *new_paths]:
+            try:
+                stat = image_path.stat()
+            except OSError:
+                self._unsettled.pop(image_path, None)
+                continue
+
+            key = (stat.st_size, stat.st_mtime_ns)
+            previous = self._unsettled.pop(image_path, None)
+
+            # * Files which have not been written to for a while are done,
+            # * like the ones moved in from elsewhere
+            if key == previous or now_ns - stat.st_mtime_ns >= SETTLE_MS * 1_000_000:
+                settled.append(image_path)
+            else:
+                self._unsettled[image_path] = key
+
+        return settled
+
+    def update(self, directories: set[str]) -> Update:
+        removed: dict[FileId, Path] = {}
+        added: dict[FileId, Path] = {}
+        modified: list[Path] = []
+        added_directories: list[str] = []
+        removed_directories: list[str] = []
+
+        # * Directories are only added once all of the removed ones are forgotten,
+        # * so a directory moved from one place to another is not mistaken for a loop
+        new_subdirectories: list[tuple[str, FileId]] = []
+
+        for directory in sorted(directories):
+            # * Gone along with a parent directory which has been handled already
+            old = self._directories.get(directory)
+            if old is None:
+                continue
+
+            listed = self._list(directory)
+            if listed is None:
+                removed_directories.extend(self._forget_subtree(directory, removed))
+                continue
+
+            images, subdirectories = listed
+
+            for image_path, image_id in old.images.items():
+                new_id = images.get(image_path)
+                if new_id is None:
+                    removed[image_id] = image_path
+                elif new_id != image_id:
+                    modified.append(image_path)
+
+            added.update(
+                (image_id, image_path)
+                for image_path, image_id in images.items()
+                if image_path not in old.images
+            )
+
+            for subdirectory in old.subdirectories.keys() - subdirectories.keys():
+                removed_directories.extend(self._forget_subtree(subdirectory, removed))
+
+            self._directories[directory] = DirectoryState(images, subdirectories)
+            new_subdirectories.extend(
+                (subdirectory, subdirectory_id)
+                for subdirectory, subdirectory_id in subdirectories.items()
+                if subdirectory not in old.subdirectories
+            )
+
+        for subdirectory, subdirectory_id in new_subdirectories:
+            added_directories.extend(
+                self._add_subtree(subdirectory, subdirectory_id, added)
+            )
+
+        # * A file which is gone from one place
+        # * and has turned up in another was moved or renamed
+        renamed: list[tuple[Path, Path]] = []
+        new_paths: list[Path] = []
+
+        for image_id, image_path in added.items():
+            old_path = removed.pop(image_id, None)
+            if old_path is None:
+                new_paths.append(image_path)
+            elif self._unsettled.pop(old_path, None) is not None:
+                # * Renamed before it was ever added
+                new_paths.append(image_path)
+            else:
+                renamed.append((old_path, image_path))
+
+        # * Files which were gone before they were ever added are forgotten quietly
+        deleted: list[Path] = []
+        for image_path in removed.values():
+            if self._unsettled.pop(image_path, None) is None:
+                deleted.append(image_path)
+
+        created = self._settle(new_paths)
+
+        return Update(
+            FolderChanges(created, deleted, renamed, modified),
+            added_directories,
+            removed_directories,
+            len(self._unsettled) > 0
+        )
+
+
+# * Merges what happens in the source directories into the gallery
+# * without scanning them again.
+# * Only the directories which have changed are listed, off the GUI thread.
+class FolderWatcher(QObject):
+    changed = pyqtSignal(object)
+    _updated = pyqtSignal(object)
+
+    def __init__(
+        self,
+        roots: list[Path],
+        recursive: bool = False,
+        include: Patterns = (),
+        exclude: Patterns = (),
+        catalog: 'Catalog | None' = None,
+        parent: QObject | None = None
+    ) -> None:
+        super().__init__(parent)
+
+        self.roots = roots
+
+        self._state = FolderState(recursive, include, exclude, catalog)
+        self._executor = ThreadPoolExecutor(1, thread_name_prefix='folder-watcher')
+
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.directoryChanged.connect(self._directory_changed_handler)
+
+        self._dirty: set[str] = set()
+        self._first_change: float | None = None
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._update)
+
+        # * Emitted from the worker, delivered on the GUI thread
+        self._updated.connect(self._updated_handler)
+
+    # * Watching starts with the images of the gallery,
+    # * whatever has changed since they were found is reported right away
+    def start(self, known: set[Path]) -> None:
+        self._submit(self._state.seed, self.roots, known)
+
+    def stop(self) -> None:
+        self._timer.stop()
+        self._executor.shutdown(cancel_futures=True)
+
+        directories = self._watcher.directories()
+        if len(directories) > 0:
+            self._watcher.removePaths(directories)
+
+    def _run(self, function: Callable[..., Update], *args: object) -> None:
+        self._updated.emit(function(*args))
+
+    def _submit(self, function: Callable[..., Update], *args: object) -> None:
+        try:
+            self._executor.submit(self._run, function, *args)
+        except RuntimeError:
+            # * Stopped already
+            return
+
+    def _directory_changed_handler(self, directory: str) -> None:
+        now = time.monotonic()
+        if self._first_change is None:
+            self._first_change = now
+
+        self._dirty.add(directory)
+
+        remaining_ms = MAX_DELAY_MS - (now - self._first_change) * 1000
+        self._timer.start(int(max(0, min(DEBOUNCE_MS, remaining_ms))))
+
+    def _update(self) -> None:
+        dirty = self._dirty
+        self._dirty = set()
+        self._first_change = None
+
+        self._submit(self._state.update, dirty)
+
+    def _updated_handler(self, update: Update) -> None:
+        if len(update.added_directories) > 0:
+            self._watcher.addPaths(update.added_directories)
+
+        watched = set(self._watcher.directories())
+        removed = [
+            directory
+            for directory in update.removed_directories
+            if directory in watched
+        ]
+        if len(removed) > 0:
+            self._watcher.removePaths(removed)
+
+        # * Files which are still being written to are looked at again,
+        # * even if nothing else changes
+        if update.has_unsettled and not self._timer.isActive():
+            self._timer.start(SETTLE_MS)
+
+        if update.changes:
+            self.changed.emit(update.changes)
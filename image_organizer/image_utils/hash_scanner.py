@@ -0,0 +1,91 @@
+import multiprocessing
+import time
+from pathlib import Path
+
+from PyQt6.QtCore import QObject, QThread, pyqtSignal
+
+from image_organizer.catalog.catalog import Catalog
+from image_organizer.duplicates.hash_store import HashedImage, HashStore
+from image_organizer.duplicates.hashing import DEFAULT_PROCESSES, compute_hashes
+
+MAX_BATCH_INTERVAL_S = 0.5
+
+# * Hashing runs next to decoding the images being looked at,
+# * so it only gets half of the cores
+DEFAULT_HASH_PROCESSES = max(1, DEFAULT_PROCESSES // 2)
+
+
+class HashScanner(QThread):
+    hashed = pyqtSignal(list)
+
+    def __init__(
+        self,
+        image_paths: list[Path],
+        store: HashStore | None = None,
+        processes: int = DEFAULT_HASH_PROCESSES,
+        catalog: Catalog | None = None,
+        parent: QObject | None = None
+    ) -> None:
+        super().__init__(parent)
+
+        self.image_paths = image_paths
+        self.store = store
+        self.processes = processes
+        self.catalog = catalog
+
+    def _emit(self, batch: list[HashedImage]) -> None:
+        if self.catalog is not None:
+            self.catalog.put_hashes(batch)
+
+        self.hashed.emit(batch)
+
+    def run(self) -> None:
+        batch: list[HashedImage] = []
+        last_emit = time.monotonic()
+
+        # * Hashes the catalog already has are sent right away,
+        # * without looking at the files at all
+        image_paths = self.image_paths
+        if self.catalog is not None:
+            known = self.catalog.hashes(image_paths)
+            if len(known) > 0:
+                self.hashed.emit(known)
+
+            known_paths = {image_path for image_path, _ in known}
+            image_paths = [
+                image_path
+                for image_path in image_paths
+                if image_path not in known_paths
+            ]
+
+        # * Forking a process which runs Qt threads is not safe,
+        # * the workers are started from a clean one
+        hashed_images = compute_hashes(
+            image_paths,
+            self.store,
+            self.processes,
+            mp_context=multiprocessing.get_context('forkserver')
+        )
+
+        try:
+            for hashed_image in hashed_images:
+                if self.isInterruptionRequested():
+                    break
+
+                batch.append(hashed_image)
+
+                now = time.monotonic()
+                if now - last_emit >= MAX_BATCH_INTERVAL_S:
+                    self._emit(batch)
+
+                    batch = []
+                    last_emit = now
+        finally:
+            hashed_images.close()
+
+        if len(batch) > 0:
+            self._emit(batch)
+
+    def stop(self) -> None:
+        self.requestInterruption()
+        self.wait()
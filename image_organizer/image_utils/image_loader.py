@@ -0,0 +1,216 @@
+from collections.abc import Callable
+from pathlib import Path
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+from PyQt6.QtGui import QImage
+
+from image_organizer.image_utils.disk_cache import DiskCache
+from image_organizer.image_utils.load_and_resize import (
+    DEFAULT_QUALITY,
+    Dimentions,
+    Quality,
+    load_image,
+)
+
+CURRENT_IMAGE_PRIORITY = 1000
+
+LoadFunction = Callable[[Path, Dimentions, Quality, DiskCache | None], QImage | None]
+
+# * The same image can be pending at several sizes,
+# * while the size to decode to is changing
+PendingKey = tuple[Path, Dimentions]
+
+
+class LoadSignals(QObject):
+    loaded = pyqtSignal(Path, QImage, object)
+    failed = pyqtSignal(Path, object)
+    cancelled = pyqtSignal(Path, object)
+
+
+class GenerationCounter:
+    def __init__(self) -> None:
+        self.value = 0
+
+    def advance(self) -> int:
+        self.value += 1
+        return self.value
+
+    def is_stale(self, generation: int) -> bool:
+        return generation < self.value
+
+
+class LoadTask(QRunnable):
+    def __init__(
+        self,
+        image_path: Path,
+        max_dimensions: Dimentions,
+        quality: Quality,
+        disk_cache: DiskCache | None,
+        signals: LoadSignals,
+        generations: GenerationCounter,
+        load_function: LoadFunction = load_image
+    ) -> None:
+        super().__init__()
+
+        # * Tasks are owned by the loader, so they
+        # * can be safely taken back from the queue
+        self.setAutoDelete(False)
+
+        self.image_path = image_path
+        self.max_dimensions = max_dimensions
+        self.quality: Quality = quality
+        self.disk_cache = disk_cache
+        self.signals = signals
+        self.generations = generations
+        self.generation = generations.value
+        self.load_function = load_function
+
+    def run(self) -> None:
+        # * The user has moved past this image while the task was waiting in the queue
+        if self.generations.is_stale(self.generation):
+            self.signals.cancelled.emit(self.image_path, self.max_dimensions)
+            return
+
+        try:
+            image = self.load_function(
+                self.image_path,
+                self.max_dimensions,
+                self.quality,
+                self.disk_cache
+            )
+        except Exception:
+            # * Corrupt and oversized images raise all sorts of errors from PIL,
+            # * an exception escaping a runnable takes the whole process down with it
+            image = None
+
+        if image is None:
+            self.signals.failed.emit(self.image_path, self.max_dimensions)
+            return
+
+        self.signals.loaded.emit(self.image_path, image, self.max_dimensions)
+
+
+class ImageLoader(QObject):
+    # * Along with the size the image was decoded to fit into
+    loaded = pyqtSignal(Path, QImage, object)
+    failed = pyqtSignal(Path)
+
+    def __init__(
+        self,
+        max_dimensions: Dimentions,
+        quality: Quality = DEFAULT_QUALITY,
+        disk_cache: DiskCache | None = None,
+        max_threads: int | None = None,
+        load_function: LoadFunction = load_image,
+        parent: QObject | None = None
+    ) -> None:
+        super().__init__(parent)
+
+        self.max_dimensions = max_dimensions
+        self.quality: Quality = quality
+        self.disk_cache = disk_cache
+        self.load_function = load_function
+
+        self._pool = QThreadPool(self)
+        if max_threads is not None:
+            self._pool.setMaxThreadCount(max_threads)
+
+        self._pending: dict[PendingKey, tuple[LoadTask, int]] = {}
+        self._generations = GenerationCounter()
+
+        self._signals = LoadSignals(self)
+        self._signals.loaded.connect(self._loaded_handler)
+        self._signals.failed.connect(self._failed_handler)
+        self._signals.cancelled.connect(self._cancelled_handler)
+
+    @property
+    def generation(self) -> int:
+        return self._generations.value
+
+    def advance_generation(self) -> int:
+        return self._generations.advance()
+
+    def is_pending(self, image_path: Path) -> bool:
+        return (image_path, self.max_dimensions) in self._pending
+
+    # * Tasks which are already queued keep their size,
+    # * they are dropped as stale unless requested again
+    def set_max_dimensions(self, max_dimensions: Dimentions) -> None:
+        if max_dimensions == self.max_dimensions:
+            return
+
+        self.max_dimensions = max_dimensions
+        self.advance_generation()
+        self.cancel_stale()
+
+    def request(self, image_path: Path, priority: int = 0) -> bool:
+        key = (image_path, self.max_dimensions)
+        pending = self._pending.get(key)
+        if pending is not None:
+            task, old_priority = pending
+            task.generation = self.generation
+
+            if priority <= old_priority or not self._pool.tryTake(task):
+                return False
+        else:
+            task = LoadTask(
+                image_path,
+                self.max_dimensions,
+                self.quality,
+                self.disk_cache,
+                self._signals,
+                self._generations,
+                self.load_function
+            )
+
+        self._pending[key] = (task, priority)
+        self._pool.start(task, priority)
+
+        return True
+
+    def cancel_stale(self) -> int:
+        cancelled = 0
+        for key, (task, _) in list(self._pending.items()):
+            if not self._generations.is_stale(task.generation):
+                continue
+
+            # * Tasks which are already running will
+            # * drop themselves or finish into the cache
+            if self._pool.tryTake(task):
+                del self._pending[key]
+                cancelled += 1
+
+        return cancelled
+
+    def wait_for_done(self, timeout_ms: int = -1) -> bool:
+        return self._pool.waitForDone(timeout_ms)
+
+    def _loaded_handler(
+        self,
+        image_path: Path,
+        image: QImage,
+        max_dimensions: Dimentions
+    ) -> None:
+        self._pending.pop((image_path, max_dimensions), None)
+        self.loaded.emit(image_path, image, max_dimensions)
+
+    def _failed_handler(self, image_path: Path, max_dimensions: Dimentions) -> None:
+        self._pending.pop((image_path, max_dimensions), None)
+
+        # * Only failures at the current size matter,
+        # * the image would be requested again otherwise
+        if max_dimensions == self.max_dimensions:
+            self.failed.emit(image_path)
+
+    def _cancelled_handler(self, image_path: Path, max_dimensions: Dimentions) -> None:
+        key = (image_path, max_dimensions)
+        pending = self._pending.pop(key, None)
+        if pending is None:
+            return
+
+        # * The image was requested again after the
+        # * task had already decided to drop itself
+        task, priority = pending
+        if not self._generations.is_stale(task.generation):
+            self._pending[key] = pending
+            self._pool.start(task, priority)
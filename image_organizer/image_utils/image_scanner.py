@@ -0,0 +1,75 @@
+import time
+from pathlib import Path
+
+from PyQt6.QtCore import QObject, QThread, pyqtSignal
+
+from image_organizer.catalog.catalog import Catalog
+from image_organizer.image_utils.discovery import Patterns, discover_images
+
+MAX_BATCH_SIZE = 512
+MAX_BATCH_INTERVAL_S = 0.1
+
+
+class ImageScanner(QThread):
+    found = pyqtSignal(list)
+    scanned = pyqtSignal(int)
+
+    def __init__(
+        self,
+        roots: list[Path],
+        globs: list[str],
+        recursive: bool = False,
+        include: Patterns = (),
+        exclude: Patterns = (),
+        catalog: Catalog | None = None,
+        parent: QObject | None = None
+    ) -> None:
+        super().__init__(parent)
+
+        self.roots = roots
+        self.globs = globs
+        self.recursive = recursive
+        self.include = include
+        self.exclude = exclude
+        self.catalog = catalog
+
+    def run(self) -> None:
+        batch: list[Path] = []
+        total = 0
+        last_emit = time.monotonic()
+
+        images = discover_images(
+            self.roots,
+            self.globs,
+            recursive=self.recursive,
+            include=self.include,
+            exclude=self.exclude,
+            catalog=self.catalog
+        )
+
+        for image_path in images:
+            if self.isInterruptionRequested():
+                break
+
+            batch.append(image_path)
+
+            # * The very first image is sent on its own,
+            # * so it can be displayed right away
+            now = time.monotonic()
+            is_due = now - last_emit >= MAX_BATCH_INTERVAL_S
+            if total == 0 or len(batch) >= MAX_BATCH_SIZE or is_due:
+                total += len(batch)
+                self.found.emit(batch)
+
+                batch = []
+                last_emit = now
+
+        if len(batch) > 0:
+            total += len(batch)
+            self.found.emit(batch)
+
+        self.scanned.emit(total)
+
+    def stop(self) -> None:
+        self.requestInterruption()
+        self.wait()
@@ -1,45 +1,336 @@
+from collections.abc import Callable
 from pathlib import Path
 
 from PIL import Image, ImageOps
 from PyQt6.QtGui import QImage, QPixmap
 
+from image_organizer.defaults import DEFAULT_QUALITY, Quality
+from image_organizer.image_utils.disk_cache import DiskCache
+from image_organizer.image_utils.exif import TRANSPOSING_ORIENTATIONS, get_orientation
+from image_organizer.image_utils.open_image import open_image
+from image_organizer.instrumentation.stage_timings import timings
+
 Dimentions = tuple[int, int]
 
+# * Decode sizes are rounded up to steps of this many pixels,
+# * so resizing the window a little keeps using the images which
+# * are already cached instead of decoding all of them again
+SIZE_BUCKET_STEP = 256
+
+RESAMPLING_FILTERS: dict[Quality, Image.Resampling] = {
+    'fast': Image.Resampling.BILINEAR,
+    'balanced': Image.Resampling.LANCZOS,
+    'best': Image.Resampling.LANCZOS
+}
+
+# * How much bigger than the target the image is allowed to be decoded with draft()
+# * and reduced with reduce() before the actual resampling. None disables both.
+REDUCING_GAPS: dict[Quality, float | None] = {
+    'fast': 2.0,
+    'balanced': 3.0,
+    'best': None
+}
+
+# * PIL modes which can be handed to QImage as they are,
+# * with the amount of bytes per pixel
+QIMAGE_FORMATS: dict[str, tuple[QImage.Format, int]] = {
+    'RGB': (QImage.Format.Format_RGB888, 3),
+    'RGBA': (QImage.Format.Format_RGBA8888, 4),
+    'RGBX': (QImage.Format.Format_RGBX8888, 4),
+    'L': (QImage.Format.Format_Grayscale8, 1)
+}
+
+# * Modes without alpha which PIL converts straight to RGB or grayscale,
+# * going through RGBA would add an alpha channel,
+# * which the pixmap then has to be premultiplied and blended with
+RGB_CONVERTIBLE_MODES = ('CMYK', 'YCbCr')
+
+# * Unpacking bits is faster in PIL than Qt's conversion from Format_Mono is
+GRAYSCALE_CONVERTIBLE_MODES = ('1',)
+
+HIGH_BIT_DEPTH_MODES = ('I;16', 'I;16B', 'I;16L', 'I;16N', 'I', 'F')
+
+# * Modes PIL can resize but not reduce(),
+# * which resize() would otherwise call with a reducing gap
+UNREDUCIBLE_MODES = ('I;16', 'I;16B', 'I;16L', 'I;16N')
+
+# * Modes whose values PIL's filters read in the wrong byte order,
+# * they are resized as 32 bit I instead
+BYTE_SWAPPED_MODES = ('I;16B',)
+
+OPAQUE_BLACK = 0xff000000
+
+# * Kept at a byte per pixel, they are only copied to detach them from PIL's buffer
+COMPACT_FORMATS = (QImage.Format.Format_Grayscale8, QImage.Format.Format_Indexed8)
+
+# * Uncompressed formats whose pixels can be sampled straight from a memory mapping
+MAPPABLE_EXTENSIONS = ('.tif', '.tiff', '.bmp', '.dib', '.ppm', '.pgm', '.pnm')
+
+# * Smaller files are read as a whole faster than
+# * numpy is imported and the mapping is set up
+MAPPED_DECODE_MIN_BYTES = 64 * 1024 ** 2
+
+QImageConverter = Callable[[Image.Image], QImage]
+
+
+# * PIL does not store the frame in a single contiguous block, so this is the one copy
+# * needed. The returned QImage only references data, which lives as long as the Python
+# * object does, any Qt side copies of it have to go through to_pixmap_format first
+def _direct_qimage(image: Image.Image) -> QImage:
+    qt_format, bytes_per_pixel = QIMAGE_FORMATS[image.mode]
+    width, height = image.size
+
+    with timings.measure('tobytes'):
+        data = image.tobytes() # pyright: ignore[reportUnknownMemberType]
+
+    return QImage(data, width, height, width * bytes_per_pixel, qt_format)
+
+
+def _palette_colors(image: Image.Image) -> list[int]:
+    palette = image.getpalette('RGBA') or []
+    colors = [
+        (palette[i + 3] << 24)
+        | (palette[i] << 16)
+        | (palette[i + 1] << 8)
+        | palette[i + 2]
+        for i in range(0, len(palette), 4)
+    ]
+    colors.extend([OPAQUE_BLACK] * (256 - len(colors)))
+
+    # * Palettes without alpha store their transparent colors separately
+    transparency = image.info.get('transparency')
+    if isinstance(transparency, int) and transparency < len(colors):
+        colors[transparency] &= 0x00ffffff
+    elif isinstance(transparency, bytes):
+        for i, alpha in enumerate(transparency[:len(colors)]):
+            colors[i] = (alpha << 24) | (colors[i] & 0x00ffffff)
+
+    return colors
+
+
+# * A byte per pixel,
+# * the colors are only looked up while converting to the pixmap format
+def _palette_qimage(image: Image.Image) -> QImage:
+    width, height = image.size
+
+    with timings.measure('convert'):
+        colors = _palette_colors(image)
+
+    with timings.measure('tobytes'):
+        data = image.tobytes() # pyright: ignore[reportUnknownMemberType]
+
+    qimage = QImage(data, width, height, width, QImage.Format.Format_Indexed8)
+    qimage.setColorTable(colors) # pyright: ignore[reportUnknownMemberType]
+
+    return qimage
+
+
+def _high_bit_depth_qimage(image: Image.Image) -> QImage:
+    # * Pulls in numpy, which is only needed once such an image is actually loaded
+    from image_organizer.image_utils.tone_mapping import grayscale_bytes
+
+    width, height = image.size
+
+    with timings.measure('convert'):
+        data = grayscale_bytes(image)
+
+    return QImage(data, width, height, width, QImage.Format.Format_Grayscale8)
+
+
+def _grayscale_qimage(image: Image.Image) -> QImage:
+    with timings.measure('convert'):
+        image = image.convert('L')
+
+    return _direct_qimage(image)
+
+
+def _rgb_qimage(image: Image.Image) -> QImage:
+    with timings.measure('convert'):
+        image = image.convert('RGB')
+
+    return _direct_qimage(image)
+
+
+# * The slow path for everything else, like LA, PA and premultiplied modes
+def _rgba_qimage(image: Image.Image) -> QImage:
+    with timings.measure('convert'):
+        image = image.convert('RGBA')
+
+    return _direct_qimage(image)
 
-def pil2pixmap(image: Image.Image):
-    if image.mode == "RGB":
-        r, g, b = image.split()
-        image = Image.merge("RGB", (b, g, r))
-    elif  image.mode == "RGBA":
-        r, g, b, a = image.split()
-        image = Image.merge("RGBA", (b, g, r, a))
-    elif image.mode == "L":
-        image = image.convert("RGBA")
 
-    image = ImageOps.exif_transpose(image)
+MODE_CONVERTERS: dict[str, QImageConverter] = {
+    **{mode: _direct_qimage for mode in QIMAGE_FORMATS},
+    **{mode: _rgb_qimage for mode in RGB_CONVERTIBLE_MODES},
+    **{mode: _grayscale_qimage for mode in GRAYSCALE_CONVERTIBLE_MODES},
+    **{mode: _high_bit_depth_qimage for mode in HIGH_BIT_DEPTH_MODES},
+    'P': _palette_qimage
+}
 
-    im2 = image.convert("RGBA")
 
-    # * Ignoring, as the stubs for Pillow do not specify a type
-    data = im2.tobytes("raw", "RGBA") # pyright: ignore[reportUnknownMemberType]
-    qim = QImage(data, image.size[0], image.size[1], QImage.Format.Format_ARGB32)
-    pixmap = QPixmap.fromImage(qim)
+def pil2qimage(image: Image.Image) -> QImage:
+    orientation = get_orientation(image)
+    if orientation != 1:
+        with timings.measure('exif_transpose'):
+            image = ImageOps.exif_transpose(image)
 
-    return pixmap
+    return MODE_CONVERTERS.get(image.mode, _rgba_qimage)(image)
 
 
-def load_and_resize(image_path: Path, max_dimensions: Dimentions) -> QPixmap | None:
+# * Converts into the format QPixmap uses internally,
+# * so QPixmap.fromImage does not have to convert on the GUI thread.
+# * The result owns its memory and can be passed between threads.
+def to_pixmap_format(image: QImage) -> QImage:
+    if image.format() in COMPACT_FORMATS:
+        with timings.measure('to_pixmap_format'):
+            return image.copy()
+
+    target_format = QImage.Format.Format_RGB32
+    if image.hasAlphaChannel():
+        target_format = QImage.Format.Format_ARGB32_Premultiplied
+
+    with timings.measure('to_pixmap_format'):
+        if image.format() == target_format:
+            return image.copy()
+
+        return image.convertToFormat(target_format) # pyright: ignore[reportUnknownMemberType]
+
+
+def pil2pixmap(image: Image.Image) -> QPixmap:
+    converted = to_pixmap_format(pil2qimage(image))
+
+    with timings.measure('from_image'):
+        return QPixmap.fromImage(converted)
+
+
+def fit_size(size: Dimentions, max_dimensions: Dimentions) -> Dimentions:
+    width, height = size
+    max_width, max_height = max_dimensions
+    ratio = min(max_width / width, max_height / height)
+
+    return max(1, int(width * ratio)), max(1, int(height * ratio))
+
+
+def size_bucket(size: Dimentions, step: int = SIZE_BUCKET_STEP) -> Dimentions:
+    width, height = size
+
+    return max(step, -(-width // step) * step), max(step, -(-height // step) * step)
+
+
+def target_size(image: Image.Image, max_dimensions: Dimentions) -> Dimentions:
+    max_width, max_height = max_dimensions
+
+    # * The box is applied to the image as it will be displayed, after exif_transpose
+    orientation = get_orientation(image)
+    if orientation in TRANSPOSING_ORIENTATIONS:
+        max_width, max_height = max_height, max_width
+
+    return fit_size(image.size, (max_width, max_height))
+
+
+def decode_resized(
+    image: Image.Image,
+    new_size: Dimentions,
+    quality: Quality = DEFAULT_QUALITY
+) -> Image.Image:
+    reducing_gap = REDUCING_GAPS[quality]
+    width, height = new_size
+
+    # * Lets the JPEG decoder skip straight to a 1/2, 1/4 or 1/8 scale
+    if reducing_gap is not None and image.format == 'JPEG':
+        image.draft(None, (int(width * reducing_gap), int(height * reducing_gap)))
+
+    # * Decoding is lazy and would otherwise be timed as a part of the resize
+    with timings.measure('decode'):
+        image.load()
+
+    if image.size == new_size:
+        return image
+
+    if image.mode in BYTE_SWAPPED_MODES:
+        with timings.measure('convert'):
+            image = image.convert('I')
+
+    if image.mode in UNREDUCIBLE_MODES:
+        reducing_gap = None
+
+    with timings.measure('resize'):
+        return image.resize(
+            new_size,
+            RESAMPLING_FILTERS[quality],
+            reducing_gap=reducing_gap
+        )
+
+
+def is_mappable(image_path: Path) -> bool:
+    if image_path.suffix.lower() not in MAPPABLE_EXTENSIONS:
+        return False
+
+    return image_path.stat().st_size >= MAPPED_DECODE_MIN_BYTES
+
+
+def decode_mapped_file(
+    image_path: Path,
+    max_dimensions: Dimentions,
+    quality: Quality
+) -> Image.Image | None:
+    if not is_mappable(image_path):
+        return None
+
+    # * Pulls in numpy, which is only needed once such a file is actually loaded
+    from image_organizer.image_utils.mapped_decode import decode_mapped
+
+    return decode_mapped(image_path, max_dimensions, quality)
+
+
+# * Safe to call from worker threads, unlike load_and_resize,
+# * as it does not create a QPixmap
+def load_image(
+    image_path: Path,
+    max_dimensions: Dimentions,
+    quality: Quality = DEFAULT_QUALITY,
+    disk_cache: DiskCache | None = None
+) -> QImage | None:
     if not image_path.exists():
         return
 
-    with Image.open(image_path) as image:
-        width, height = image.size
-        max_width, max_height = max_dimensions
-        ratio = min(max_width / width, max_height / height)
+    with timings.measure('load_image', image_path):
+        if disk_cache is not None:
+            with timings.measure('disk_cache_get'):
+                cached = disk_cache.get(image_path, max_dimensions, quality)
+
+            if cached is not None:
+                return cached
+
+        mapped = decode_mapped_file(image_path, max_dimensions, quality)
+        if mapped is not None:
+            result = to_pixmap_format(pil2qimage(mapped))
+        else:
+            with timings.measure('open'):
+                opened = open_image(image_path)
+
+            with opened as image:
+                new_size = target_size(image, max_dimensions)
+                image = decode_resized(image, new_size, quality)
 
-        if ratio != 1:
-            new_size = int(width * ratio), int(height * ratio)
-            image = image.resize(new_size, Image.ANTIALIAS)
+                result = to_pixmap_format(pil2qimage(image))
+
+        if disk_cache is not None:
+            with timings.measure('disk_cache_put'):
+                disk_cache.put(image_path, max_dimensions, quality, result)
+
+    return result
+
+
+def load_and_resize(
+    image_path: Path,
+    max_dimensions: Dimentions,
+    quality: Quality = DEFAULT_QUALITY,
+    disk_cache: DiskCache | None = None
+) -> QPixmap | None:
+    image = load_image(image_path, max_dimensions, quality, disk_cache)
+    if image is None:
+        return
 
-        pixmap = pil2pixmap(image)
-        return pixmap
+    with timings.measure('from_image'):
+        return QPixmap.fromImage(image)
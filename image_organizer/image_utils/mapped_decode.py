@@ -0,0 +1,569 @@
+import mmap
+import re
+import struct
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+from PIL import Image
+
+from image_organizer.defaults import DEFAULT_QUALITY, Quality
+from image_organizer.image_utils.exif import TRANSPOSING_ORIENTATIONS, apply_orientation
+from image_organizer.image_utils.load_and_resize import (
+    REDUCING_GAPS,
+    RESAMPLING_FILTERS,
+    Dimentions,
+    fit_size,
+)
+from image_organizer.image_utils.raw_previews import (
+    COMPRESSION_TAG,
+    ORIENTATION_TAG,
+    PHOTOMETRIC_TAG,
+    STRIP_OFFSETS_TAG,
+    TiffReader,
+)
+from image_organizer.image_utils.tone_mapping import tone_map
+from image_organizer.instrumentation.stage_timings import timings
+
+IMAGE_WIDTH_TAG = 0x0100
+IMAGE_LENGTH_TAG = 0x0101
+BITS_PER_SAMPLE_TAG = 0x0102
+SAMPLES_PER_PIXEL_TAG = 0x0115
+ROWS_PER_STRIP_TAG = 0x0116
+PLANAR_CONFIGURATION_TAG = 0x011C
+TILE_WIDTH_TAG = 0x0142
+TILE_LENGTH_TAG = 0x0143
+TILE_OFFSETS_TAG = 0x0144
+EXTRA_SAMPLES_TAG = 0x0152
+SAMPLE_FORMAT_TAG = 0x0153
+
+UNCOMPRESSED = 1
+CHUNKY = 1
+UNSIGNED_INTEGER = 1
+
+WHITE_IS_ZERO = 0
+BLACK_IS_ZERO = 1
+RGB = 2
+
+# * Associated and unassociated alpha, any other extra sample is dropped
+ALPHA_SAMPLES = (1, 2)
+
+# * numpy type codes of the sample sizes which can be sampled,
+# * the byte order comes from the file
+SAMPLE_TYPES = {
+    8: 'u1',
+    16: 'u2'
+}
+
+BMP_MAGIC = b'BM'
+BMP_INFO_HEADER_SIZE = 40
+BMP_RGB = 0
+
+PNM_CHANNELS = {
+    b'P5': 1,
+    b'P6': 3
+}
+
+# * Whitespace and comments followed by one of width, height or the maximum value
+PNM_FIELD = re.compile(rb'(?:\s|#[^\n]*\n)+(\d+)')
+PNM_HEADER_BYTES = 1024
+
+# * How much of the mapping the sampled rows copied at a time may span,
+# * the kernel maps the pages around every one which is read,
+# * so they are dropped before the next band is copied
+BAND_BYTES = 16 * 1024 ** 2
+
+# * Not every platform can drop pages of a mapping, those keep them until it is closed
+RELEASE_ADVICE: int | None = getattr(mmap, 'MADV_DONTNEED', None)
+
+# * Readahead would read the rows between the sampled ones as well.
+# * When they are this far apart, readahead is turned off and
+# * the sampled rows of every band are asked for instead.
+SPARSE_GAP_BYTES = 256 * 1024
+
+RANDOM_ADVICE: int | None = getattr(mmap, 'MADV_RANDOM', None)
+PREFETCH_ADVICE: int | None = getattr(mmap, 'MADV_WILLNEED', None)
+
+
+@dataclass(frozen=True)
+class Block:
+    offset: int
+    x: int
+    y: int
+    width: int
+    height: int
+
+    # * Bytes from one row of the block to the next, negative for BMPs stored bottom up
+    row_bytes: int
+
+
+@dataclass(frozen=True)
+class MappedLayout:
+    width: int
+    height: int
+    dtype: np.dtype[Any]
+    samples: int
+
+    # * Samples of every pixel which make up the mode, in its order
+    channels: tuple[int, ...]
+    mode: str
+    blocks: list[Block]
+
+    orientation: int = 1
+    inverted: bool = False
+
+    @property
+    def pixel_bytes(self) -> int:
+        return self.samples * self.dtype.itemsize
+
+    def fits(self, size: int) -> bool:
+        for block in self.blocks:
+            last_row = block.offset + (block.height - 1) * block.row_bytes
+            start = min(block.offset, last_row)
+            end = max(block.offset, last_row) + block.width * self.pixel_bytes
+            if start < 0 or end > size:
+                return False
+
+        return True
+
+
+LayoutParser = Callable[[mmap.mmap], MappedLayout | None]
+
+
+def _tiff_channels(
+    photometric: int,
+    samples: int,
+    extra_samples: list[int]
+) -> tuple[tuple[int, ...], str] | None:
+    if photometric in (WHITE_IS_ZERO, BLACK_IS_ZERO):
+        return (0,), 'L'
+
+    if photometric != RGB or samples < 3:
+        return None
+
+    if samples > 3 and len(extra_samples) > 0 and extra_samples[0] in ALPHA_SAMPLES:
+        return (0, 1, 2, 3), 'RGBA'
+
+    return (0, 1, 2), 'RGB'
+
+
+def _tiff_blocks(
+    tags: dict[int, list[int]],
+    width: int,
+    height: int,
+    pixel_bytes: int
+) -> list[Block] | None:
+    tile_offsets = tags.get(TILE_OFFSETS_TAG)
+
+    if tile_offsets is not None:
+        tile_width = tags.get(TILE_WIDTH_TAG, [0])[0]
+        tile_height = tags.get(TILE_LENGTH_TAG, [0])[0]
+        if tile_width == 0 or tile_height == 0:
+            return None
+
+        across = -(-width // tile_width)
+        down = -(-height // tile_height)
+        if len(tile_offsets) < across * down:
+            return None
+
+        blocks: list[Block] = []
+        for index, offset in enumerate(tile_offsets[:across * down]):
+            x = index % across * tile_width
+            y = index // across * tile_height
+            blocks.append(Block(
+                offset,
+                x,
+                y,
+                min(tile_width, width - x),
+                min(tile_height, height - y),
+                tile_width * pixel_bytes
+            ))
+
+        return blocks
+
+    strip_offsets = tags.get(STRIP_OFFSETS_TAG)
+    if strip_offsets is None:
+        return None
+
+    rows_per_strip = min(tags.get(ROWS_PER_STRIP_TAG, [height])[0], height)
+    if rows_per_strip == 0 or len(strip_offsets) < -(-height // rows_per_strip):
+        return None
+
+    # * Strips are usually written one after the other,
+    # * which makes all of them a single block
+    blocks = []
+    for offset, y in zip(strip_offsets, range(0, height, rows_per_strip)):
+        rows = min(rows_per_strip, height - y)
+        last = blocks[-1] if len(blocks) > 0 else None
+
+        if last is not None and offset == last.offset + last.height * last.row_bytes:
+            blocks[-1] = Block(
+                last.offset,
+                0,
+                last.y,
+                width,
+                last.height + rows,
+                last.row_bytes
+            )
+        else:
+            blocks.append(Block(offset, 0, y, width, rows, width * pixel_bytes))
+
+    return blocks
+
+
+# * Only the first page, uncompressed
+# * and with the samples of every pixel next to each other
+def tiff_layout(data: mmap.mmap) -> MappedLayout | None:
+    try:
+        reader = TiffReader(data)
+        tags, _ = reader.read_ifd(reader.first_ifd)
+    except ValueError:
+        return None
+
+    width = tags.get(IMAGE_WIDTH_TAG, [0])[0]
+    height = tags.get(IMAGE_LENGTH_TAG, [0])[0]
+    samples = tags.get(SAMPLES_PER_PIXEL_TAG, [1])[0]
+    bits = set(tags.get(BITS_PER_SAMPLE_TAG, [1]))
+
+    compression = tags.get(COMPRESSION_TAG, [UNCOMPRESSED])[0]
+    if width == 0 or height == 0 or compression != UNCOMPRESSED:
+        return None
+
+    if samples > 1 and tags.get(PLANAR_CONFIGURATION_TAG, [CHUNKY])[0] != CHUNKY:
+        return None
+
+    sample_formats = set(tags.get(SAMPLE_FORMAT_TAG, [UNSIGNED_INTEGER]))
+    if len(bits) != 1 or sample_formats != {UNSIGNED_INTEGER}:
+        return None
+
+    sample_type = SAMPLE_TYPES.get(bits.pop())
+    photometric = tags.get(PHOTOMETRIC_TAG, [-1])[0]
+    channels = _tiff_channels(photometric, samples, tags.get(EXTRA_SAMPLES_TAG, []))
+    if sample_type is None or channels is None:
+        return None
+
+    dtype = np.dtype(reader.byte_order + sample_type)
+    blocks = _tiff_blocks(tags, width, height, samples * dtype.itemsize)
+    if blocks is None:
+        return None
+
+    return MappedLayout(
+        width,
+        height,
+        dtype,
+        samples,
+        *channels,
+        blocks,
+        orientation=tags.get(ORIENTATION_TAG, [1])[0],
+        inverted=photometric == WHITE_IS_ZERO
+    )
+
+
+# * 24 and 32 bit pixels without a palette or compression, stored as BGR
+def bmp_layout(data: mmap.mmap) -> MappedLayout | None:
+    if data[:2] != BMP_MAGIC or len(data) < 14 + BMP_INFO_HEADER_SIZE:
+        return None
+
+    pixels_offset, = struct.unpack_from('<I', data, 10)
+    header = struct.unpack_from('<IiiHHI', data, 14)
+    header_size, width, height, _, bits, compression = header
+    if header_size < BMP_INFO_HEADER_SIZE or compression != BMP_RGB:
+        return None
+
+    if bits not in (24, 32) or width <= 0 or height == 0:
+        return None
+
+    # * Rows are padded to 4 bytes,
+    # * and stored from the bottom up unless the height is negative
+    row_bytes = (width * bits + 31) // 32 * 4
+    block = Block(pixels_offset, 0, 0, width, -height, row_bytes)
+    if height > 0:
+        block = Block(
+            pixels_offset + (height - 1) * row_bytes,
+            0,
+            0,
+            width,
+            height,
+            -row_bytes
+        )
+
+    return MappedLayout(
+        width,
+        block.height,
+        np.dtype('u1'),
+        bits // 8,
+        (2, 1, 0),
+        'RGB',
+        [block]
+    )
+
+
+# * Binary PGM and PPM, their 16 bit samples are big endian
+def pnm_layout(data: mmap.mmap) -> MappedLayout | None:
+    samples = PNM_CHANNELS.get(data[:2])
+    if samples is None:
+        return None
+
+    header = data[:PNM_HEADER_BYTES]
+    fields: list[int] = []
+    position = 2
+
+    for _ in range(3):
+        match = PNM_FIELD.match(header, position)
+        if match is None:
+            return None
+
+        fields.append(int(match.group(1)))
+        position = match.end()
+
+    # * A single whitespace character separates the header from the pixels
+    if not header[position:position + 1].isspace():
+        return None
+
+    width, height, max_value = fields
+    if width == 0 or height == 0 or max_value not in range(255, 65536):
+        return None
+
+    dtype = np.dtype('u1' if max_value == 255 else '>u2')
+    block = Block(position + 1, 0, 0, width, height, width * samples * dtype.itemsize)
+    channels = (0, 1, 2) if samples == 3 else (0,)
+    mode = 'RGB' if samples == 3 else 'L'
+
+    return MappedLayout(width, height, dtype, samples, channels, mode, [block])
+
+
+LAYOUT_PARSERS: dict[bytes, LayoutParser] = {
+    b'II': tiff_layout,
+    b'MM': tiff_layout,
+    b'BM': bmp_layout,
+    b'P5': pnm_layout,
+    b'P6': pnm_layout
+}
+
+
+def read_layout(data: mmap.mmap) -> MappedLayout | None:
+    parser = LAYOUT_PARSERS.get(data[:2])
+    if parser is None:
+        return None
+
+    layout = parser(data)
+    if layout is None or not layout.fits(len(data)):
+        return None
+
+    return layout
+
+
+def _advise(data: mmap.mmap, advice: int | None, start: int, end: int) -> None:
+    if advice is None:
+        return
+
+    start -= start % mmap.PAGESIZE
+    data.madvise(advice, start, min(end, len(data)) - start)
+
+
+# * Every step-th pixel of every step-th row of the block, read through a strided
+# * view of the mapping, so only the pages of the sampled rows are ever read
+def _sample_block(
+    data: mmap.mmap,
+    layout: MappedLayout,
+    block: Block,
+    step: int,
+    output: npt.NDArray[Any]
+) -> None:
+    first_row = -block.y % step
+    first_column = -block.x % step
+    rows = len(range(first_row, block.height, step))
+    columns = len(range(first_column, block.width, step))
+    if rows == 0 or columns == 0:
+        return
+
+    output_x = (block.x + first_column) // step
+    output_y = (block.y + first_row) // step
+    channels = list(layout.channels)
+    stride = block.row_bytes * step
+    row_length = block.width * layout.pixel_bytes
+    rows_per_band = max(1, BAND_BYTES // abs(stride))
+
+    sparse = abs(stride) - row_length >= SPARSE_GAP_BYTES
+    if sparse:
+        last_row = block.offset + (block.height - 1) * block.row_bytes
+        start = min(block.offset, last_row)
+        _advise(data, RANDOM_ADVICE, start, max(block.offset, last_row) + row_length)
+
+    for band in range(0, rows, rows_per_band):
+        band_rows = min(rows_per_band, rows - band)
+        first_byte = block.offset + (first_row + band * step) * block.row_bytes
+        last_byte = first_byte + (band_rows - 1) * step * block.row_bytes
+
+        if sparse:
+            for row_start in range(first_byte, last_byte + stride, stride):
+                _advise(data, PREFETCH_ADVICE, row_start, row_start + row_length)
+
+        view = np.ndarray(
+            (band_rows, columns, layout.samples),
+            layout.dtype,
+            buffer=data,
+            offset=first_byte + first_column * layout.pixel_bytes,
+            strides=(stride, layout.pixel_bytes * step, layout.dtype.itemsize)
+        )
+        output_rows = slice(output_y + band, output_y + band + band_rows)
+        output[output_rows, output_x:output_x + columns] = view[:, :, channels]
+        del view
+
+        start = min(first_byte, last_byte)
+        _advise(data, RELEASE_ADVICE, start, max(first_byte, last_byte) + row_length)
+
+
+def sample(data: mmap.mmap, layout: MappedLayout, step: int) -> npt.NDArray[Any]:
+    shape = (
+        len(range(0, layout.height, step)),
+        len(range(0, layout.width, step)),
+        len(layout.channels)
+    )
+    output = np.empty(shape, layout.dtype)
+
+    for block in layout.blocks:
+        _sample_block(data, layout, block, step, output)
+
+    return output
+
+
+def _to_image(pixels: npt.NDArray[Any], layout: MappedLayout) -> Image.Image:
+    if pixels.dtype.itemsize > 1:
+        pixels = tone_map(pixels)
+
+    if layout.inverted:
+        np.subtract(255, pixels, out=pixels)
+
+    if layout.mode == 'L':
+        pixels = pixels[:, :, 0]
+
+    return Image.fromarray(np.ascontiguousarray(pixels))
+
+
+# * Downscales large uncompressed TIFF, BMP and PPM files without reading all of them.
+# * The pixels are sampled to the reducing gap of the quality,
+# * then resampled like any other image.
+# * None when the file can not be sampled
+# * or is not big enough for sampling to skip anything.
+def decode_mapped(
+    image_path: Path,
+    max_dimensions: Dimentions,
+    quality: Quality = DEFAULT_QUALITY
+) -> Image.Image | None:
+    # * Sampling skips pixels,
+    # * which only the resampling over the gap keeps from aliasing
+    reducing_gap = REDUCING_GAPS[quality]
+    if reducing_gap is None:
+        return None
+
+    with open(image_path, 'rb') as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            layout = read_layout(data)
+            if layout is None:
+                return None
+
+            max_width, max_height = max_dimensions
+            if layout.orientation in TRANSPOSING_ORIENTATIONS:
+                max_width, max_height = max_height, max_width
+
+            new_width, new_height = fit_size(
+                (layout.width, layout.height),
+                (max_width, max_height)
+            )
+            step = int(min(
+                layout.width / (new_width * reducing_gap),
+                layout.height / (new_height * reducing_gap)
+            ))
+            if step < 2:
+                return None
+
+            with timings.measure('decode'):
+                pixels = sample(data, layout, step)
+
+    with timings.measure('convert'):
+        image = _to_image(pixels, layout)
+
+    with timings.measure('resize'):
+        image = image.resize((new_width, new_height), RESAMPLING_FILTERS[quality])
+
+    with timings.measure('exif_transpose'):
+        return apply_orientation(image, layout.orientation)
+
+
+# * Pixels of the x0, y0, x1, y1 rectangle,
+# * copied only out of the blocks which overlap it
+def read_region(
+    data: mmap.mmap,
+    layout: MappedLayout,
+    box: tuple[int, int, int, int]
+) -> npt.NDArray[Any]:
+    x0, y0, x1, y1 = box
+    output = np.empty((y1 - y0, x1 - x0, len(layout.channels)), layout.dtype)
+    channels = list(layout.channels)
+
+    for block in layout.blocks:
+        left = max(x0, block.x)
+        top = max(y0, block.y)
+        right = min(x1, block.x + block.width)
+        bottom = min(y1, block.y + block.height)
+        if left >= right or top >= bottom:
+            continue
+
+        first_row = block.offset + (top - block.y) * block.row_bytes
+        view = np.ndarray(
+            (bottom - top, right - left, layout.samples),
+            layout.dtype,
+            buffer=data,
+            offset=first_row + (left - block.x) * layout.pixel_bytes,
+            strides=(block.row_bytes, layout.pixel_bytes, layout.dtype.itemsize)
+        )
+        output[top - y0:bottom - y0, left - x0:right - x0] = view[:, :, channels]
+        del view
+
+    return output
+
+
+# * Regions of the full resolution of a file which is kept mapped until it is closed
+class MappedRegions:
+    def __init__(self, image_path: Path) -> None:
+        self._file = open(image_path, 'rb')
+        self._data: mmap.mmap | None = None
+        self.layout: MappedLayout | None = None
+
+        try:
+            self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.layout = read_layout(self._data)
+        except Exception:
+            self.close()
+            raise
+
+    # * Only 8 bit samples stored the way they are shown, larger ones would be tone
+    # * mapped region by region, which does not match up between the regions
+    @property
+    def readable(self) -> bool:
+        layout = self.layout
+        if layout is None:
+            return False
+
+        return layout.dtype.itemsize == 1 and layout.orientation == 1
+
+    def read(self, box: tuple[int, int, int, int]) -> Image.Image:
+        assert self._data is not None and self.layout is not None
+
+        return _to_image(read_region(self._data, self.layout, box), self.layout)
+
+    def close(self) -> None:
+        if self._data is not None:
+            self._data.close()
+
+        self._file.close()
+
+    def __enter__(self) -> 'MappedRegions':
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self.close()
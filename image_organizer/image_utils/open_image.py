@@ -0,0 +1,30 @@
+import io
+from pathlib import Path
+
+from PIL import ExifTags, Image
+
+from image_organizer.image_utils.raw_previews import is_raw, read_preview
+
+
+# * The embedded JPEG stands in for the RAW, so the rest of the pipeline,
+# * draft() included, treats it like any other JPEG.
+# * The orientation of the RAW replaces whatever the preview has.
+def open_raw(image_path: Path) -> Image.Image:
+    data, orientation = read_preview(image_path)
+
+    image = Image.open(io.BytesIO(data))
+    exif = image.getexif()
+    if orientation == 1:
+        exif.pop(ExifTags.Base.Orientation, None)
+    else:
+        exif[ExifTags.Base.Orientation] = orientation
+
+    return image
+
+
+def open_image(image_path: Path | str) -> Image.Image:
+    image_path = Path(image_path)
+    if is_raw(image_path):
+        return open_raw(image_path)
+
+    return Image.open(image_path)
@@ -1,44 +1,147 @@
+from collections import OrderedDict
+from collections.abc import Hashable, Iterable
+from functools import lru_cache
 from pathlib import Path
+from typing import Generic, TypeVar, cast
 
-from PyQt6.QtGui import QPixmap, QPixmapCache
+from PyQt6.QtGui import QPixmap
 
-DEFAULT_CACHE_LIMIT = 1024 * 1024 # 1GB
+from image_organizer.defaults import DEFAULT_CACHE_LIMIT
+
+K = TypeVar('K', bound=Hashable)
 
 
 def pixmap_size_bytes(pixmap: QPixmap) -> int:
     return int((pixmap.height() * pixmap.width() * pixmap.depth()) / 8)
 
 
-class PixmapCache:
-    def __init__(self) -> None:
+# * Resolving hits the file system, while the cache is queried on every navigation
+@lru_cache(maxsize=65536)
+def resolve_key(key: Path) -> str:
+    return str(key.resolve())
+
+
+# * The resolved path of a formatted key, which is the key or the first item of a tuple
+def key_path(key: Hashable) -> Hashable:
+    if not isinstance(key, tuple):
+        return key
+
+    parts = cast(tuple[Hashable, ...], key)
+    return parts[0] if len(parts) > 0 else None
+
+
+class PixmapCache(Generic[K]):
+    def __init__(self, limit_bytes: int = DEFAULT_CACHE_LIMIT) -> None:
         super().__init__()
 
-        self._qt_cache = QPixmapCache()
-        self._qt_cache.setCacheLimit(DEFAULT_CACHE_LIMIT)
+        self.limit_bytes = limit_bytes
+
+        self._entries: OrderedDict[Hashable, QPixmap] = OrderedDict()
+        self._protected: set[Hashable] = set()
         self._size = 0
 
-    def _format_key(self, key: Path) -> str:
-        return str(key.absolute())
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # * Paths are resolved, so the same file is cached once,
+    # * also when they lead a tuple key. Any other keys are used as they are
+    def _format_key(self, key: K) -> Hashable:
+        if isinstance(key, Path):
+            return resolve_key(key)
+
+        if not isinstance(key, tuple):
+            return key
+
+        parts = cast(tuple[Hashable, ...], key)
+        if len(parts) > 0 and isinstance(parts[0], Path):
+            return (resolve_key(parts[0]), *parts[1:])
+
+        return parts
+
+    def __contains__(self, key: K) -> bool:
+        return self._format_key(key) in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: K) -> QPixmap | None:
+        formatted_key = self._format_key(key)
+
+        entry = self._entries.get(formatted_key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._entries.move_to_end(formatted_key)
 
-    def get(self, key: Path) -> QPixmap | None:
-        entry: QPixmap | None = self._qt_cache.find(self._format_key(key))
         return entry
 
-    def insert(self, key: Path, value: QPixmap) -> None:
-        self._size += pixmap_size_bytes(value)
+    def insert(self, key: K, value: QPixmap) -> None:
+        value_size = pixmap_size_bytes(value)
+        if value_size > self.limit_bytes:
+            return
+
+        self.delete(key)
+
+        self._entries[self._format_key(key)] = value
+        self._size += value_size
 
-        self._qt_cache.insert(self._format_key(key), value)
+        self._evict()
 
-    def delete(self, key: Path) -> bool:
-        removed = self.get(key)
+    def delete(self, key: K) -> bool:
+        removed = self._entries.pop(self._format_key(key), None)
         if removed is None:
             return False
 
         self._size -= pixmap_size_bytes(removed)
-
-        self._qt_cache.remove(self._format_key(key))
         return True
 
+    def pop(self, key: K) -> QPixmap | None:
+        removed = self._entries.pop(self._format_key(key), None)
+        if removed is not None:
+            self._size -= pixmap_size_bytes(removed)
+
+        return removed
+
+    # * Every entry of the file, whether the path is the key or leads a tuple key
+    def delete_path(self, path: Path) -> int:
+        resolved = resolve_key(path)
+        keys = [key for key in self._entries if key_path(key) == resolved]
+
+        for key in keys:
+            self._size -= pixmap_size_bytes(self._entries.pop(key))
+
+        return len(keys)
+
+    def protect(self, keys: Iterable[K]) -> None:
+        self._protected = {self._format_key(key) for key in keys}
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._size = 0
+
+    def _evict(self) -> None:
+        if self._size <= self.limit_bytes:
+            return
+
+        # * Images the prefetcher is holding on to are skipped,
+        # * even if it means going over the limit
+        for key in list(self._entries.keys()):
+            if key in self._protected:
+                continue
+
+            self._size -= pixmap_size_bytes(self._entries.pop(key))
+            self.evictions += 1
+
+            if self._size <= self.limit_bytes:
+                return
+
+    @property
+    def size_bytes(self) -> int:
+        return self._size
+
     @property
     def size_kbytes(self) -> float:
         return self._size / 1024
@@ -46,3 +149,7 @@ class PixmapCache:
     @property
     def size_mb(self) -> float:
         return self._size / 1024 ** 2
+
+    @property
+    def limit_mb(self) -> float:
+        return self.limit_bytes / 1024 ** 2
@@ -0,0 +1,65 @@
+from pathlib import Path
+
+from PyQt6.QtGui import QImage
+
+from image_organizer.image_utils.disk_cache import DiskCache
+from image_organizer.image_utils.load_and_resize import (
+    DEFAULT_QUALITY,
+    Dimentions,
+    Quality,
+    pil2qimage,
+    to_pixmap_format,
+)
+from image_organizer.image_utils.open_image import open_image
+from image_organizer.image_utils.thumbnails import (
+    THUMBNAIL_DIMENSIONS,
+    embedded_thumbnail,
+)
+from image_organizer.instrumentation.stage_timings import timings
+
+# * The smallest scale the JPEG decoder can skip straight to
+PREVIEW_DRAFT_SCALE = 8
+
+
+# * The fastest frame of an image there is, shown while the image itself is being
+# * decoded. Nothing is returned when the only way to get one is decoding the whole
+# * image anyway, as it is for PNGs and most TIFFs, which have not been thumbnailed yet.
+# * The dimensions are the ones the filmstrip caches its thumbnails on the disk with.
+def load_preview(
+    image_path: Path,
+    max_dimensions: Dimentions = THUMBNAIL_DIMENSIONS,
+    quality: Quality = DEFAULT_QUALITY,
+    disk_cache: DiskCache | None = None
+) -> QImage | None:
+    with timings.measure('preview', image_path):
+        if disk_cache is not None:
+            cached = disk_cache.get(image_path, max_dimensions, quality)
+            if cached is not None:
+                return cached
+
+        # * A preview is only ever a stand in,
+        # * an image which can not be decoded just does not get one
+        try:
+            with open_image(image_path) as image:
+                try:
+                    thumbnail = embedded_thumbnail(image)
+                except Exception:
+                    # * A broken thumbnail does not mean the image itself is broken
+                    thumbnail = None
+
+                if thumbnail is not None:
+                    return to_pixmap_format(pil2qimage(thumbnail))
+
+                if image.format != 'JPEG':
+                    return None
+
+                width, height = image.size
+                image.draft(
+                    image.mode,
+                    (width // PREVIEW_DRAFT_SCALE, height // PREVIEW_DRAFT_SCALE)
+                )
+                image.load()
+
+                return to_pixmap_format(pil2qimage(image))
+        except Exception:
+            return None
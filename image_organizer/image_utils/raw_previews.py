@@ -0,0 +1,248 @@
+import mmap
+import struct
+from dataclasses import dataclass
+from pathlib import Path
+
+# * RAW formats which are TIFF containers,
+# * they all carry a JPEG preview next to the sensor data
+RAW_EXTENSIONS = frozenset({'.arw', '.cr2', '.dng', '.nef', '.nrw', '.pef'})
+
+TIFF_MAGIC = 42
+BYTE_ORDERS = {b'II': '<', b'MM': '>'}
+
+COMPRESSION_TAG = 0x0103
+PHOTOMETRIC_TAG = 0x0106
+STRIP_OFFSETS_TAG = 0x0111
+ORIENTATION_TAG = 0x0112
+STRIP_BYTE_COUNTS_TAG = 0x0117
+SUB_IFDS_TAG = 0x014A
+JPEG_OFFSET_TAG = 0x0201
+JPEG_LENGTH_TAG = 0x0202
+EXIF_IFD_TAG = 0x8769
+
+# * Old style and new style JPEG compression
+JPEG_COMPRESSIONS = (6, 7)
+
+# * Color filter array and linear raw, the sensor data itself,
+# * which DNG also stores as JPEG
+RAW_PHOTOMETRICS = (32803, 34892)
+
+# * struct formats of the TIFF field types which can hold offsets and counts
+INTEGER_TYPES = {
+    1: 'B',
+    3: 'H',
+    4: 'I',
+    9: 'i',
+    13: 'I'
+}
+
+IFD_ENTRY_SIZE = 12
+
+# * Guards against IFDs pointing at each other in broken or malicious files
+MAX_IFDS = 64
+
+JPEG_SOI = b'\xff\xd8'
+
+# * Baseline, extended and progressive frames, which PIL decodes.
+# * Lossless ones hold sensor data.
+DECODABLE_JPEG_FRAMES = (0xC0, 0xC1, 0xC2)
+
+# * Markers which are not followed by a length
+STANDALONE_MARKERS = {0x01, *range(0xD0, 0xD8)}
+JPEG_SOS = 0xDA
+
+
+@dataclass(frozen=True)
+class RawPreview:
+    offset: int
+    length: int
+    width: int
+    height: int
+
+    # * Previews are stored as the sensor sees them,
+    # * the orientation of the RAW applies to them
+    orientation: int = 1
+
+    @property
+    def pixels(self) -> int:
+        return self.width * self.height
+
+
+class TiffReader:
+    def __init__(self, data: bytes | mmap.mmap) -> None:
+        self.data = data
+
+        byte_order = BYTE_ORDERS.get(bytes(data[:2]))
+        if byte_order is None:
+            raise ValueError('Not a TIFF container')
+
+        self.byte_order = byte_order
+        magic, self.first_ifd = self.unpack('HI', 2)
+
+        # * CR2 files have their own magic after the TIFF one,
+        # * ORF and RW2 change the TIFF one
+        if magic != TIFF_MAGIC:
+            raise ValueError(f'Unsupported TIFF magic {magic}')
+
+    def unpack(self, fields: str, offset: int) -> tuple[int, ...]:
+        end = offset + struct.calcsize(self.byte_order + fields)
+        if offset < 0 or end > len(self.data):
+            raise ValueError(f'Offset {offset} is outside of the file')
+
+        return struct.unpack_from(self.byte_order + fields, self.data, offset)
+
+    # * Tags holding integers, the values are either inline or behind an offset
+    def read_ifd(self, offset: int) -> tuple[dict[int, list[int]], int]:
+        count, = self.unpack('H', offset)
+        tags: dict[int, list[int]] = {}
+
+        for index in range(count):
+            entry = offset + 2 + index * IFD_ENTRY_SIZE
+            tag, field_type, values_count = self.unpack('HHI', entry)
+
+            value_format = INTEGER_TYPES.get(field_type)
+            if value_format is None or values_count == 0:
+                continue
+
+            values_offset = entry + 8
+            if struct.calcsize(value_format) * values_count > 4:
+                values_offset, = self.unpack('I', entry + 8)
+
+            values = self.unpack(f'{values_count}{value_format}', values_offset)
+            tags[tag] = list(values)
+
+        next_ifd, = self.unpack('I', offset + 2 + count * IFD_ENTRY_SIZE)
+        return tags, next_ifd
+
+    # * IFD0 first, followed by its chain,
+    # * the SubIFDs and the EXIF IFD, each one visited once
+    def iter_ifds(self) -> list[dict[int, list[int]]]:
+        queue = [self.first_ifd]
+        visited: set[int] = set()
+        ifds: list[dict[int, list[int]]] = []
+
+        while len(queue) > 0 and len(ifds) < MAX_IFDS:
+            offset = queue.pop(0)
+            if offset == 0 or offset in visited:
+                continue
+
+            visited.add(offset)
+            try:
+                tags, next_ifd = self.read_ifd(offset)
+            except ValueError:
+                # * Pointing past the end of a file which was not copied completely,
+                # * the rest can still hold the preview
+                continue
+
+            ifds.append(tags)
+
+            queue.extend(tags.get(SUB_IFDS_TAG, []))
+            queue.extend(tags.get(EXIF_IFD_TAG, []))
+            queue.append(next_ifd)
+
+        return ifds
+
+
+# * Width and height from the frame header, None for anything PIL could not decode
+def jpeg_size(
+    data: bytes | mmap.mmap,
+    offset: int,
+    length: int
+) -> tuple[int, int] | None:
+    end = min(offset + length, len(data))
+    if data[offset:offset + 2] != JPEG_SOI:
+        return None
+
+    position = offset + 2
+    while position + 4 <= end:
+        if data[position] != 0xFF:
+            return None
+
+        marker = data[position + 1]
+        if marker == 0xFF:
+            position += 1
+            continue
+
+        if marker in STANDALONE_MARKERS:
+            position += 2
+            continue
+
+        if marker == JPEG_SOS:
+            return None
+
+        segment_length, = struct.unpack_from('>H', data, position + 2)
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            if marker not in DECODABLE_JPEG_FRAMES or position + 9 > end:
+                return None
+
+            height, width = struct.unpack_from('>HH', data, position + 5)
+            return width, height
+
+        position += 2 + segment_length
+
+    return None
+
+
+def _candidates(tags: dict[int, list[int]]) -> list[tuple[int, int]]:
+    candidates: list[tuple[int, int]] = []
+
+    offsets = tags.get(JPEG_OFFSET_TAG)
+    lengths = tags.get(JPEG_LENGTH_TAG)
+    if offsets is not None and lengths is not None:
+        candidates.append((offsets[0], lengths[0]))
+
+    # * CR2 and DNG store their previews as a single JPEG strip
+    compression = tags.get(COMPRESSION_TAG, [0])[0]
+    photometric = tags.get(PHOTOMETRIC_TAG, [0])[0]
+    offsets = tags.get(STRIP_OFFSETS_TAG)
+    lengths = tags.get(STRIP_BYTE_COUNTS_TAG)
+
+    if compression in JPEG_COMPRESSIONS and photometric not in RAW_PHOTOMETRICS \
+            and offsets is not None and lengths is not None and len(offsets) == 1:
+        candidates.append((offsets[0], lengths[0]))
+
+    return candidates
+
+
+# * The biggest JPEG in the container,
+# * which is the full size preview when the camera stores one
+def find_preview(data: bytes | mmap.mmap) -> RawPreview | None:
+    reader = TiffReader(data)
+    ifds = reader.iter_ifds()
+    if len(ifds) == 0:
+        return None
+
+    orientation = ifds[0].get(ORIENTATION_TAG, [1])[0]
+
+    best: RawPreview | None = None
+    for tags in ifds:
+        for offset, length in _candidates(tags):
+            if offset + length > len(data):
+                continue
+
+            size = jpeg_size(data, offset, length)
+            if size is None:
+                continue
+
+            preview = RawPreview(offset, length, *size, orientation=orientation)
+            if best is None or preview.pixels > best.pixels:
+                best = preview
+
+    return best
+
+
+# * Only the header, the IFDs and the preview itself are ever paged in,
+# * never the sensor data
+def read_preview(image_path: Path) -> tuple[bytes, int]:
+    with open(image_path, 'rb') as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            preview = find_preview(data)
+            if preview is None:
+                raise ValueError(f'{image_path} has no embedded preview')
+
+            end = preview.offset + preview.length
+            return data[preview.offset:end], preview.orientation
+
+
+def is_raw(image_path: Path) -> bool:
+    return image_path.suffix.lower() in RAW_EXTENSIONS
@@ -0,0 +1,71 @@
+import io
+from pathlib import Path
+
+from PIL import Image
+from PyQt6.QtGui import QImage
+
+from image_organizer.image_utils.disk_cache import DiskCache
+from image_organizer.image_utils.exif import (
+    apply_orientation,
+    exif_thumbnail,
+    get_orientation,
+)
+from image_organizer.image_utils.load_and_resize import (
+    DEFAULT_QUALITY,
+    Dimentions,
+    Quality,
+    fit_size,
+    load_image,
+    pil2qimage,
+    to_pixmap_format,
+)
+from image_organizer.image_utils.open_image import open_image
+
+THUMBNAIL_DIMENSIONS: Dimentions = (160, 120)
+
+
+# * Upright, as the orientation is stored with the image and not with the thumbnail
+def embedded_thumbnail(image: Image.Image) -> Image.Image | None:
+    data = exif_thumbnail(image)
+    if data is None:
+        return None
+
+    orientation = get_orientation(image)
+
+    with Image.open(io.BytesIO(data)) as thumbnail:
+        return apply_orientation(thumbnail.convert('RGB'), orientation)
+
+
+def _embedded_thumbnail(image_path: Path, max_dimensions: Dimentions) -> QImage | None:
+    with open_image(image_path) as image:
+        thumbnail = embedded_thumbnail(image)
+
+    if thumbnail is None:
+        return None
+
+    # * Thumbnails smaller than the box would look blurry, the image is decoded instead
+    width, height = thumbnail.size
+    new_size = fit_size((width, height), max_dimensions)
+    if new_size[0] > width or new_size[1] > height:
+        return None
+
+    resized = thumbnail.resize(new_size, Image.Resampling.BILINEAR)
+
+    return to_pixmap_format(pil2qimage(resized))
+
+
+def load_thumbnail(
+    image_path: Path,
+    max_dimensions: Dimentions = THUMBNAIL_DIMENSIONS,
+    quality: Quality = DEFAULT_QUALITY,
+    disk_cache: DiskCache | None = None
+) -> QImage | None:
+    try:
+        thumbnail = _embedded_thumbnail(image_path, max_dimensions)
+    except (OSError, ValueError, SyntaxError):
+        thumbnail = None
+
+    if thumbnail is not None:
+        return thumbnail
+
+    return load_image(image_path, max_dimensions, quality, disk_cache)
@@ -0,0 +1,186 @@
+import threading
+from pathlib import Path
+
+from PIL import Image
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+from PyQt6.QtGui import QImage
+
+from image_organizer.image_utils.image_loader import GenerationCounter
+from image_organizer.image_utils.pixmap_cache import resolve_key
+from image_organizer.image_utils.tiles import (
+    TileIndex,
+    TileKey,
+    cut_tiles,
+    decode_level,
+    read_mapped_tiles,
+)
+
+# * Decoding a level holds all of it in memory,
+# * so only a couple of them are decoded at once
+DEFAULT_TILE_THREADS = 2
+
+
+# * Resolved path of the image, level and the generation it was decoded in
+LevelKey = tuple[str, int, int]
+
+
+# * The last decoded level, so the batches of tiles which follow the view around
+# * are cut out of it without decoding it again. Only one is kept, a full resolution
+# * level alone can take hundreds of megabytes.
+class LevelCache:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._key: LevelKey | None = None
+        self._image: Image.Image | None = None
+
+        # * Tasks which were queued before the last clear still finish their decode
+        self._first_generation = 0
+
+        # * Tasks which want a level another one is decoding wait for it instead
+        self._decoding: dict[LevelKey, threading.Lock] = {}
+
+    def get(self, image_path: Path, level: int, generation: int) -> Image.Image:
+        key = (resolve_key(image_path), level, generation)
+        with self._lock:
+            decoding = self._decoding.setdefault(key, threading.Lock())
+
+        with decoding:
+            with self._lock:
+                if self._key == key and self._image is not None:
+                    return self._image
+
+            try:
+                image = decode_level(image_path, level)
+            finally:
+                with self._lock:
+                    self._decoding.pop(key, None)
+
+            with self._lock:
+                if generation >= self._first_generation:
+                    self._key = key
+                    self._image = image
+
+            return image
+
+    def clear(self, generation: int) -> None:
+        with self._lock:
+            self._first_generation = generation
+            self._key = None
+            self._image = None
+
+
+class TileSignals(QObject):
+    loaded = pyqtSignal(object, QImage)
+    finished = pyqtSignal(object)
+
+
+class TileTask(QRunnable):
+    def __init__(
+        self,
+        image_path: Path,
+        level: int,
+        tiles: list[TileIndex],
+        signals: TileSignals,
+        generations: GenerationCounter,
+        levels: LevelCache
+    ) -> None:
+        super().__init__()
+
+        self.image_path = image_path
+        self.level = level
+        self.tiles = tiles
+        self.signals = signals
+        self.generations = generations
+        self.generation = generations.value
+        self.levels = levels
+
+        self.keys: list[TileKey] = [
+            (resolve_key(image_path), level, column, row) for column, row in tiles
+        ]
+
+    def run(self) -> None:
+        try:
+            # * The view has moved on to another image
+            # * while the task was waiting in the queue
+            if self.generations.is_stale(self.generation):
+                return
+
+            tiles = None
+            if self.level == 0:
+                tiles = read_mapped_tiles(self.image_path, self.tiles)
+
+            if tiles is None:
+                level_image = self.levels.get(
+                    self.image_path,
+                    self.level,
+                    self.generation
+                )
+                tiles = cut_tiles(level_image, self.tiles)
+
+            for (column, row), image in tiles:
+                # * Or while the tiles were being cut
+                if self.generations.is_stale(self.generation):
+                    return
+
+                key = (resolve_key(self.image_path), self.level, column, row)
+                self.signals.loaded.emit(key, image)
+        except Exception:
+            # * Corrupt and oversized images raise all sorts of errors from PIL,
+            # * an exception escaping a runnable takes the whole process down with it
+            pass
+        finally:
+            self.signals.finished.emit(self.keys)
+
+
+class TileLoader(QObject):
+    loaded = pyqtSignal(object, QImage)
+
+    def __init__(
+        self,
+        max_threads: int = DEFAULT_TILE_THREADS,
+        parent: QObject | None = None
+    ) -> None:
+        super().__init__(parent)
+
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(max_threads)
+
+        self._pending: set[TileKey] = set()
+        self._generations = GenerationCounter()
+        self._levels = LevelCache()
+
+        self._signals = TileSignals(self)
+        self._signals.loaded.connect(self.loaded)
+        self._signals.finished.connect(self._finished_handler)
+
+    def advance_generation(self) -> int:
+        return self._generations.advance()
+
+    def is_pending(self, key: TileKey) -> bool:
+        return key in self._pending
+
+    # * All of the tiles come out of a single decode of the level,
+    # * which is kept for the next ones
+    def request(self, image_path: Path, level: int, tiles: list[TileIndex]) -> None:
+        task = TileTask(
+            image_path,
+            level,
+            tiles,
+            self._signals,
+            self._generations,
+            self._levels
+        )
+
+        self._pending.update(task.keys)
+        self._pool.start(task)
+
+    def clear(self) -> None:
+        self._pool.clear()
+        self._pending.clear()
+        self._levels.clear(self._generations.value)
+
+    def wait_for_done(self, timeout_ms: int = -1) -> bool:
+        return self._pool.waitForDone(timeout_ms)
+
+    def _finished_handler(self, keys: list[TileKey]) -> None:
+        self._pending.difference_update(keys)
@@ -0,0 +1,189 @@
+import math
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from PIL import Image, ImageOps
+from PyQt6.QtGui import QImage
+
+from image_organizer.image_utils.exif import TRANSPOSING_ORIENTATIONS, get_orientation
+from image_organizer.image_utils.load_and_resize import (
+    Dimentions,
+    decode_mapped_file,
+    is_mappable,
+    pil2qimage,
+    to_pixmap_format,
+)
+from image_organizer.image_utils.open_image import open_image
+
+if TYPE_CHECKING:
+    from image_organizer.image_utils.mapped_decode import MappedRegions
+
+TILE_SIZE = 512
+
+# * Level 0 is the full resolution, every next level halves both of the dimensions
+TileIndex = tuple[int, int]
+
+# * Resolved path of the image, level, column and row
+TileKey = tuple[str, int, int, int]
+
+# * Rectangle as x0, y0, x1, y1
+Rect = tuple[float, float, float, float]
+
+
+def image_size(image_path: Path) -> Dimentions:
+    with open_image(image_path) as image:
+        width, height = image.size
+
+        if get_orientation(image) in TRANSPOSING_ORIENTATIONS:
+            return height, width
+
+    return width, height
+
+
+def level_size(full_size: Dimentions, level: int) -> Dimentions:
+    width, height = full_size
+    scale = 2 ** level
+
+    return math.ceil(width / scale), math.ceil(height / scale)
+
+
+def max_level(full_size: Dimentions) -> int:
+    return max(0, math.ceil(math.log2(max(full_size) / TILE_SIZE)))
+
+
+# * The coarsest level which still has at least one image pixel for every screen pixel
+def choose_level(full_size: Dimentions, on_screen_width: float) -> int:
+    if on_screen_width <= 0:
+        return max_level(full_size)
+
+    level = math.floor(math.log2(full_size[0] / on_screen_width))
+    return min(max(level, 0), max_level(full_size))
+
+
+def tiles_in_rect(size: Dimentions, rect: Rect, margin: int = 0) -> list[TileIndex]:
+    width, height = size
+    x0, y0, x1, y1 = rect
+
+    columns = math.ceil(width / TILE_SIZE)
+    rows = math.ceil(height / TILE_SIZE)
+
+    first_column = max(0, math.floor(x0 / TILE_SIZE) - margin)
+    last_column = min(columns - 1, math.ceil(x1 / TILE_SIZE) - 1 + margin)
+    first_row = max(0, math.floor(y0 / TILE_SIZE) - margin)
+    last_row = min(rows - 1, math.ceil(y1 / TILE_SIZE) - 1 + margin)
+
+    return [
+        (column, row)
+        for row in range(first_row, last_row + 1)
+        for column in range(first_column, last_column + 1)
+    ]
+
+
+def tile_rect(size: Dimentions, tile: TileIndex) -> tuple[int, int, int, int]:
+    column, row = tile
+    x0 = column * TILE_SIZE
+    y0 = row * TILE_SIZE
+
+    return x0, y0, min(x0 + TILE_SIZE, size[0]), min(y0 + TILE_SIZE, size[1])
+
+
+# * JPEGs are decoded straight at 1/2, 1/4 or 1/8 of the size and large uncompressed
+# * files are sampled from a memory mapping,
+# * so the coarser levels of those never need the full resolution frame
+def decode_level(image_path: Path, level: int) -> Image.Image:
+    with open_image(image_path) as image:
+        orientation = get_orientation(image)
+        raw_size = level_size(image.size, level)
+
+        size = raw_size
+        if orientation in TRANSPOSING_ORIENTATIONS:
+            size = raw_size[1], raw_size[0]
+
+        if level > 0:
+            sampled = decode_mapped_file(image_path, size, 'fast')
+            if sampled is not None:
+                if sampled.size == size:
+                    return sampled
+
+                return sampled.resize(size, Image.Resampling.BILINEAR)
+
+            image.draft(image.mode, raw_size)
+
+        image.load()
+        if image.size != raw_size:
+            image = image.resize(raw_size, Image.Resampling.BILINEAR, reducing_gap=2.0)
+
+        # * exif_transpose copies even the images which are not rotated, the ones
+        # * which are lose the tag, so the tiles cut out of them are not rotated again
+        return image if orientation == 1 else ImageOps.exif_transpose(image)
+
+
+# * Tiles are cut in the order they are given, so the first ones can be shown
+# * while the rest are still being cut
+def cut_tiles(
+    level_image: Image.Image,
+    tiles: Iterable[TileIndex]
+) -> Iterator[tuple[TileIndex, QImage]]:
+    size = level_image.size
+
+    for tile in tiles:
+        cropped = level_image.crop(tile_rect(size, tile))
+        yield tile, to_pixmap_format(pil2qimage(cropped))
+
+
+def decode_tiles(
+    image_path: Path,
+    level: int,
+    tiles: Iterable[TileIndex]
+) -> Iterator[tuple[TileIndex, QImage]]:
+    return cut_tiles(decode_level(image_path, level), tiles)
+
+
+def _read_tiles(
+    regions: 'MappedRegions',
+    size: Dimentions,
+    tiles: Iterable[TileIndex]
+) -> Iterator[tuple[TileIndex, QImage]]:
+    with regions:
+        for tile in tiles:
+            region = regions.read(tile_rect(size, tile))
+            yield tile, to_pixmap_format(pil2qimage(region))
+
+
+# * Tiles of the full resolution of large uncompressed files, read straight out of
+# * a memory mapping without decoding the rest of the frame.
+# * None when the file is not stored that way.
+def read_mapped_tiles(
+    image_path: Path,
+    tiles: Iterable[TileIndex]
+) -> Iterator[tuple[TileIndex, QImage]] | None:
+    if not is_mappable(image_path):
+        return None
+
+    # * Pulls in numpy, like the mapped decode of the smaller levels
+    from image_organizer.image_utils.mapped_decode import MappedRegions
+
+    regions = MappedRegions(image_path)
+    if regions.layout is None or not regions.readable:
+        regions.close()
+        return None
+
+    return _read_tiles(regions, (regions.layout.width, regions.layout.height), tiles)
+
+
+# * Tiles of the level which are not in the given ones,
+# * the closest to the center of them first
+def surrounding_tiles(size: Dimentions, tiles: list[TileIndex]) -> list[TileIndex]:
+    if len(tiles) == 0:
+        return []
+
+    center_column = sum(column for column, _ in tiles) / len(tiles)
+    center_row = sum(row for _, row in tiles) / len(tiles)
+    given = set(tiles)
+    level_tiles = tiles_in_rect(size, (0, 0, size[0], size[1]))
+
+    return sorted(
+        (tile for tile in level_tiles if tile not in given),
+        key=lambda tile: (tile[0] - center_column) ** 2 + (tile[1] - center_row) ** 2
+    )
@@ -0,0 +1,70 @@
+import math
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+from PIL import Image
+
+
+def _stretch(
+    pixels: npt.NDArray[Any],
+    low: float,
+    high: float
+) -> npt.NDArray[np.uint8]:
+    scale = 255 / (high - low) if high > low else 0.0
+
+    # * A single float32 buffer, updated in place,
+    # * is the bulk of the work for 16 bit and float images
+    scaled = pixels.astype(np.float32)
+    scaled *= np.float32(scale)
+    scaled -= np.float32(low * scale - 0.5)
+    np.clip(scaled, 0, 255, out=scaled)
+
+    return scaled.astype(np.uint8)
+
+
+# * Pixels keep their black point
+# * and are scaled down by the bit depth their values actually use,
+# * so 10, 12 and 14 bit data stored in 16 bits does not show up almost black
+def _map_integers(pixels: npt.NDArray[Any]) -> npt.NDArray[np.uint8]:
+    low = int(pixels.min())
+    high = int(pixels.max())
+
+    if low < 0:
+        return _stretch(pixels, low, high)
+
+    shift = max(8, high.bit_length()) - 8
+    if shift == 0:
+        return pixels.astype(np.uint8)
+
+    return (pixels >> shift).astype(np.uint8)
+
+
+# * Floats between 0 and 1 are scaled as they are,
+# * any other range is stretched between its extremes
+def _map_floats(pixels: npt.NDArray[Any]) -> npt.NDArray[np.uint8]:
+    low = float(pixels.min())
+    high = float(pixels.max())
+
+    if not math.isfinite(low) or not math.isfinite(high):
+        pixels = np.nan_to_num(pixels, nan=0.0, posinf=0.0, neginf=0.0)
+        low = float(pixels.min())
+        high = float(pixels.max())
+
+    if low >= 0 and high <= 1:
+        low, high = 0.0, 1.0
+
+    return _stretch(pixels, low, high)
+
+
+def tone_map(pixels: npt.NDArray[Any]) -> npt.NDArray[np.uint8]:
+    if pixels.dtype.kind == 'f':
+        return _map_floats(pixels)
+
+    return _map_integers(pixels)
+
+
+# * 8 bit grayscale of I;16, I and F images,
+# * what PIL's own convert does to them is clip at 255
+def grayscale_bytes(image: Image.Image) -> bytes:
+    return tone_map(np.asarray(image)).tobytes()
@@ -0,0 +1,127 @@
+import threading
+from collections import deque
+from collections.abc import Generator
+from contextlib import contextmanager
+from pathlib import Path
+from time import perf_counter_ns
+
+from image_organizer.instrumentation.trace import TraceRecorder
+
+# * How many of the latest durations of every stage the percentiles are computed over
+ROLLING_WINDOW = 1000
+PERCENTILES = (50, 95, 99)
+
+# * In the order the stages happen in, the rest are shown after them
+PIPELINE_STAGES = (
+    'load_image',
+    'disk_cache_get',
+    'open',
+    'decode',
+    'resize',
+    'exif_transpose',
+    'convert',
+    'tobytes',
+    'to_pixmap_format',
+    'disk_cache_put',
+    'from_image',
+    'cache_get',
+    'cache_insert',
+    'preview',
+    'first_pixel',
+    'full_image'
+)
+
+
+def percentile(sorted_values: list[float], percent: int) -> float:
+    # * Nearest rank, so the result is always one of the measured values
+    rank = max(0, -(-len(sorted_values) * percent // 100) - 1)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+class StageStats:
+    def __init__(self, stage: str, durations: list[float]) -> None:
+        self.stage = stage
+        self.count = len(durations)
+
+        ordered = sorted(durations)
+        self.percentiles_ms = tuple(
+            percentile(ordered, percent) for percent in PERCENTILES
+        )
+
+
+# * Disabled until something asks for the timings,
+# * so measuring costs a single check otherwise.
+# * Stages are timed on whichever thread they run on, the loader threads included.
+class StageTimings:
+    def __init__(self, window: int = ROLLING_WINDOW) -> None:
+        self.enabled = False
+        self.trace: TraceRecorder | None = None
+
+        self._window = window
+        self._durations: dict[str, deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def enable(self, trace: TraceRecorder | None = None) -> None:
+        self.enabled = True
+        if trace is not None:
+            self.trace = trace
+
+    def record(
+        self,
+        stage: str,
+        start_ns: int,
+        end_ns: int,
+        image_path: Path | None = None
+    ) -> None:
+        with self._lock:
+            durations = self._durations.get(stage)
+            if durations is None:
+                durations = self._durations[stage] = deque(maxlen=self._window)
+
+            durations.append((end_ns - start_ns) / 1_000_000)
+
+        if self.trace is not None:
+            args = None if image_path is None else {'path': str(image_path)}
+            self.trace.add(stage, start_ns, end_ns, args)
+
+    @contextmanager
+    def measure(
+        self,
+        stage: str,
+        image_path: Path | None = None
+    ) -> Generator[None, None, None]:
+        if not self.enabled:
+            yield
+            return
+
+        start_ns = perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.record(stage, start_ns, perf_counter_ns(), image_path)
+
+    def durations(self, stage: str) -> list[float]:
+        with self._lock:
+            return list(self._durations.get(stage, ()))
+
+    def stats(self) -> list[StageStats]:
+        with self._lock:
+            snapshot = {
+                stage: list(durations) for stage, durations in self._durations.items()
+            }
+
+        ordered = [stage for stage in PIPELINE_STAGES if stage in snapshot]
+        ordered.extend(
+            sorted(stage for stage in snapshot if stage not in PIPELINE_STAGES)
+        )
+
+        return [StageStats(stage, snapshot[stage]) for stage in ordered]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._durations.clear()
+
+
+# * Shared by the whole process, the image pipeline
+# * is spread over too many places to pass it around
+timings = StageTimings()
@@ -0,0 +1,94 @@
+import json
+import os
+import threading
+from pathlib import Path
+from time import perf_counter_ns
+from typing import Any
+
+# * Roughly 200 bytes each in memory, a long session
+# * is cut off instead of growing without bounds
+MAX_TRACE_EVENTS = 1_000_000
+
+TraceEvent = dict[str, Any]
+
+
+# * Collects complete events in the Chrome trace event format,
+# * the dump can be opened in chrome://tracing or https://ui.perfetto.dev
+class TraceRecorder:
+    def __init__(self, max_events: int = MAX_TRACE_EVENTS) -> None:
+        self.max_events = max_events
+        self.dropped = 0
+
+        self._start_ns = perf_counter_ns()
+        self._pid = os.getpid()
+        self._events: list[TraceEvent] = []
+        self._thread_names: dict[int, str] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def add(
+        self,
+        name: str,
+        start_ns: int,
+        end_ns: int,
+        args: dict[str, str] | None = None
+    ) -> None:
+        thread_id = threading.get_ident()
+
+        event: TraceEvent = {
+            'name': name,
+            'cat': 'pipeline',
+            'ph': 'X',
+            'ts': (start_ns - self._start_ns) / 1000,
+            'dur': (end_ns - start_ns) / 1000,
+            'pid': self._pid,
+            'tid': thread_id
+        }
+
+        if args is not None:
+            event['args'] = args
+
+        with self._lock:
+            if len(self._events) >= self.max_events:
+                self.dropped += 1
+                return
+
+            if thread_id not in self._thread_names:
+                self._thread_names[thread_id] = threading.current_thread().name
+
+            self._events.append(event)
+
+    def _metadata_events(self) -> list[TraceEvent]:
+        events: list[TraceEvent] = [{
+            'name': 'process_name',
+            'ph': 'M',
+            'pid': self._pid,
+            'args': {'name': 'image-organizer'}
+        }]
+
+        for thread_id, thread_name in self._thread_names.items():
+            events.append({
+                'name': 'thread_name',
+                'ph': 'M',
+                'pid': self._pid,
+                'tid': thread_id,
+                'args': {'name': thread_name}
+            })
+
+        return events
+
+    def dump(self, path: Path) -> None:
+        with self._lock:
+            events = self._metadata_events() + self._events
+
+        trace = {
+            'traceEvents': events,
+            'displayTimeUnit': 'ms',
+            'otherData': {'dropped_events': self.dropped}
+        }
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open('w') as file:
+            json.dump(trace, file)
@@ -1,25 +1,43 @@
 from pathlib import Path
-from shutil import move
 
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtGui import QCloseEvent, QKeySequence, QShortcut
 from PyQt6.QtWidgets import (
     QHBoxLayout,
     QMainWindow,
     QMessageBox,
     QPushButton,
+    QStatusBar,
     QVBoxLayout,
     QWidget,
 )
-from send2trash import send2trash
 
-from image_organizer.image_utils.find_images import find_images
+from image_organizer.catalog.catalog import Catalog, CatalogFilter, SortKey
+from image_organizer.duplicates.hash_store import HashStore
+from image_organizer.file_operations.journal import Journal
+from image_organizer.file_operations.operation_queue import (
+    FileOperation,
+    FileOperationQueue,
+)
+from image_organizer.image_utils.catalog_indexer import CatalogIndexer
+from image_organizer.image_utils.discovery import Patterns
+from image_organizer.image_utils.disk_cache import DiskCache
+from image_organizer.image_utils.folder_watcher import FolderChanges, FolderWatcher
+from image_organizer.image_utils.hash_scanner import HashScanner
+from image_organizer.image_utils.image_scanner import ImageScanner
+from image_organizer.image_utils.load_and_resize import DEFAULT_QUALITY, Quality
+from image_organizer.image_utils.pixmap_cache import DEFAULT_CACHE_LIMIT
+from image_organizer.utils.format_strings import format_strings
 from image_organizer.widgets.folders_list import FoldersList, ForbiddenFoldersFilter
-from image_organizer.widgets.gallery_viewer import GalleryViewer
+from image_organizer.widgets.gallery_viewer import (
+    DEFAULT_PREFETCH_AHEAD,
+    DEFAULT_PREFETCH_BEHIND,
+    GalleryViewer,
+)
 from image_organizer.widgets.my_splitter import MySplitter
 
-# TODO: Implement shortcuts
+# TODO: Shortcuts for moving to a folder, moving to trash and navigating between images
 # TODO: i18n
-# TODO: Reverse the move with ctrl+Z, move to trash confirmation
 # TODO: Refactor to use snake_case https://www.qt.io/blog/qt-for-python-6-released
 
 
@@ -27,25 +45,287 @@ class MainWindow(QMainWindow):
     def __init__(
         self,
         to_move: Path | list[Path],
-        move_to: Path
+        move_to: Path,
+        prefetch_ahead: int = DEFAULT_PREFETCH_AHEAD,
+        prefetch_behind: int = DEFAULT_PREFETCH_BEHIND,
+        quality: Quality = DEFAULT_QUALITY,
+        cache_limit: int = DEFAULT_CACHE_LIMIT,
+        disk_cache: DiskCache | None = None,
+        recursive: bool = False,
+        include: Patterns = (),
+        exclude: Patterns = (),
+        journal: Journal | None = None,
+        find_duplicates: bool = True,
+        hash_store: HashStore | None = None,
+        show_timings: bool = False,
+        catalog: Catalog | None = None,
+        sort_by: SortKey = 'name',
+        catalog_filter: CatalogFilter = CatalogFilter(),
+        watch: bool = True
     ):
         super().__init__()
 
         self.to_move = to_move
         self.move_to = move_to
+        self.prefetch_ahead = prefetch_ahead
+        self.prefetch_behind = prefetch_behind
+        self.quality: Quality = quality
+        self.cache_limit = cache_limit
+        self.disk_cache = disk_cache
+        self.recursive = recursive
+        self.include = include
+        self.exclude = exclude
+        self.journal = journal
+        self.find_duplicates = find_duplicates
+        self.hash_store = hash_store
+        self.catalog = catalog
+        self.sort_by: SortKey = sort_by
+        self.catalog_filter = catalog_filter
+        self.watch = watch
+
+        sources = [to_move] if isinstance(to_move, Path) else to_move
+        self.source_folders = [source for source in sources if source.is_dir()]
+        self.source_globs = [str(source) for source in sources if not source.is_dir()]
+
+        # * Sources are scanned in the background,
+        # * images are added to the gallery as they are found
+        self.scanner: ImageScanner | None = None
+        self.hash_scanner: HashScanner | None = None
+        self.indexer: CatalogIndexer | None = None
+        self.folder_watcher: FolderWatcher | None = None
+        self.image_paths: list[Path] = []
+
+        # * Images found after the scan, waiting for the hash scanner
+        # * or the indexer to be done with the previous ones
+        self._unhashed: list[Path] = []
+        self._unindexed: list[Path] = []
+        self._is_reordered = False
+
+        self.operations = FileOperationQueue(journal=journal, parent=self)
+        self.operations.progress.connect(self.operation_progress_handler)
+        self.operations.finished.connect(self.operation_finished_handler)
+        self.operations.failed.connect(self.operation_failed_handler)
 
-        if isinstance(to_move, Path):
-            image_paths = find_images(to_move)
-        else:
-            image_paths = to_move
+        self.gui()
+        self.viewer.show_timings(show_timings)
+
+        # * The window is shown with an empty gallery first,
+        # * nothing is scanned or decoded before that
+        self.viewer.set_scanning(True)
+        QTimer.singleShot(0, self.start)
+
+    def start(self) -> None:
+        # * Operations interrupted by a crash are finished
+        # * or rolled back before the sources are scanned
+        recovered: list[str] = []
+        if self.journal is not None:
+            recovered = self.journal.recover()
+
+        if self.journal is not None:
+            self.viewer.current_changed.connect(self.current_changed_handler)
+
+            if self.journal.position is not None:
+                self.viewer.resume_at(
+                    self.journal.position,
+                    self.journal.position_index
+                )
+
+        self.start_scanning()
+
+        if len(recovered) > 0:
+            self._status_bar().showMessage(
+                f'Recovered {len(recovered)} interrupted file operations'
+            )
+
+    def start_scanning(self) -> None:
+        self.scanner = ImageScanner(
+            self.source_folders,
+            self.source_globs,
+            self.recursive,
+            self.include,
+            self.exclude,
+            self.catalog,
+            self
+        )
 
-        self.image_paths = image_paths
+        self.scanner.found.connect(self.viewer.add_images)
+        self.scanner.scanned.connect(self.scanned_handler)
 
-        self.gui()
+        self.viewer.set_scanning(True)
+        self.scanner.start()
+
+    def scanned_handler(self, _total: int) -> None:
+        self.viewer.set_scanning(False)
+
+        image_paths = list(self.viewer.image_paths)
+
+        if self.catalog is not None:
+            self.index(image_paths)
+
+        if self.find_duplicates:
+            self.hash(image_paths)
+
+        if self.watch and len(self.source_folders) > 0:
+            self.start_watching()
+
+    # * Only the source folders are watched,
+    # * images matched by globs stay as they were found
+    def start_watching(self) -> None:
+        self.folder_watcher = FolderWatcher(
+            self.source_folders,
+            self.recursive,
+            self.include,
+            self.exclude,
+            self.catalog,
+            self
+        )
+
+        self.folder_watcher.changed.connect(self.folder_changes_handler)
+        self.folder_watcher.start(set(self.viewer.image_paths))
+
+    def folder_changes_handler(self, changes: FolderChanges) -> None:
+        self.viewer.remove_images(changes.deleted)
+        self.viewer.rename_images(changes.renamed)
+        self.viewer.refresh_images(changes.modified)
+        added = self.viewer.merge_images(changes.created)
+
+        if self.catalog is not None:
+            renamed = [new_path for _, new_path in changes.renamed]
+            self.index([*added, *changes.modified, *renamed])
+
+        if self.find_duplicates:
+            self.hash([*added, *changes.modified])
+
+        if len(added) > 0:
+            self._show_pending(f'Found {len(added)} new images')
+
+    def index(self, image_paths: list[Path]) -> None:
+        self._unindexed.extend(image_paths)
+
+        if self.indexer is None and len(self._unindexed) > 0:
+            self.start_indexing()
+
+    # * Only the images which are new or have changed since the last session are read
+    def start_indexing(self) -> None:
+        if self.catalog is None:
+            return
+
+        self.indexer = CatalogIndexer(self._unindexed, self.catalog, parent=self)
+        self.indexer.indexed.connect(self.indexed_handler)
+        self.indexer.finished.connect(self.indexing_finished_handler)
+        self.indexer.start()
+
+        self._unindexed = []
+
+    def indexed_handler(self, total: int) -> None:
+        if total > 0:
+            self._status_bar().showMessage(
+                f'Reading the metadata of the images: {total} done'
+            )
+
+    # * The order is only changed once, when all of the metadata is known.
+    # * Images which turn up later are added at the end,
+    # * unless the filter leaves them out.
+    def indexing_finished_handler(self) -> None:
+        if self.catalog is None or self.indexer is None:
+            return
+
+        if self.indexer.isInterruptionRequested():
+            return
+
+        indexed = self.indexer.image_paths
+        self.indexer = None
+        self._show_pending()
+
+        if not self._is_reordered:
+            self._is_reordered = True
+
+            if self.sort_by != 'name' or not self.catalog_filter.is_empty:
+                self.viewer.reorder(self.catalog.ordered(
+                    list(self.viewer.image_paths),
+                    self.sort_by,
+                    self.catalog_filter
+                ))
+        elif not self.catalog_filter.is_empty:
+            kept = set(
+                self.catalog.ordered(indexed, catalog_filter=self.catalog_filter)
+            )
+            self.viewer.remove_images(
+                image_path for image_path in indexed if image_path not in kept
+            )
+
+        if len(self._unindexed) > 0:
+            self.start_indexing()
+
+    def hash(self, image_paths: list[Path]) -> None:
+        self._unhashed.extend(image_paths)
+
+        if self.hash_scanner is None and len(self._unhashed) > 0:
+            self.start_hashing()
+
+    # * Duplicates are looked for once all of the images are known,
+    # * so every one is compared with all the others
+    def start_hashing(self) -> None:
+        self.hash_scanner = HashScanner(
+            self._unhashed,
+            self.hash_store,
+            catalog=self.catalog,
+            parent=self
+        )
+
+        self.hash_scanner.hashed.connect(self.viewer.add_hashes)
+        self.hash_scanner.finished.connect(self.hashing_finished_handler)
+        self.hash_scanner.start()
+
+        self._unhashed = []
+
+    def hashing_finished_handler(self) -> None:
+        if self.hash_scanner is None or self.hash_scanner.isInterruptionRequested():
+            return
+
+        self.hash_scanner = None
+
+        if len(self._unhashed) > 0:
+            self.start_hashing()
+
+    def closeEvent(self, a0: QCloseEvent | None) -> None:
+        if self.folder_watcher is not None:
+            self.folder_watcher.stop()
+
+        if self.scanner is not None:
+            self.scanner.stop()
+
+        if self.hash_scanner is not None:
+            self.hash_scanner.stop()
+
+        if self.indexer is not None:
+            self.indexer.stop()
+
+        # * Files which are still being moved should not be left behind half way
+        if self.operations.pending_count > 0:
+            pending = self.operations.pending_count
+            self._status_bar().showMessage(
+                f'Waiting for {pending} file operations to finish...'
+            )
+            self.operations.wait_for_done()
+
+        if self.journal is not None:
+            self.journal.close()
+
+        if self.catalog is not None:
+            self.catalog.close()
+
+        super().closeEvent(a0)
 
     def setup_buttons(self) -> None:
         self.buttons_layout = QVBoxLayout()
 
+        self.operation_error = QMessageBox()
+        self.operation_error.setIcon(QMessageBox.Icon.Critical)
+        self.operation_error.setStandardButtons(
+            QMessageBox.StandardButton.Retry | QMessageBox.StandardButton.Discard
+        )
+
         self.trash_confirmation = QMessageBox()
         self.trash_confirmation.setIcon(QMessageBox.Icon.Warning)
         self.trash_confirmation.setStandardButtons(
@@ -72,6 +352,15 @@ class MainWindow(QMainWindow):
         self.buttons_layout.addWidget(trash_button)
         self.buttons_layout.addLayout(movement_buttons_layout)
 
+        undo_shortcut = QShortcut(QKeySequence.StandardKey.Undo, self)
+        undo_shortcut.activated.connect(self.undo_handler)
+
+        duplicate_shortcut = QShortcut(QKeySequence('Ctrl+D'), self)
+        duplicate_shortcut.activated.connect(self.next_duplicate_handler)
+
+        timings_shortcut = QShortcut(QKeySequence('F12'), self)
+        timings_shortcut.activated.connect(self.toggle_timings_handler)
+
     def gui(self) -> None:
         self.setWindowTitle('Image Organizer')
 
@@ -81,9 +370,9 @@ class MainWindow(QMainWindow):
         self.splitter.setStretchFactor(2, 2)
 
         forbidden_folders = None
-        if isinstance(self.to_move, Path) and self.to_move.is_dir():
+        if len(self.source_folders) > 0:
             forbidden_folders: ForbiddenFoldersFilter = [(
-                self.to_move,
+                self.source_folders,
                 'you can\'t select the folder you have chosen as the source folder for your images'
             )]
 
@@ -97,7 +386,15 @@ class MainWindow(QMainWindow):
         self.splitter.addWidget(self.folders_list)
 
         self.main_layout = QVBoxLayout()
-        self.viewer = GalleryViewer(self.image_paths, (1280, 720))
+        self.viewer = GalleryViewer(
+            self.image_paths,
+            None,
+            self.prefetch_ahead,
+            self.prefetch_behind,
+            self.quality,
+            self.cache_limit,
+            self.disk_cache
+        )
 
         self.main_layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.main_layout.addWidget(self.viewer)
@@ -125,11 +422,62 @@ class MainWindow(QMainWindow):
     def prev_handler(self) -> None:
         self.viewer.prev()
 
-    def move_handler(self) -> None:
-        move(self.viewer.current_image_path, self.move_to)
+    def toggle_timings_handler(self) -> None:
+        self.viewer.show_timings(not self.viewer.is_showing_timings)
+
+    def next_duplicate_handler(self) -> None:
+        if not self.viewer.next_duplicate():
+            self._show_pending('No similar images found')
+
+    def _enqueue(self, operation: FileOperation) -> None:
+        # * The gallery moves on right away,
+        # * the view is rolled back if the operation fails
         self.viewer.clear_and_switch()
+        self.operations.submit(operation)
+
+        self._show_pending()
+
+    # * QMainWindow creates the status bar the first time it is asked for
+    def _status_bar(self) -> QStatusBar:
+        status_bar = self.statusBar()
+        assert status_bar is not None
+
+        return status_bar
+
+    def _show_pending(self, message: str | None = None) -> None:
+        pending = self.operations.pending_count
+        if pending == 0 and message is None:
+            self._status_bar().clearMessage()
+            return
+
+        pending_message = None
+        if pending > 0:
+            pending_message = f'({pending} file operations pending)'
+
+        self._status_bar().showMessage(format_strings((message, pending_message)))
+
+    def move_handler(self) -> None:
+        if self.viewer.is_empty:
+            return
+
+        # * The folder might have been removed since it was selected
+        if not self.move_to.is_dir():
+            self._show_pending(f'{self.move_to} does not exist anymore')
+            return
+
+        self._enqueue(
+            FileOperation(
+                'move',
+                self.viewer.current_image_path,
+                self.move_to,
+                self.viewer.current_index
+            )
+        )
 
     def trash_handler(self) -> None:
+        if self.viewer.is_empty:
+            return
+
         to_trash = self.viewer.current_image_path
 
         self.trash_confirmation.setText(
@@ -140,5 +488,80 @@ class MainWindow(QMainWindow):
         if selected != QMessageBox.StandardButton.Yes:
             return
 
-        send2trash(to_trash)
-        self.viewer.clear_and_switch()
+        self._enqueue(
+            FileOperation('trash', to_trash, index=self.viewer.current_index)
+        )
+
+    def undo_handler(self) -> None:
+        if self.journal is None:
+            self._show_pending('Undo is not available without a journal')
+            return
+
+        entry = self.journal.pop_undo()
+        if entry is None:
+            self._show_pending('Nothing to undo')
+            return
+
+        self.operations.submit(
+            FileOperation('restore', entry.source, entry.target, entry.index, entry)
+        )
+
+        self._show_pending()
+
+    def current_changed_handler(self, image_path: Path, index: int) -> None:
+        # * The saved position is kept until the scanner
+        # * finds the image the session has stopped at
+        if self.journal is None or self.viewer.is_resuming:
+            return
+
+        self.journal.record_position(image_path, index)
+
+    def operation_progress_handler(
+        self,
+        operation: FileOperation,
+        done: int,
+        total: int
+    ) -> None:
+        percentage = 100 if total == 0 else int(done / total * 100)
+        self._show_pending(f'{operation.description}: {percentage}%')
+
+    def operation_finished_handler(self, operation: FileOperation) -> None:
+        self._show_pending()
+
+        if operation.kind == 'restore':
+            self.viewer.restore_image(operation.source, operation.index)
+
+        if self.catalog is None:
+            return
+
+        if operation.kind == 'restore':
+            self.catalog.clear_decision(operation.source)
+        else:
+            self.catalog.set_decision(
+                operation.source,
+                operation.kind,
+                operation.destination
+            )
+
+    def operation_failed_handler(self, operation: FileOperation, message: str) -> None:
+        self._show_pending()
+
+        self.operation_error.setText(
+            f'{operation.description} has failed: {message}'
+        )
+
+        selected = self.operation_error.exec()
+        if selected == QMessageBox.StandardButton.Retry:
+            self.operations.retry(operation)
+            self._show_pending()
+
+            return
+
+        if operation.kind == 'restore':
+            # * The operation can still be undone later on
+            if self.journal is not None and operation.undo_of is not None:
+                self.journal.push_undo(operation.undo_of)
+
+            return
+
+        self.viewer.restore_image(operation.source, operation.index)
@@ -0,0 +1,14 @@
+import os
+from pathlib import Path
+
+APP_DIR_NAME = 'image-organizer'
+
+
+def app_cache_dir() -> Path:
+    base = os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache'
+    return Path(base) / APP_DIR_NAME
+
+
+def app_state_dir() -> Path:
+    base = os.environ.get('XDG_STATE_HOME') or Path.home() / '.local' / 'state'
+    return Path(base) / APP_DIR_NAME
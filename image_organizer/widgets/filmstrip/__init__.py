@@ -0,0 +1,224 @@
+from PyQt6.QtCore import (
+    QItemSelection,
+    QItemSelectionModel,
+    QModelIndex,
+    QPoint,
+    QRect,
+    QSize,
+    Qt,
+    QTimer,
+    pyqtSignal,
+)
+from PyQt6.QtGui import QPainter, QPaintEvent, QRegion
+from PyQt6.QtWidgets import (
+    QAbstractItemView,
+    QFrame,
+    QScrollBar,
+    QStyle,
+    QStyleOptionViewItem,
+    QWidget,
+)
+
+from image_organizer.image_utils.thumbnails import THUMBNAIL_DIMENSIONS
+from image_organizer.widgets.filmstrip.thumbnail_model import ThumbnailModel
+
+# * Requests of rows scrolled out of view are dropped once scrolling settles down
+SCROLL_SETTLE_MS = 50
+ITEM_SPACING = 4
+
+
+# * Every item has the same size, so the position of a row is computed
+# * instead of laid out. Unlike QListView, which lays out all the rows
+# * again on every insert, adding images costs nothing however many
+# * there already are, and painting only ever touches the visible rows.
+class Filmstrip(QAbstractItemView):
+    image_selected = pyqtSignal(int)
+
+    def __init__(self, model: ThumbnailModel, parent: QWidget | None = None) -> None:
+        super().__init__(parent)
+
+        width, height = THUMBNAIL_DIMENSIONS
+        self._item_size = QSize(width, height)
+        self._stride = width + ITEM_SPACING
+
+        self.setModel(model)
+        self._thumbnails = model
+
+        self.setIconSize(self._item_size)
+        self.setHorizontalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+        self.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.setFrameShape(QFrame.Shape.NoFrame)
+
+        # * Keyboard input stays with the buttons and shortcuts of the main window
+        self.setFocusPolicy(Qt.FocusPolicy.NoFocus)
+
+        scroll_bar_height = self._scroll_bar().sizeHint().height()
+        self.setFixedHeight(height + ITEM_SPACING * 2 + scroll_bar_height)
+
+        self._scroll_timer = QTimer(self)
+        self._scroll_timer.setSingleShot(True)
+        self._scroll_timer.setInterval(SCROLL_SETTLE_MS)
+        self._scroll_timer.timeout.connect(self._scroll_settled_handler)
+
+        model.rowsInserted.connect(self._rows_changed_handler)
+        model.rowsRemoved.connect(self._rows_changed_handler)
+        model.modelReset.connect(self._rows_changed_handler)
+
+        self.clicked.connect(self._clicked_handler)
+
+    def set_current_row(self, row: int) -> None:
+        index = self._thumbnails.index(row)
+
+        selection_model = self.selectionModel()
+        if selection_model is not None:
+            selection_model.setCurrentIndex(
+                index,
+                QItemSelectionModel.SelectionFlag.ClearAndSelect
+            )
+
+        self.scrollTo(index, QAbstractItemView.ScrollHint.PositionAtCenter)
+
+    def visible_rows(self) -> range:
+        offset = self.horizontalOffset()
+        first = offset // self._stride
+        last = (offset + self._viewport().width()) // self._stride
+
+        return range(first, min(last + 1, self._thumbnails.rowCount()))
+
+    def visualRect(self, index: QModelIndex) -> QRect:
+        if not index.isValid():
+            return QRect()
+
+        left = index.row() * self._stride + ITEM_SPACING - self.horizontalOffset()
+
+        return QRect(QPoint(left, ITEM_SPACING), self._item_size)
+
+    def scrollTo(
+        self,
+        index: QModelIndex,
+        hint: QAbstractItemView.ScrollHint = QAbstractItemView.ScrollHint.EnsureVisible
+    ) -> None:
+        if not index.isValid():
+            return
+
+        scroll_bar = self._scroll_bar()
+        left = index.row() * self._stride
+        visible_width = self._viewport().width()
+
+        if hint == QAbstractItemView.ScrollHint.PositionAtCenter:
+            scroll_bar.setValue(left - (visible_width - self._stride) // 2)
+        elif hint == QAbstractItemView.ScrollHint.PositionAtTop:
+            scroll_bar.setValue(left)
+        elif hint == QAbstractItemView.ScrollHint.PositionAtBottom:
+            scroll_bar.setValue(left + self._stride - visible_width)
+        elif left < scroll_bar.value():
+            scroll_bar.setValue(left)
+        elif left + self._stride > scroll_bar.value() + visible_width:
+            scroll_bar.setValue(left + self._stride - visible_width)
+
+    def indexAt(self, p: QPoint) -> QModelIndex:
+        row = (p.x() + self.horizontalOffset()) // self._stride
+        if p.x() < 0 or row >= self._thumbnails.rowCount():
+            return QModelIndex()
+
+        return self._thumbnails.index(row)
+
+    def moveCursor(
+        self,
+        cursorAction: QAbstractItemView.CursorAction, # noqa: N803
+        modifiers: Qt.KeyboardModifier
+    ) -> QModelIndex:
+        return self.currentIndex()
+
+    def horizontalOffset(self) -> int:
+        return self._scroll_bar().value()
+
+    def verticalOffset(self) -> int:
+        return 0
+
+    def isIndexHidden(self, index: QModelIndex) -> bool:
+        return False
+
+    def setSelection(
+        self,
+        rect: QRect,
+        command: QItemSelectionModel.SelectionFlag
+    ) -> None:
+        selection_model = self.selectionModel()
+        index = self.indexAt(rect.center())
+
+        if selection_model is not None and index.isValid():
+            selection_model.select(index, command)
+
+    def visualRegionForSelection(self, selection: QItemSelection) -> QRegion:
+        region = QRegion()
+        for index in selection.indexes():
+            region += self.visualRect(index)
+
+        return region
+
+    def updateGeometries(self) -> None:
+        content_width = self._thumbnails.rowCount() * self._stride + ITEM_SPACING
+        visible_width = self._viewport().width()
+
+        scroll_bar = self._scroll_bar()
+        scroll_bar.setRange(0, max(content_width - visible_width, 0))
+        scroll_bar.setPageStep(visible_width)
+        scroll_bar.setSingleStep(self._stride // 4)
+
+        super().updateGeometries()
+
+    def paintEvent(self, a0: QPaintEvent | None) -> None:
+        delegate = self.itemDelegate()
+        selection_model = self.selectionModel()
+        if delegate is None or selection_model is None:
+            return
+
+        painter = QPainter(self._viewport())
+
+        for row in self.visible_rows():
+            index = self._thumbnails.index(row)
+
+            option = QStyleOptionViewItem()
+            self.initViewItemOption(option)
+            option.rect = self.visualRect(index)
+
+            # * Centers thumbnails which do not fill the whole box, like portrait ones
+            option.decorationPosition = QStyleOptionViewItem.Position.Top
+
+            if selection_model.isSelected(index):
+                option.state |= QStyle.StateFlag.State_Selected
+
+            delegate.paint(painter, option, index)
+
+        painter.end()
+
+    def scrollContentsBy(self, dx: int, dy: int) -> None:
+        super().scrollContentsBy(dx, dy)
+        self._scroll_timer.start()
+
+    # * Both are created with the view, only the stubs say they might be missing
+    def _scroll_bar(self) -> QScrollBar:
+        scroll_bar = self.horizontalScrollBar()
+        assert scroll_bar is not None
+
+        return scroll_bar
+
+    def _viewport(self) -> QWidget:
+        viewport = self.viewport()
+        assert viewport is not None
+
+        return viewport
+
+    def _rows_changed_handler(self) -> None:
+        self.updateGeometries()
+        self._viewport().update()
+
+    def _scroll_settled_handler(self) -> None:
+        self._thumbnails.forget_requests()
+        self._viewport().update()
+
+    def _clicked_handler(self, index: QModelIndex) -> None:
+        self.image_selected.emit(index.row())
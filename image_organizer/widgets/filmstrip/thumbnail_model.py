@@ -0,0 +1,177 @@
+from collections.abc import Generator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+from PyQt6.QtCore import QAbstractListModel, QModelIndex, QObject, Qt
+from PyQt6.QtGui import QColor, QImage, QPixmap
+
+from image_organizer.image_utils.disk_cache import DiskCache
+from image_organizer.image_utils.image_loader import ImageLoader
+from image_organizer.image_utils.load_and_resize import Dimentions
+from image_organizer.image_utils.pixmap_cache import PixmapCache
+from image_organizer.image_utils.thumbnails import THUMBNAIL_DIMENSIONS, load_thumbnail
+
+DEFAULT_THUMBNAIL_CACHE_LIMIT = 64 * 1024 ** 2 # 64MB
+THUMBNAIL_THREADS = 2
+
+
+# * Rows are the paths of the gallery,
+# * thumbnails are only decoded once a view asks for them
+class ThumbnailModel(QAbstractListModel):
+    def __init__(
+        self,
+        image_paths: list[Path],
+        disk_cache: DiskCache | None = None,
+        cache_limit: int = DEFAULT_THUMBNAIL_CACHE_LIMIT,
+        parent: QObject | None = None
+    ) -> None:
+        super().__init__(parent)
+
+        # * Shared with the gallery, which changes it through inserting and removing
+        self.image_paths = image_paths
+
+        self._cache: PixmapCache[Path] = PixmapCache(cache_limit)
+        self._failed: set[Path] = set()
+        self._requested_rows: dict[Path, int] = {}
+
+        self._loader = ImageLoader(
+            THUMBNAIL_DIMENSIONS,
+            disk_cache=disk_cache,
+            max_threads=THUMBNAIL_THREADS,
+            load_function=load_thumbnail,
+            parent=self
+        )
+        self._loader.loaded.connect(self._loaded_handler)
+        self._loader.failed.connect(self._failed_handler)
+
+        width, height = THUMBNAIL_DIMENSIONS
+        self._placeholder = QPixmap(width, height)
+        self._placeholder.fill(QColor(50, 50, 50))
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+
+        return len(self.image_paths)
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        row = index.row()
+        if not index.isValid() or row >= len(self.image_paths):
+            return None
+
+        image_path = self.image_paths[row]
+
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return image_path.name
+
+        if role != Qt.ItemDataRole.DecorationRole:
+            return None
+
+        pixmap = self._cache.get(image_path)
+        if pixmap is not None:
+            return pixmap
+
+        if image_path not in self._failed:
+            self._requested_rows[image_path] = row
+            self._loader.request(image_path)
+
+        return self._placeholder
+
+    # * Only what is already in memory, without requesting anything
+    def cached(self, image_path: Path) -> QPixmap | None:
+        return self._cache.get(image_path)
+
+    # * The file behind the path has changed,
+    # * its thumbnail is decoded again once it is painted
+    def forget(self, image_path: Path) -> None:
+        self._cache.delete(image_path)
+        self._failed.discard(image_path)
+
+    def rename(self, image_path: Path, new_path: Path) -> None:
+        pixmap = self._cache.pop(image_path)
+        if pixmap is not None:
+            self._cache.insert(new_path, pixmap)
+
+        if image_path in self._failed:
+            self._failed.discard(image_path)
+            self._failed.add(new_path)
+
+    # * Emitted for rows whose path or file has changed
+    def refresh(self, row: int) -> None:
+        index = self.index(row)
+        self.dataChanged.emit(
+            index,
+            index,
+            [Qt.ItemDataRole.DecorationRole, Qt.ItemDataRole.ToolTipRole]
+        )
+
+    # * Drops the requests of rows which have been scrolled out of view,
+    # * the visible ones are requested again as soon as they are painted
+    def forget_requests(self) -> None:
+        self._loader.advance_generation()
+        self._loader.cancel_stale()
+        self._requested_rows.clear()
+
+    @contextmanager
+    def inserting(self, first: int, count: int) -> Generator[None, None, None]:
+        if count <= 0:
+            yield
+            return
+
+        self.beginInsertRows(QModelIndex(), first, first + count - 1)
+        try:
+            yield
+        finally:
+            self.endInsertRows()
+
+    @contextmanager
+    def removing(self, first: int, count: int) -> Generator[None, None, None]:
+        if count <= 0:
+            yield
+            return
+
+        self.beginRemoveRows(QModelIndex(), first, first + count - 1)
+        try:
+            yield
+        finally:
+            self.endRemoveRows()
+
+    @contextmanager
+    def resetting(self) -> Generator[None, None, None]:
+        self.beginResetModel()
+        try:
+            yield
+        finally:
+            self._requested_rows.clear()
+            self.endResetModel()
+
+    def _row_of(self, image_path: Path) -> int | None:
+        row = self._requested_rows.pop(image_path, None)
+        if row is not None and row < len(self.image_paths):
+            if self.image_paths[row] == image_path:
+                return row
+
+        # * Rows have moved since the request,
+        # * which only happens when images are moved away
+        try:
+            return self.image_paths.index(image_path)
+        except ValueError:
+            return None
+
+    def _loaded_handler(
+        self,
+        image_path: Path,
+        image: QImage,
+        _max_dimensions: Dimentions
+    ) -> None:
+        self._cache.insert(image_path, QPixmap.fromImage(image))
+
+        row = self._row_of(image_path)
+        if row is not None:
+            index = self.index(row)
+            self.dataChanged.emit(index, index, [Qt.ItemDataRole.DecorationRole])
+
+    def _failed_handler(self, image_path: Path) -> None:
+        self._failed.add(image_path)
+        self._requested_rows.pop(image_path, None)
@@ -2,7 +2,7 @@ import os
 from pathlib import Path
 from typing import Literal, final
 
-from PyQt6.QtCore import Qt, pyqtSignal
+from PyQt6.QtCore import QFileSystemWatcher, Qt, QTimer, pyqtSignal
 from PyQt6.QtWidgets import (
     QFileDialog,
     QHBoxLayout,
@@ -12,8 +12,12 @@ from PyQt6.QtWidgets import (
     QWidget,
 )
 
+from image_organizer.image_utils.discovery import FileId, file_id
 from image_organizer.widgets.folders_list.paths_list import PathsList
 
+# * Renaming a folder changes both the folder and its parent, they are looked at once
+SYNC_DELAY_MS = 250
+
 
 class ForbiddenPathError(ValueError):
     def __init__(self, message: str, reason: str, *args: object) -> None:
@@ -62,6 +66,18 @@ class FoldersList(QWidget):
 
         self.folders: set[Path] = set()
 
+        # * Folders are followed by their ids
+        # * when they are renamed or moved within the same parent
+        self._folder_ids: dict[Path, FileId] = {}
+
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.directoryChanged.connect(self._folder_changed_handler)
+
+        self._sync_timer = QTimer(self)
+        self._sync_timer.setSingleShot(True)
+        self._sync_timer.setInterval(SYNC_DELAY_MS)
+        self._sync_timer.timeout.connect(self.sync_folders)
+
         self.forbidden_folders: ForbiddenFoldersFilter = None
         if forbidden_folders is not None:
             self.forbidden_folders = format_forbidden_folders(forbidden_folders)
@@ -142,6 +158,72 @@ class FoldersList(QWidget):
 
         self.folders.add(folder_path)
         self._paths_list.add_path(folder_path)
+        self._watch(folder_path)
+
+    def _watch(self, folder_path: Path) -> None:
+        try:
+            self._folder_ids[folder_path] = file_id(folder_path.stat())
+        except OSError:
+            return
+
+        watched = set(self._watcher.directories())
+        to_watch = [
+            str(path)
+            for path in (folder_path, folder_path.parent)
+            if str(path) not in watched
+        ]
+        if len(to_watch) > 0:
+            self._watcher.addPaths(to_watch)
+
+    def _folder_changed_handler(self, _path: str) -> None:
+        self._sync_timer.start()
+
+    # * The new path of a folder which has been renamed,
+    # * found among the folders next to it
+    def _find_renamed(self, folder_path: Path) -> Path | None:
+        folder_id = self._folder_ids.get(folder_path)
+        if folder_id is None:
+            return None
+
+        try:
+            with os.scandir(folder_path.parent) as entries:
+                for entry in entries:
+                    if entry.is_dir() and file_id(entry.stat()) == folder_id:
+                        return Path(entry.path)
+        except OSError:
+            return None
+
+        return None
+
+    # * Keeps the destinations in line with the disk,
+    # * without ever dropping one from the list
+    def sync_folders(self) -> None:
+        selected = self._paths_list.selectedItems()
+
+        for item in self._paths_list.path_items():
+            folder_path = item.path
+
+            if folder_path.is_dir():
+                item.set_missing(False)
+                self._watch(folder_path)
+
+                continue
+
+            new_path = self._find_renamed(folder_path)
+            if new_path is None or new_path in self.folders:
+                item.set_missing(True)
+                continue
+
+            self.folders.discard(folder_path)
+            self.folders.add(new_path)
+            self._folder_ids.pop(folder_path, None)
+
+            item.set_path(new_path)
+            item.set_missing(False)
+            self._watch(new_path)
+
+            if item in selected:
+                self.selected_path.emit(new_path)
 
     # TODO: Implement a custom QSortFilterProxyModel
     # https://stackoverflow.com/questions/27955403/how-to-use-qsortfilterproxymodels-setfilterregexp-along-with-filteracceptsrow
@@ -2,6 +2,7 @@ from pathlib import Path
 
 from PyQt6 import QtGui
 from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QBrush, QColor
 from PyQt6.QtWidgets import (
     QAbstractItemView,
     QListWidget,
@@ -20,6 +21,9 @@ QListWidget::item:selected {
 }
 """
 
+MISSING_COLOR = '#8d99ae'
+
+
 class PathListItem(QListWidgetItem):
     def __init__(
         self,
@@ -27,11 +31,27 @@ class PathListItem(QListWidgetItem):
         parent: QListWidget | None = None,
         type: QListWidgetItem.ItemType = QListWidgetItem.ItemType.Type,
     ) -> None:
-        text = str(path.absolute())
-        super().__init__(text, parent, type)
+        super().__init__(str(path.absolute()), parent, type)
 
         self.setData(Qt.ItemDataRole.UserRole, path)
 
+    @property
+    def path(self) -> Path:
+        return self.data(Qt.ItemDataRole.UserRole)
+
+    def set_path(self, path: Path) -> None:
+        self.setText(str(path.absolute()))
+        self.setData(Qt.ItemDataRole.UserRole, path)
+
+    # * Folders which have been removed outside of the app stay in the list, greyed out
+    def set_missing(self, is_missing: bool) -> None:
+        if is_missing:
+            self.setForeground(QBrush(QColor(MISSING_COLOR)))
+            self.setToolTip('The folder does not exist anymore')
+        else:
+            self.setForeground(QBrush())
+            self.setToolTip('')
+
 
 class PathsList(QListWidget):
     def __init__(
@@ -54,6 +74,13 @@ class PathsList(QListWidget):
         new_item = PathListItem(path)
         self.addItem(new_item)
 
+    def path_items(self) -> list[PathListItem]:
+        return [
+            item
+            for row in range(self.count())
+            if isinstance(item := self.item(row), PathListItem)
+        ]
+
     def contextMenuEvent(self, a0: QtGui.QContextMenuEvent) -> None:
         super().contextMenuEvent(a0)
 
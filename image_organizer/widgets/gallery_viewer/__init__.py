@@ -1,47 +1,158 @@
 from collections.abc import Iterable
 from pathlib import Path
-
-from PyQt6.QtCore import Qt
-from PyQt6.QtGui import QGuiApplication, QPixmap
-from PyQt6.QtWidgets import QLabel, QVBoxLayout, QWidget
-
-from image_organizer.image_utils.load_and_resize import Dimentions, load_and_resize
-from image_organizer.image_utils.pixmap_cache import PixmapCache
+from time import perf_counter_ns
+
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal
+from PyQt6.QtGui import QFontDatabase, QGuiApplication, QImage, QPixmap
+from PyQt6.QtWidgets import QHBoxLayout, QLabel, QVBoxLayout, QWidget
+
+from image_organizer.defaults import DEFAULT_PREFETCH_AHEAD, DEFAULT_PREFETCH_BEHIND
+from image_organizer.duplicates.duplicate_index import DuplicateIndex
+from image_organizer.duplicates.hash_store import HashedImage
+from image_organizer.image_utils.disk_cache import DiskCache
+from image_organizer.image_utils.image_loader import CURRENT_IMAGE_PRIORITY, ImageLoader
+from image_organizer.image_utils.load_and_resize import (
+    DEFAULT_QUALITY,
+    Dimentions,
+    Quality,
+    size_bucket,
+)
+from image_organizer.image_utils.pixmap_cache import DEFAULT_CACHE_LIMIT, PixmapCache
+from image_organizer.image_utils.previews import load_preview
+from image_organizer.image_utils.thumbnails import THUMBNAIL_DIMENSIONS
+from image_organizer.instrumentation.stage_timings import PERCENTILES, timings
 from image_organizer.utils.format_strings import format_strings
+from image_organizer.widgets.filmstrip import Filmstrip
+from image_organizer.widgets.filmstrip.thumbnail_model import ThumbnailModel
 from image_organizer.widgets.gallery_viewer.image_viewer import ImageViewer
 
+PREFETCH_DELAY_MS = 100
+TIMINGS_UPDATE_MS = 500
+
+# * Images are decoded again at the size of the viewport once resizing settles down
+RESIZE_SETTLE_MS = 200
+
+# * Previews are small and quick, a single thread
+# * keeps them from queueing behind full decodes
+PREVIEW_THREADS = 1
+
+# * Used until the viewer is laid out and its actual size is known
+DEFAULT_DECODE_DIMENSIONS: Dimentions = (1280, 768)
+
+CacheKey = tuple[Path, Dimentions]
+
+
+# * Sorted indices as (first, count) runs,
+# * so removing many rows does not shift the list for each one
+def index_runs(indices: list[int]) -> list[tuple[int, int]]:
+    runs: list[tuple[int, int]] = []
+
+    for index in indices:
+        if len(runs) > 0 and sum(runs[-1]) == index:
+            first, count = runs[-1]
+            runs[-1] = (first, count + 1)
+        else:
+            runs.append((index, 1))
+
+    return runs
+
 
-# TODO: Asyncronous image loading and possibly background tasks for loading beforehand
 class GalleryViewer(QWidget):
+    current_changed = pyqtSignal(object, int)
+
     def __init__(
         self,
         image_paths: Iterable[Path],
-        max_image_dimentions: Dimentions
+        max_image_dimentions: Dimentions | None = None,
+        prefetch_ahead: int = DEFAULT_PREFETCH_AHEAD,
+        prefetch_behind: int = DEFAULT_PREFETCH_BEHIND,
+        quality: Quality = DEFAULT_QUALITY,
+        cache_limit: int = DEFAULT_CACHE_LIMIT,
+        disk_cache: DiskCache | None = None
     ):
         super().__init__()
 
-        self.max_dimentions = max_image_dimentions
+        # * Without fixed dimentions the images are
+        # * decoded to fit the viewport in device pixels
+        self.follows_viewport = max_image_dimentions is None
+        self.max_dimentions = max_image_dimentions or DEFAULT_DECODE_DIMENSIONS
+        self._decoded_dimentions: set[Dimentions] = {self.max_dimentions}
+        self._has_viewport_size = False
+
         self.image_paths = list(image_paths)
 
+        self.prefetch_ahead = prefetch_ahead
+        self.prefetch_behind = prefetch_behind
+
         self.is_cached = False
+        self.is_scanning = False
         self._current_index = 0
-        self._cache = PixmapCache()
+        self._direction = 1
+        self._cache: PixmapCache[CacheKey] = PixmapCache(cache_limit)
+
+        # * Filled in by the hash scanner in the background
+        self.duplicates = DuplicateIndex()
+        self._waiting_for: Path | None = None
+
+        # * Image on screen which is being decoded again at a new size,
+        # * while the old one stays shown
+        self._redecoding: Path | None = None
+
+        # * Image whose preview is on screen while the image itself is being decoded
+        self._previewing: Path | None = None
+        self._navigated_ns = 0
+
+        # * Image to jump to once the scanner finds it,
+        # * dropped as soon as the user navigates
+        self._resume_at: tuple[Path, int] | None = None
+
+        self._loader = ImageLoader(
+            self.max_dimentions,
+            quality,
+            disk_cache,
+            parent=self
+        )
+        self._loader.loaded.connect(self._loaded_handler)
+        self._loader.failed.connect(self._failed_handler)
+
+        self._preview_loader = ImageLoader(
+            THUMBNAIL_DIMENSIONS,
+            disk_cache=disk_cache,
+            max_threads=PREVIEW_THREADS,
+            load_function=load_preview,
+            parent=self
+        )
+        self._preview_loader.loaded.connect(self._preview_loaded_handler)
+
+        # * Shares the list of paths, so the filmstrip never holds a copy of it
+        self.thumbnails = ThumbnailModel(self.image_paths, disk_cache, parent=self)
+
+        # * Neighbours are only prefetched once the navigation settles down,
+        # * so rapid input decodes nothing but the latest target
+        self._prefetch_timer = QTimer(self)
+        self._prefetch_timer.setSingleShot(True)
+        self._prefetch_timer.setInterval(PREFETCH_DELAY_MS)
+        self._prefetch_timer.timeout.connect(self._prefetch)
+
+        self._resize_timer = QTimer(self)
+        self._resize_timer.setSingleShot(True)
+        self._resize_timer.setInterval(RESIZE_SETTLE_MS)
+        self._resize_timer.timeout.connect(self._apply_decode_size)
+
+        self._timings_timer = QTimer(self)
+        self._timings_timer.setInterval(TIMINGS_UPDATE_MS)
+        self._timings_timer.timeout.connect(self._update_timings)
 
         self._layout = QVBoxLayout()
         self.setup_image_layout()
         self.setup_info_labels_layout()
 
-        first_pixmap = self._load(self.current_image_path)
-        if first_pixmap is None:
-            # TODO: Error message?
-            return
-
-        self._update(first_pixmap)
-
         self._layout.addLayout(self.image_layout)
         self._layout.addLayout(self.info_labels_layout)
         self.setLayout(self._layout)
 
+        self.switch_image(0, force_update=True)
+
     def setup_image_layout(self) -> None:
         self.image_layout = QVBoxLayout()
         self.image_layout.setAlignment(Qt.AlignmentFlag.AlignVCenter)
@@ -49,67 +160,409 @@ class GalleryViewer(QWidget):
         self._viewer = ImageViewer(
             self
         )
+        self._viewer.decodeSizeChanged.connect(self._decode_size_changed_handler)
+
+        self.filmstrip = Filmstrip(self.thumbnails, self)
+        self.filmstrip.image_selected.connect(self._filmstrip_selected_handler)
 
         self.image_number_label = QLabel()
 
         self.image_layout.addWidget(self._viewer)
+        self.image_layout.addWidget(self.filmstrip)
         self.image_layout.addWidget(self.image_number_label)
 
     def setup_info_labels_layout(self) -> None:
-        self.info_labels_layout = QVBoxLayout()
+        self.info_labels_layout = QHBoxLayout()
 
         self.image_info_label = QLabel()
+        self.image_info_label.setAlignment(
+            Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignTop
+        )
 
-        self.info_labels_layout.addWidget(self.image_info_label)
+        # * Rolling percentiles of every stage of the image pipeline,
+        # * hidden unless asked for
+        self.timings_label = QLabel()
+        self.timings_label.setFont(QFontDatabase.systemFont(QFontDatabase.SystemFont.FixedFont))
+        self.timings_label.setAlignment(
+            Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignTop
+        )
+        self.timings_label.setVisible(False)
+
+        self.info_labels_layout.addWidget(self.image_info_label, 1)
+        self.info_labels_layout.addWidget(self.timings_label)
+
+    @property
+    def is_empty(self) -> bool:
+        return len(self.image_paths) == 0
+
+    @property
+    def is_resuming(self) -> bool:
+        return self._resume_at is not None
+
+    @property
+    def is_loading(self) -> bool:
+        return self._waiting_for is not None
+
+    @property
+    def current_index(self) -> int:
+        return self._current_index
 
     @property
     def current_image_path(self) -> Path:
         return self.image_paths[self._current_index]
 
+    def _set_waiting_for(self, image_path: Path | None) -> None:
+        if self._waiting_for is None and image_path is not None:
+            QGuiApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
+        elif self._waiting_for is not None and image_path is None:
+            QGuiApplication.restoreOverrideCursor()
+
+        self._waiting_for = image_path
+
+    def _key(self, image_path: Path) -> CacheKey:
+        return image_path, self.max_dimentions
+
+    def _protect_window(self) -> None:
+        self._cache.protect(
+            self._key(image_path)
+            for image_path in [self.current_image_path, *self._prefetch_window()]
+        )
+
     def _load(self, image_path: Path) -> QPixmap | None:
-        cached = self._cache.get(image_path)
-        self.is_cached = False
+        with timings.measure('cache_get'):
+            cached = self._cache.get(self._key(image_path))
+
+        self.is_cached = cached is not None
+        self._redecoding = None
+        self._previewing = None
+        self._navigated_ns = perf_counter_ns()
+
+        self._protect_window()
+
+        self._loader.advance_generation()
+        self._preview_loader.advance_generation()
+        if cached is None:
+            self._loader.request(image_path, CURRENT_IMAGE_PRIORITY)
+            self._set_waiting_for(image_path)
+
+            # * The thumbnail of the filmstrip is shown right away,
+            # * a preview is decoded otherwise
+            thumbnail = self.thumbnails.cached(image_path)
+            if thumbnail is not None:
+                self._show_preview(image_path, thumbnail)
+            else:
+                self._preview_loader.request(image_path, CURRENT_IMAGE_PRIORITY)
+        else:
+            self._set_waiting_for(None)
+
+        self._loader.cancel_stale()
+        self._preview_loader.cancel_stale()
+        self._prefetch_timer.start()
+
+        return cached
+
+    def _record_latency(self, stage: str, image_path: Path) -> None:
+        if timings.enabled:
+            timings.record(stage, self._navigated_ns, perf_counter_ns(), image_path)
+
+    def _show_preview(self, image_path: Path, pixmap: QPixmap) -> None:
+        self._previewing = image_path
+        self._viewer.setPhoto(pixmap, image_path)
+
+        self._update_info()
+        self._update_image_number()
+        self._record_latency('first_pixel', image_path)
+
+    def _prefetch_window(self) -> list[Path]:
+        offsets: list[int] = []
+        for distance in range(1, max(self.prefetch_ahead, self.prefetch_behind) + 1):
+            if distance <= self.prefetch_ahead:
+                offsets.append(distance * self._direction)
+
+            if distance <= self.prefetch_behind:
+                offsets.append(-distance * self._direction)
+
+        window: list[Path] = []
+        for offset in offsets:
+            index = self._current_index + offset
+            if 0 <= index < len(self.image_paths):
+                window.append(self.image_paths[index])
+
+        return window
+
+    def _prefetch(self) -> None:
+        # * Closer images and ones in the direction of movement are decoded first
+        for priority, image_path in enumerate(reversed(self._prefetch_window())):
+            if self._key(image_path) in self._cache:
+                continue
+
+            self._loader.request(image_path, priority)
+
+    def _decode_size_changed_handler(self) -> None:
+        if not self.follows_viewport:
+            return
+
+        # * The first size is applied right away,
+        # * so the first image is not decoded twice
+        if not self._has_viewport_size:
+            self._has_viewport_size = True
+            self._apply_decode_size()
+            return
+
+        self._resize_timer.start()
+
+    def _apply_decode_size(self) -> None:
+        dimentions = size_bucket(self._viewer.decodeSize())
+        if dimentions == self.max_dimentions:
+            return
 
+        self.max_dimentions = dimentions
+        self._decoded_dimentions.add(dimentions)
+        self._loader.set_max_dimensions(dimentions)
+
+        if self.is_empty:
+            return
+
+        image_path = self.current_image_path
+        self._protect_window()
+        self._prefetch_timer.start()
+
+        cached = self._cache.get(self._key(image_path))
         if cached is not None:
-            self.is_cached = True
-            return cached
+            self._redecoding = None
+
+            if self._waiting_for is None:
+                self._viewer.replacePhoto(cached)
+            else:
+                self._set_waiting_for(None)
+                self._update(cached, keep_view=self._previewing == image_path)
+
+            return
+
+        self._loader.request(image_path, CURRENT_IMAGE_PRIORITY)
+
+        # * Without the wait cursor, as the image stays
+        # * on screen scaled to the new size meanwhile
+        if self._waiting_for is None:
+            self._redecoding = image_path
 
-        QGuiApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
-        pixmap = load_and_resize(image_path, self.max_dimentions)
-        if pixmap is not None:
-            self._cache.insert(image_path, pixmap)
+    def _loaded_handler(
+        self,
+        image_path: Path,
+        image: QImage,
+        max_dimentions: Dimentions
+    ) -> None:
+        with timings.measure('from_image', image_path):
+            pixmap = QPixmap.fromImage(image)
+
+        with timings.measure('cache_insert'):
+            self._cache.insert((image_path, max_dimentions), pixmap)
+
+        # * Decodes at a size which has been replaced since are only kept in the cache
+        is_current = not self.is_empty and image_path == self.current_image_path
+        if max_dimentions != self.max_dimentions or not is_current:
+            return
+
+        if image_path == self._waiting_for:
+            # * Without a preview the image itself is the first pixel
+            if self._previewing != image_path:
+                self._record_latency('first_pixel', image_path)
+
+            self._set_waiting_for(None)
+            self._update(pixmap, keep_view=self._previewing == image_path)
+            self._record_latency('full_image', image_path)
+        elif image_path == self._redecoding:
+            self._redecoding = None
+            self._viewer.replacePhoto(pixmap)
+
+    def _preview_loaded_handler(
+        self,
+        image_path: Path,
+        image: QImage,
+        _max_dimentions: Dimentions
+    ) -> None:
+        # * The image itself got there first, or the user has moved on
+        is_current = not self.is_empty and image_path == self.current_image_path
+        if image_path != self._waiting_for or not is_current:
+            return
 
-        QGuiApplication.setOverrideCursor(Qt.CursorShape.ArrowCursor)
-        return pixmap
+        self._show_preview(image_path, QPixmap.fromImage(image))
 
-    def _update(self, pixmap: QPixmap | None) -> None:
-        self._viewer.setPhoto(pixmap)
+    def _failed_handler(self, image_path: Path) -> None:
+        # * The image on screen stays at its old size
+        if image_path == self._redecoding:
+            self._redecoding = None
+
+        if image_path != self._waiting_for:
+            return
+
+        self._set_waiting_for(None)
+        self._previewing = None
+        self._viewer.setPhoto(None)
+        self.image_info_label.setText(
+            f'Could not load {image_path.absolute()}'
+        )
+
+    # * Keeping the view swaps the preview for the image
+    # * without resetting the zoom and the position
+    def _update(self, pixmap: QPixmap | None, keep_view: bool = False) -> None:
+        self._previewing = None
+
+        if pixmap is not None and keep_view:
+            self._viewer.replacePhoto(pixmap)
+        else:
+            image_path = None if pixmap is None else self.current_image_path
+            self._viewer.setPhoto(pixmap, image_path)
 
         if pixmap is None:
             self.image_info_label.setText('No information about the images...')
-            self.image_number_label.setText('0 / 0')
+            self._update_image_number()
 
             return
 
+        self._update_info()
+        self._update_image_number()
+
+    def _update_info(self) -> None:
         formatted_path = str(self.current_image_path.absolute())
         cached_string = '(cached)' if self.is_cached else None
-        cache_size = 'Cache size: {kbytes:.2f} KBytes ({mbytes:.2f} MBytes)'.format(
-            kbytes=self._cache.size_kbytes,
-            mbytes=self._cache.size_mb
+        if self._previewing == self.current_image_path:
+            cached_string = '(preview)'
+        cache_size = (
+            'Cache size: {mbytes:.2f} / {limit:.0f} MBytes, {count} images '
+            '(hits: {hits}, misses: {misses}, evictions: {evictions})'
+        ).format(
+            mbytes=self._cache.size_mb,
+            limit=self._cache.limit_mb,
+            count=len(self._cache),
+            hits=self._cache.hits,
+            misses=self._cache.misses,
+            evictions=self._cache.evictions
         )
 
+        duplicates_count = len(self.duplicates.similar(self.current_image_path))
+        duplicates_string = None
+        if duplicates_count > 0:
+            duplicates_string = (
+                f'{duplicates_count} similar images (Ctrl+D to jump to them)'
+            )
+
         self.image_info_label.setText(
             format_strings(
                 (formatted_path, cached_string),
-                cache_size
+                cache_size,
+                duplicates_string
+            )
+        )
+
+    def _update_image_number(self) -> None:
+        current_number = 0
+        if len(self.image_paths) > 0:
+            current_number = self._current_index + 1
+
+        scanning_string = '(scanning...)' if self.is_scanning else None
+
+        self.image_number_label.setText(
+            format_strings(
+                (f'{current_number} / {len(self.image_paths)}', scanning_string)
             )
         )
 
-        image_number_text = f'{self._current_index + 1} / {len(self.image_paths)}'
-        self.image_number_label.setText(image_number_text)
+    @property
+    def is_showing_timings(self) -> bool:
+        return self._timings_timer.isActive()
+
+    def show_timings(self, visible: bool) -> None:
+        if visible:
+            timings.enable()
+            self._timings_timer.start()
+            self._update_timings()
+        else:
+            self._timings_timer.stop()
+
+        self.timings_label.setVisible(visible)
+
+    def _update_timings(self) -> None:
+        percentiles = ''.join(f'{f"p{percent}":>9}' for percent in PERCENTILES)
+        lines = [f'{"stage, ms":<17}{"n":>6}{percentiles}']
+
+        for stats in timings.stats():
+            values = ''.join(f'{value:>9.2f}' for value in stats.percentiles_ms)
+            lines.append(f'{stats.stage:<17}{stats.count:>6}{values}')
+
+        if len(lines) == 1:
+            lines.append('Nothing has been measured yet...')
+
+        self.timings_label.setText('\n'.join(lines))
+
+    def set_scanning(self, is_scanning: bool) -> None:
+        self.is_scanning = is_scanning
+
+        # * The image is gone, most likely it was moved,
+        # * so the session continues at the same index
+        if not is_scanning and self._resume_at is not None:
+            _, index = self._resume_at
+            self._jump_to(index)
+
+        self._update_image_number()
+
+    def resume_at(self, image_path: Path, index: int) -> None:
+        self._resume_at = (image_path, index)
+
+        if image_path in self.image_paths:
+            self._jump_to(self.image_paths.index(image_path))
+
+    def _jump_to(self, index: int) -> None:
+        self._resume_at = None
+        self.switch_image(index - self._current_index, force_update=True)
+
+    def add_images(self, image_paths: Iterable[Path]) -> None:
+        was_empty = len(self.image_paths) == 0
+        start = len(self.image_paths)
+        image_paths = list(image_paths)
+
+        with self.thumbnails.inserting(start, len(image_paths)):
+            self.image_paths.extend(image_paths)
+
+        if self._resume_at is not None:
+            resume_path, _ = self._resume_at
+
+            for index in range(start, len(self.image_paths)):
+                if self.image_paths[index] == resume_path:
+                    self._jump_to(index)
+                    return
+
+        if was_empty:
+            self.switch_image(0, force_update=True)
+            return
+
+        self._update_image_number()
+        self._prefetch_timer.start()
+
+    # * Puts the images in a new order,
+    # * images left out of it are dropped from the gallery.
+    # * The image on screen stays there, unless it has been left out.
+    def reorder(self, image_paths: Iterable[Path]) -> None:
+        current = None if self.is_empty else self.current_image_path
+
+        image_paths = list(image_paths)
+        with self.thumbnails.resetting():
+            self.image_paths[:] = image_paths
+
+        if current in image_paths:
+            self._current_index = image_paths.index(current)
+            self.filmstrip.set_current_row(self._current_index)
+            self.current_changed.emit(current, self._current_index)
+            self._update_image_number()
+            self._prefetch_timer.start()
+
+            return
+
+        self.switch_image(0, force_update=True)
 
     def switch_image(self, move_by: int, force_update: bool = False) -> bool:
         if len(self.image_paths) == 0:
+            self._set_waiting_for(None)
             self._update(None)
 
             return True
@@ -123,21 +576,186 @@ class GalleryViewer(QWidget):
         if old_index == self._current_index and not force_update:
             return False
 
+        if move_by != 0:
+            self._direction = 1 if move_by > 0 else -1
+
         self._pixmap = self._load(self.current_image_path)
-        if self._pixmap is None:
-            return False
+        if self._pixmap is not None:
+            self._update(self._pixmap)
+            self._record_latency('first_pixel', self.current_image_path)
+            self._record_latency('full_image', self.current_image_path)
+
+        self.filmstrip.set_current_row(self._current_index)
+        self.current_changed.emit(self.current_image_path, self._current_index)
 
-        self._update(self._pixmap)
         return True
 
     def next(self) -> bool:
+        self._resume_at = None
         return self.switch_image(1)
 
     def prev(self) -> bool:
+        self._resume_at = None
         return self.switch_image(-1)
 
+    def add_hashes(self, hashed: list[HashedImage]) -> None:
+        self.duplicates.add_many(hashed)
+
+        if not self.is_empty and self._waiting_for is None and self._viewer.hasPhoto():
+            self._update_info()
+
+    def next_duplicate(self) -> bool:
+        if self.is_empty:
+            return False
+
+        matches = self.duplicates.similar(self.current_image_path)
+        similar = {image_path for _, image_path in matches}
+        if len(similar) == 0:
+            return False
+
+        indices = [
+            index
+            for index, image_path in enumerate(self.image_paths)
+            if image_path in similar
+        ]
+        if len(indices) == 0:
+            return False
+
+        # * Cycles through the duplicates in the order of the gallery
+        following = [index for index in indices if index > self._current_index]
+        target = following[0] if len(following) > 0 else indices[0]
+
+        self._resume_at = None
+        return self.switch_image(target - self._current_index)
+
     def clear_and_switch(self) -> None:
-        self._cache.delete(self.current_image_path)
-        del self.image_paths[self._current_index]
+        self._resume_at = None
+        self.duplicates.remove(self.current_image_path)
+
+        for dimentions in self._decoded_dimentions:
+            self._cache.delete((self.current_image_path, dimentions))
+
+        with self.thumbnails.removing(self._current_index, 1):
+            del self.image_paths[self._current_index]
 
         self.switch_image(0, force_update=True)
+
+    def restore_image(self, image_path: Path, index: int) -> None:
+        # * The folder watcher might have seen the file come back first
+        if image_path in self.image_paths:
+            existing = self.image_paths.index(image_path)
+
+            with self.thumbnails.removing(existing, 1):
+                del self.image_paths[existing]
+
+        index = min(max(index, 0), len(self.image_paths))
+
+        with self.thumbnails.inserting(index, 1):
+            self.image_paths.insert(index, image_path)
+
+        self._current_index = index
+        self.switch_image(0, force_update=True)
+
+    def _forget(self, image_path: Path) -> None:
+        self.duplicates.remove(image_path)
+        self.thumbnails.forget(image_path)
+        self._viewer.forgetImage(image_path)
+
+        for dimentions in self._decoded_dimentions:
+            self._cache.delete((image_path, dimentions))
+
+    # * Images which have turned up on the disk,
+    # * the ones the gallery already has are left out
+    def merge_images(self, image_paths: Iterable[Path]) -> list[Path]:
+        present = set(self.image_paths)
+        added = [image_path for image_path in image_paths if image_path not in present]
+
+        if len(added) > 0:
+            self.add_images(added)
+
+        return added
+
+    # * Images which are gone from the disk,
+    # * the gallery continues with the one after the image on screen
+    def remove_images(self, image_paths: Iterable[Path]) -> None:
+        to_remove = set(image_paths)
+        indices = [
+            index
+            for index, image_path in enumerate(self.image_paths)
+            if image_path in to_remove
+        ]
+        if len(indices) == 0:
+            return
+
+        current = self.current_image_path
+
+        for first, count in reversed(index_runs(indices)):
+            for image_path in self.image_paths[first:first + count]:
+                self._forget(image_path)
+
+            with self.thumbnails.removing(first, count):
+                del self.image_paths[first:first + count]
+
+        self._current_index -= sum(
+            1 for index in indices if index < self._current_index
+        )
+
+        if current in to_remove or self.is_empty:
+            self.switch_image(0, force_update=True)
+            return
+
+        self.filmstrip.set_current_row(self._current_index)
+        self.current_changed.emit(current, self._current_index)
+        self._update_image_number()
+        self._prefetch_timer.start()
+
+    # * Decoded images, thumbnails and hashes move over to the new paths
+    def rename_images(self, renamed: Iterable[tuple[Path, Path]]) -> None:
+        new_paths = dict(renamed)
+        is_current_renamed = False
+
+        for index, image_path in enumerate(self.image_paths):
+            new_path = new_paths.get(image_path)
+            if new_path is None:
+                continue
+
+            self.image_paths[index] = new_path
+            self.duplicates.rename(image_path, new_path)
+            self.thumbnails.rename(image_path, new_path)
+
+            for dimentions in self._decoded_dimentions:
+                pixmap = self._cache.pop((image_path, dimentions))
+                if pixmap is not None:
+                    self._cache.insert((new_path, dimentions), pixmap)
+
+            self.thumbnails.refresh(index)
+            is_current_renamed = is_current_renamed or index == self._current_index
+
+        if not is_current_renamed:
+            return
+
+        # * The image was still being decoded from the old path, which is gone now
+        if self._waiting_for is not None:
+            self.switch_image(0, force_update=True)
+            return
+
+        self._update_info()
+        self.current_changed.emit(self.current_image_path, self._current_index)
+
+    # * Files which have been replaced, everything decoded from the old ones is dropped
+    def refresh_images(self, image_paths: Iterable[Path]) -> None:
+        to_refresh = set(image_paths)
+
+        for index, image_path in enumerate(self.image_paths):
+            if image_path not in to_refresh:
+                continue
+
+            self._forget(image_path)
+            self.thumbnails.refresh(index)
+
+            if index == self._current_index:
+                self.switch_image(0, force_update=True)
+
+    def _filmstrip_selected_handler(self, index: int) -> None:
+        self._resume_at = None
+        self.switch_image(index - self._current_index)
@@ -1,13 +1,53 @@
+from pathlib import Path
+
 from PyQt6 import QtCore, QtGui, QtWidgets
 
-# TODO: Load in higher res images as it it goes deeper.
-# TODO: Support for raw files using https://rawkit.readthedocs.io/en/v0.6.0/api/rawkit.html
+from image_organizer.image_utils.load_and_resize import Dimentions
+from image_organizer.image_utils.pixmap_cache import PixmapCache, resolve_key
+from image_organizer.image_utils.tile_loader import TileLoader
+from image_organizer.image_utils.tiles import (
+    TILE_SIZE,
+    TileIndex,
+    TileKey,
+    choose_level,
+    image_size,
+    level_size,
+    surrounding_tiles,
+    tiles_in_rect,
+)
+
+DEFAULT_TILE_CACHE_LIMIT = 256 * 1024 ** 2 # 256MB
+
+# * Tiles are only requested once zooming or panning settles down
+TILE_UPDATE_DELAY_MS = 50
+
+# * Rings of tiles around the visible ones which are decoded ahead of panning
+TILE_MARGIN = 1
+
+# * Share of the tile cache every decode of a level fills,
+# * so panning around mostly finds the tiles ready
+LEVEL_CACHE_SHARE = 0.5
+
+# * Tiles are cut out as 32 bit pixels
+TILE_BYTES = TILE_SIZE ** 2 * 4
+
+# * Only sent by Qt 6.6 and newer, older versions
+# * pick the new ratio up on the next resize
+DEVICE_PIXEL_RATIO_CHANGE = getattr(QtCore.QEvent.Type, 'DevicePixelRatioChange', None)
 
 
 class ImageViewer(QtWidgets.QGraphicsView):
     photoClicked = QtCore.pyqtSignal(QtCore.QPointF)
 
-    def __init__(self, parent: QtWidgets.QWidget | None = None) -> None:
+    # * Emitted on every resize of the viewport
+    # * and every change of the device pixel ratio
+    decodeSizeChanged = QtCore.pyqtSignal()
+
+    def __init__(
+        self,
+        parent: QtWidgets.QWidget | None = None,
+        tile_cache_limit: int = DEFAULT_TILE_CACHE_LIMIT
+    ) -> None:
         super().__init__(parent)
 
         self._shown = False
@@ -17,6 +57,23 @@ class ImageViewer(QtWidgets.QGraphicsView):
 
         self._photo = QtWidgets.QGraphicsPixmapItem()
 
+        # * Zooming in past the preview resolution
+        # * shows tiles decoded from the original file
+        self._image_path: Path | None = None
+        self._full_size: Dimentions | None = None
+        self._level: int | None = None
+        self._wanted_tiles: set[TileKey] = set()
+        self._tile_items: dict[TileKey, QtWidgets.QGraphicsPixmapItem] = {}
+        self._tile_cache: PixmapCache[TileKey] = PixmapCache(tile_cache_limit)
+
+        self._tile_loader = TileLoader(parent=self)
+        self._tile_loader.loaded.connect(self._tile_loaded_handler)
+
+        self._tile_timer = QtCore.QTimer(self)
+        self._tile_timer.setSingleShot(True)
+        self._tile_timer.setInterval(TILE_UPDATE_DELAY_MS)
+        self._tile_timer.timeout.connect(self._update_tiles)
+
         self._text = QtWidgets.QGraphicsTextItem('No images...')
 
         self._text.hide()
@@ -55,14 +112,36 @@ class ImageViewer(QtWidgets.QGraphicsView):
             if not self._empty:
                 unity = self.transform().mapRect(QtCore.QRectF(0, 0, 1, 1))
                 self.scale(1 / unity.width(), 1 / unity.height())
-                viewrect = self.viewport().rect()
+                viewrect = self._viewport().rect()
                 scenerect = self.transform().mapRect(rect)
                 factor = min(viewrect.width() / scenerect.width(),
                              viewrect.height() / scenerect.height())
                 self.scale(factor, factor)
             self._zoom = 0
 
-    def setPhoto(self, pixmap: QtGui.QPixmap | None = None):
+    def hasPhoto(self) -> bool:
+        return not self._empty
+
+    # * Size of the viewport in device pixels, which is what a fitted image is drawn at
+    def decodeSize(self) -> Dimentions:
+        ratio = self.devicePixelRatioF()
+        size = self._viewport().size()
+
+        return max(1, round(size.width() * ratio)), max(1, round(size.height() * ratio))
+
+    def setPhoto(
+        self,
+        pixmap: QtGui.QPixmap | None = None,
+        image_path: Path | None = None
+    ):
+        if image_path != self._image_path:
+            self._clear_tiles()
+            self._tile_loader.advance_generation()
+            self._tile_loader.clear()
+
+            self._image_path = image_path
+            self._full_size = None
+
         if pixmap and not pixmap.isNull():
             self._empty = False
             self.setDragMode(QtWidgets.QGraphicsView.DragMode.ScrollHandDrag)
@@ -83,6 +162,40 @@ class ImageViewer(QtWidgets.QGraphicsView):
         if self._shown:
             self.fitInView()
 
+    # * The file was replaced on the disk, its tiles and size are read again from it
+    def forgetImage(self, image_path: Path) -> None:
+        self._tile_cache.delete_path(image_path)
+
+        if image_path != self._image_path:
+            return
+
+        self._clear_tiles()
+        self._tile_loader.advance_generation()
+        self._tile_loader.clear()
+        self._full_size = None
+
+    # * Swaps in the same image decoded at another size,
+    # * keeping the zoom and the visible area
+    def replacePhoto(self, pixmap: QtGui.QPixmap) -> None:
+        previous = self._photo.pixmap()
+        if self._empty or previous.isNull() or pixmap.isNull() or self._zoom == 0:
+            self.setPhoto(pixmap, self._image_path)
+            return
+
+        factor = previous.width() / pixmap.width()
+        center = self.mapToScene(self._viewport().rect().center())
+
+        # * Tiles are positioned relative to the preview,
+        # * they are shown again from the tile cache
+        self._clear_tiles()
+        self._photo.setPixmap(pixmap)
+        self.setSceneRect(QtCore.QRectF(pixmap.rect()))
+
+        self.scale(factor, factor)
+        self.centerOn(center / factor)
+
+        self._tile_timer.start()
+
     def wheelEvent(self, event: QtGui.QWheelEvent) -> None:
         if self._empty:
             return
@@ -99,6 +212,166 @@ class ImageViewer(QtWidgets.QGraphicsView):
         else:
             self.scale(factor, factor)
 
+        self._tile_timer.start()
+
+    def scrollContentsBy(self, dx: int, dy: int) -> None:
+        super().scrollContentsBy(dx, dy)
+        self._tile_timer.start()
+
+    def resizeEvent(self, event: QtGui.QResizeEvent | None) -> None:
+        super().resizeEvent(event)
+
+        # * The image keeps filling the view,
+        # * scaled until a decode at the new size replaces it
+        if self._zoom == 0 and not self._empty:
+            self.fitInView()
+
+        self._tile_timer.start()
+        self.decodeSizeChanged.emit()
+
+    def event(self, event: QtCore.QEvent | None) -> bool:
+        if event is not None and DEVICE_PIXEL_RATIO_CHANGE is not None:
+            if event.type() == DEVICE_PIXEL_RATIO_CHANGE:
+                self.decodeSizeChanged.emit()
+
+        return super().event(event)
+
+    # * Created with the view, only the stubs say it might be missing
+    def _viewport(self) -> QtWidgets.QWidget:
+        viewport = self.viewport()
+        assert viewport is not None
+
+        return viewport
+
+    def _clear_tiles(self) -> None:
+        for item in self._tile_items.values():
+            self._scene.removeItem(item)
+
+        self._tile_items.clear()
+        self._wanted_tiles.clear()
+        self._level = None
+
+    def _get_full_size(self) -> Dimentions | None:
+        if self._full_size is None and self._image_path is not None:
+            try:
+                self._full_size = image_size(self._image_path)
+            except Exception:
+                # * Images PIL can not open are only shown as the preview
+                self._image_path = None
+
+        return self._full_size
+
+    def _update_tiles(self) -> None:
+        preview = self._photo.pixmap()
+        full_size = None
+        if self._zoom > 0 and not self._empty:
+            full_size = self._get_full_size()
+
+        if full_size is None or self._image_path is None or preview.isNull():
+            self._clear_tiles()
+            return
+
+        scale = self.transform().m11() * self.devicePixelRatioF()
+        on_screen_width = preview.width() * scale
+        level = choose_level(full_size, on_screen_width)
+        size = level_size(full_size, level)
+
+        # * The preview is already sharp enough at this zoom
+        if size[0] <= preview.width():
+            self._clear_tiles()
+            return
+
+        factor = size[0] / preview.width()
+        visible = self.mapToScene(self._viewport().rect()).boundingRect()
+        visible = visible.intersected(QtCore.QRectF(preview.rect()))
+
+        tiles = tiles_in_rect(
+            size,
+            (
+                visible.left() * factor,
+                visible.top() * factor,
+                visible.right() * factor,
+                visible.bottom() * factor
+            ),
+            TILE_MARGIN
+        )
+
+        resolved_path = resolve_key(self._image_path)
+        self._level = level
+        self._wanted_tiles = {
+            (resolved_path, level, column, row) for column, row in tiles
+        }
+        self._tile_cache.protect(self._wanted_tiles)
+
+        missing: list[TileIndex] = []
+        for key in self._wanted_tiles:
+            if key in self._tile_items:
+                continue
+
+            pixmap = self._tile_cache.get(key)
+            if pixmap is not None:
+                self._show_tile(key, pixmap)
+            elif not self._tile_loader.is_pending(key):
+                missing.append((key[2], key[3]))
+
+        if len(missing) > 0:
+            # * The decode of the level is paid for anyway,
+            # * so the tiles around the visible ones are cut out of it as well
+            budget = int(self._tile_cache.limit_bytes * LEVEL_CACHE_SHARE) // TILE_BYTES
+            for column, row in surrounding_tiles(size, tiles):
+                if len(missing) >= budget:
+                    break
+
+                key = (resolved_path, level, column, row)
+                if key in self._tile_cache or self._tile_loader.is_pending(key):
+                    continue
+
+                missing.append((column, row))
+
+            self._tile_loader.request(self._image_path, level, missing)
+
+        self._remove_hidden_tiles()
+
+    def _show_tile(self, key: TileKey, pixmap: QtGui.QPixmap) -> None:
+        preview = self._photo.pixmap()
+        full_size = self._full_size
+        if full_size is None or preview.isNull():
+            return
+
+        _, level, column, row = key
+        factor = level_size(full_size, level)[0] / preview.width()
+
+        item = QtWidgets.QGraphicsPixmapItem(pixmap, self._photo)
+        item.setTransformationMode(QtCore.Qt.TransformationMode.SmoothTransformation)
+        item.setPos(column * TILE_SIZE / factor, row * TILE_SIZE / factor)
+        item.setScale(1 / factor)
+
+        # * Finer levels are drawn over the coarser ones,
+        # * which stay as a fallback while loading
+        item.setZValue(-level)
+
+        self._tile_items[key] = item
+
+    def _remove_hidden_tiles(self) -> None:
+        is_complete = all(key in self._tile_items for key in self._wanted_tiles)
+
+        for key in list(self._tile_items.keys()):
+            if key in self._wanted_tiles:
+                continue
+
+            if key[1] != self._level and not is_complete:
+                continue
+
+            self._scene.removeItem(self._tile_items.pop(key))
+
+    def _tile_loaded_handler(self, key: TileKey, image: QtGui.QImage) -> None:
+        pixmap = QtGui.QPixmap.fromImage(image)
+        self._tile_cache.insert(key, pixmap)
+
+        if key in self._wanted_tiles and key not in self._tile_items:
+            self._show_tile(key, pixmap)
+            self._remove_hidden_tiles()
+
     def toggleDragMode(self) -> None:
         if self.dragMode() == QtWidgets.QGraphicsView.DragMode.ScrollHandDrag:
             self.setDragMode(QtWidgets.QGraphicsView.DragMode.NoDrag)
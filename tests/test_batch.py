@@ -0,0 +1,31 @@
+import errno
+from pathlib import Path
+
+import pytest
+
+from image_organizer.batch_sort import batch
+from image_organizer.file_operations.move_engine import MoveEngine
+
+
+def test_flush_error_is_reported_with_the_chunk(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch
+) -> None:
+    error = OSError(errno.EIO, 'Input/output error', str(tmp_path / 'sorted'))
+
+    def failing_flush(_: MoveEngine) -> None:
+        raise error
+
+    monkeypatch.setattr(MoveEngine, 'flush', failing_flush)
+
+    moves: list[tuple[str, str]] = []
+    for name in ('a.jpg', 'b.jpg'):
+        source = tmp_path / name
+        source.write_bytes(name.encode())
+        moves.append((str(source), str(tmp_path / 'sorted' / name)))
+
+    failures = batch._move_chunk(moves, verify=False) # pyright: ignore[reportPrivateUsage]
+
+    message = f'Could not finish the chunk: {error}'
+    assert failures == [(str(tmp_path / 'sorted'), message)]
+    assert all(Path(target).exists() for _, target in moves)
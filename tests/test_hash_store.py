@@ -0,0 +1,37 @@
+from pathlib import Path
+
+from image_organizer.duplicates.hash_store import HEADER, RECORD, HashStore
+
+KEY = b'k' * 16
+
+
+def test_opening_a_new_store_does_not_write(tmp_path: Path) -> None:
+    store = HashStore(tmp_path / 'hashes.bin')
+
+    assert store.get(KEY) is None
+    assert not store.path.exists()
+
+
+def test_opening_an_empty_store_does_not_write(tmp_path: Path) -> None:
+    path = tmp_path / 'hashes.bin'
+    HashStore(path).put_many([(KEY, (1, 2))])
+    HashStore(path).clear()
+    modified_ns = path.stat().st_mtime_ns
+
+    assert HashStore(path).get(KEY) is None
+    assert path.stat().st_mtime_ns == modified_ns
+
+
+def test_torn_record_is_dropped_before_appending(tmp_path: Path) -> None:
+    path = tmp_path / 'hashes.bin'
+    HashStore(path).put_many([(KEY, (1, 2))])
+
+    with open(path, 'ab') as file:
+        file.write(b'torn')
+
+    HashStore(path).put_many([(b'n' * 16, (3, 4))])
+
+    store = HashStore(path)
+    assert store.get(KEY) == (1, 2)
+    assert store.get(b'n' * 16) == (3, 4)
+    assert path.stat().st_size == HEADER.size + 2 * RECORD.size
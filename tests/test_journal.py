@@ -0,0 +1,97 @@
+import json
+from pathlib import Path
+
+from image_organizer.file_operations.journal import Journal
+
+
+def undo_count(path: Path) -> int:
+    journal = Journal(path)
+    journal.close()
+
+    return journal.undo_count
+
+
+def read_records(path: Path) -> list[dict[str, object]]:
+    return [json.loads(line) for line in path.read_text(encoding='utf-8').splitlines()]
+
+
+def test_begin_is_on_disk_before_it_returns(tmp_path: Path) -> None:
+    journal = Journal(tmp_path / 'journal.jsonl', group_interval_s=60)
+
+    try:
+        seq = journal.begin('move', tmp_path / 'a.jpg', tmp_path / 'b', 0)
+
+        records = read_records(journal.path)
+        assert [record['type'] for record in records] == ['begin']
+        assert records[0]['seq'] == seq
+    finally:
+        journal.close()
+
+
+def test_commit_and_position_are_written_with_the_next_group(tmp_path: Path) -> None:
+    journal = Journal(tmp_path / 'journal.jsonl', group_interval_s=60)
+
+    try:
+        seq = journal.begin('move', tmp_path / 'a.jpg', tmp_path / 'b', 0)
+        journal.commit(seq, tmp_path / 'b' / 'a.jpg')
+        journal.record_position(tmp_path / 'c.jpg', 1)
+
+        assert len(read_records(journal.path)) == 1
+
+        journal.flush()
+        records = read_records(journal.path)
+        assert [record['type'] for record in records] == ['begin', 'commit', 'position']
+    finally:
+        journal.close()
+
+
+def test_recovery_keeps_a_different_file_at_the_target(tmp_path: Path) -> None:
+    source = tmp_path / 'source' / 'image.jpg'
+    destination = tmp_path / 'destination'
+    source.parent.mkdir()
+    destination.mkdir()
+
+    source.write_bytes(b'the image being moved')
+    (destination / 'image.jpg').write_bytes(b'a file which was already there')
+
+    path = tmp_path / 'journal.jsonl'
+    journal = Journal(path)
+    journal.begin('move', source, destination, 0)
+    journal.close()
+
+    journal = Journal(path)
+    try:
+        messages = journal.recover()
+    finally:
+        journal.close()
+
+    assert source.read_bytes() == b'the image being moved'
+    assert (destination / 'image.jpg').read_bytes() == b'a file which was already there'
+    assert len(messages) == 1
+
+    assert read_records(path)[-1]['type'] == 'abort'
+    assert undo_count(path) == 0
+
+
+def test_recovery_finishes_a_copy_which_went_through(tmp_path: Path) -> None:
+    source = tmp_path / 'source' / 'image.jpg'
+    destination = tmp_path / 'destination'
+    source.parent.mkdir()
+    destination.mkdir()
+
+    source.write_bytes(b'the image being moved')
+    (destination / 'image.jpg').write_bytes(b'the image being moved')
+
+    path = tmp_path / 'journal.jsonl'
+    journal = Journal(path)
+    journal.begin('move', source, destination, 0)
+    journal.close()
+
+    journal = Journal(path)
+    try:
+        journal.recover()
+    finally:
+        journal.close()
+
+    assert not source.exists()
+    assert undo_count(path) == 1
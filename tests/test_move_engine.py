@@ -0,0 +1,72 @@
+import errno
+import os
+from pathlib import Path
+
+import pytest
+
+from image_organizer.file_operations import move_engine
+from image_organizer.file_operations.move_engine import (
+    PARTIAL_SUFFIX,
+    MoveEngine,
+    rename_no_replace,
+)
+
+real_link = os.link
+
+
+# * A bind mount of the same file system, st_dev is equal but the rename is refused
+def cross_device_link(source: Path, target: Path, follow_symlinks: bool = True) -> None:
+    if not source.name.endswith(PARTIAL_SUFFIX):
+        raise OSError(errno.EXDEV, os.strerror(errno.EXDEV))
+
+    real_link(source, target, follow_symlinks=follow_symlinks)
+
+
+def unsupported_link(source: Path, target: Path, follow_symlinks: bool = True) -> None:
+    raise OSError(errno.EPERM, os.strerror(errno.EPERM))
+
+
+def test_cross_device_rename_falls_back_to_a_copy(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(move_engine.os, 'link', cross_device_link)
+
+    source = tmp_path / 'image.jpg'
+    source.write_bytes(b'image')
+    (tmp_path / 'sorted').mkdir()
+
+    with MoveEngine() as engine:
+        target = engine.move(source, tmp_path / 'sorted')
+
+    assert target == tmp_path / 'sorted' / 'image.jpg'
+    assert target.read_bytes() == b'image'
+    assert not source.exists()
+
+
+def test_target_which_appears_is_not_replaced(tmp_path: Path) -> None:
+    source = tmp_path / 'image.jpg'
+    source.write_bytes(b'image')
+    target = tmp_path / 'taken.jpg'
+    target.write_bytes(b'other')
+
+    with pytest.raises(FileExistsError):
+        rename_no_replace(source, target)
+
+    assert source.read_bytes() == b'image'
+    assert target.read_bytes() == b'other'
+
+
+def test_file_systems_without_hard_links_are_renamed(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(move_engine.os, 'link', unsupported_link)
+
+    source = tmp_path / 'image.jpg'
+    source.write_bytes(b'image')
+
+    rename_no_replace(source, tmp_path / 'moved.jpg')
+
+    assert (tmp_path / 'moved.jpg').read_bytes() == b'image'
+    assert not source.exists()
@@ -0,0 +1,142 @@
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+import pytest
+from PIL import Image
+from PyQt6.QtGui import QImage
+
+from image_organizer.image_utils.load_and_resize import pil2qimage, to_pixmap_format
+
+SIZE = (67, 43)
+
+# * 12 bit and 16 bit values are scaled down by a bit shift,
+# * which divides by 16 or 256 instead of 4095 / 255 or 65535 / 255,
+# * the rest are stretched between their extremes and rounded
+TONE_MAPPED_TOLERANCE = 1.0
+
+EXACT_MODES = ('RGB', 'RGBA', 'RGBX', 'L', 'LA', '1', 'P', 'PA', 'CMYK', 'YCbCr')
+TONE_MAPPED_MODES = ('I;16', 'I;16B', 'I', 'F')
+
+
+# * Noise, so no conversion gets away with a shortcut
+def make_image(mode: str) -> Image.Image:
+    gray = Image.effect_noise(SIZE, 64)
+    rgb = Image.merge(
+        'RGB',
+        (gray, gray.transpose(Image.Transpose.FLIP_LEFT_RIGHT), gray.rotate(180))
+    )
+
+    if mode in ('L', '1'):
+        return gray.convert(mode)
+
+    if mode in ('LA', 'RGBA', 'PA'):
+        image = rgb.convert('RGBA')
+        image.putalpha(gray.rotate(90, expand=False))
+        return image.convert(mode)
+
+    if mode == 'P':
+        return rgb.quantize(256)
+
+    return rgb.convert(mode)
+
+
+# * 12 bit values, negative ones and a float range,
+# * like scanners, RAW exports and HDR files store them
+def make_high_bit_depth_image(mode: str) -> Image.Image:
+    pixels = np.asarray(Image.effect_noise(SIZE, 64))
+
+    if mode == 'I;16':
+        return Image.fromarray(pixels.astype(np.uint16) * 16)
+
+    if mode == 'I;16B':
+        return Image.frombytes('I;16B', SIZE, (pixels.astype('>u2') * 16).tobytes())
+
+    if mode == 'I':
+        return Image.fromarray(pixels.astype(np.int32) * 257 - 32768)
+
+    return Image.fromarray(pixels.astype(np.float32) / 255)
+
+
+def rgba_pixels(image: QImage) -> npt.NDArray[Any]:
+    converted = image.convertToFormat(QImage.Format.Format_RGBA8888) # pyright: ignore[reportUnknownMemberType]
+    width, height = converted.width(), converted.height()
+
+    bits = converted.constBits()
+    assert bits is not None
+
+    data = bits.asstring(converted.sizeInBytes())
+    rows = np.frombuffer(data, dtype=np.uint8).reshape(height, converted.bytesPerLine())
+    return rows[:, :width * 4].reshape(height, width, 4).copy()
+
+
+def expected_gray(image: Image.Image) -> npt.NDArray[np.float64]:
+    pixels = np.asarray(image, dtype=np.float64)
+    low = min(float(pixels.min()), 0.0)
+    high = float(pixels.max())
+
+    if image.mode == 'F':
+        high = max(high, 1.0)
+    elif low == 0:
+        high = 2 ** max(8, int(high).bit_length()) - 1
+
+    return (pixels - low) * 255 / (high - low)
+
+
+@pytest.mark.parametrize('mode', EXACT_MODES)
+def test_modes_convert_like_pil_does(mode: str) -> None:
+    image = make_image(mode)
+    assert image.mode == mode
+
+    expected = np.asarray(image.convert('RGBA'))
+    pixels = rgba_pixels(pil2qimage(image))
+
+    np.testing.assert_array_equal(pixels, expected)
+
+
+@pytest.mark.parametrize('mode', TONE_MAPPED_MODES)
+def test_high_bit_depth_modes_are_tone_mapped(mode: str) -> None:
+    image = make_high_bit_depth_image(mode)
+    assert image.mode == mode
+
+    qimage = pil2qimage(image)
+    assert qimage.format() == QImage.Format.Format_Grayscale8
+
+    pixels = rgba_pixels(qimage)
+    difference = np.abs(pixels[..., :3] - expected_gray(image)[..., None])
+
+    assert difference.max() <= TONE_MAPPED_TOLERANCE
+    assert (pixels[..., 3] == 255).all()
+
+
+def test_transparent_palette_color_is_kept() -> None:
+    image = make_image('P')
+    image.info['transparency'] = 0
+
+    expected = np.asarray(image.convert('RGBA'))
+    np.testing.assert_array_equal(rgba_pixels(pil2qimage(image)), expected)
+
+
+@pytest.mark.parametrize(
+    ('mode', 'expected_format'),
+    [
+        ('L', QImage.Format.Format_Grayscale8),
+        ('P', QImage.Format.Format_Indexed8),
+        ('RGB', QImage.Format.Format_RGB32),
+        ('RGBA', QImage.Format.Format_ARGB32_Premultiplied)
+    ]
+)
+def test_pixmap_format_expands_only_what_it_has_to(
+    mode: str,
+    expected_format: QImage.Format
+) -> None:
+    image = make_image(mode)
+    qimage = pil2qimage(image)
+    converted = to_pixmap_format(qimage)
+
+    assert converted.format() == expected_format
+
+    # * Premultiplying loses the color of the almost transparent pixels
+    if mode != 'RGBA':
+        np.testing.assert_array_equal(rgba_pixels(converted), rgba_pixels(qimage))
+
@@ -0,0 +1,31 @@
+import os
+from pathlib import Path
+
+import pytest
+from PyQt6.QtCore import QCoreApplication
+from PyQt6.QtGui import QGuiApplication, QPixmap
+
+from image_organizer.image_utils.pixmap_cache import PixmapCache, resolve_key
+
+
+@pytest.fixture(scope='module', autouse=True)
+def application() -> QCoreApplication:
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    return QGuiApplication.instance() or QGuiApplication([])
+
+
+def test_delete_path_drops_every_entry_of_the_file(tmp_path: Path) -> None:
+    replaced = tmp_path / 'replaced.jpg'
+    kept = tmp_path / 'kept.jpg'
+    pixmap = QPixmap(16, 16)
+
+    cache: PixmapCache[object] = PixmapCache()
+    cache.insert(replaced, pixmap)
+    cache.insert((replaced, (1280, 720)), pixmap)
+    cache.insert((resolve_key(replaced), 0, 1, 2), pixmap)
+    cache.insert((kept, (1280, 720)), pixmap)
+
+    assert cache.delete_path(replaced) == 3
+    assert len(cache) == 1
+    assert (kept, (1280, 720)) in cache
+    assert cache.size_bytes == 16 * 16 * pixmap.depth() // 8
@@ -0,0 +1,297 @@
+import io
+import struct
+from dataclasses import dataclass
+
+import pytest
+from PIL import Image
+
+from image_organizer.image_utils.raw_previews import (
+    COMPRESSION_TAG,
+    EXIF_IFD_TAG,
+    JPEG_LENGTH_TAG,
+    JPEG_OFFSET_TAG,
+    ORIENTATION_TAG,
+    PHOTOMETRIC_TAG,
+    STRIP_BYTE_COUNTS_TAG,
+    STRIP_OFFSETS_TAG,
+    SUB_IFDS_TAG,
+    find_preview,
+    jpeg_size,
+)
+
+LONG = 4
+
+PREVIEW_SIZE = (320, 240)
+THUMBNAIL_SIZE = (64, 48)
+
+# * The header of a lossless JPEG, which is how CR2 and DNG store the sensor data
+LOSSLESS_JPEG = b'\xff\xd8\xff\xc3\x00\x0b\x0c\x17\x70\x1f\x40\x01\x01\x11\x00'
+
+OLD_STYLE_JPEG = 6
+NEW_STYLE_JPEG = 7
+UNCOMPRESSED = 1
+COLOR_FILTER_ARRAY = 32803
+
+# * Past the end of any of the containers
+OUT_OF_RANGE = 0x7fff_0000
+
+
+# * Offset of another IFD of the same container
+@dataclass(frozen=True)
+class At:
+    index: int
+
+
+Value = int | bytes | At
+
+
+@dataclass
+class Ifd:
+    # * Every value is stored as a LONG,
+    # * bytes are stored after the IFDs and replaced with their offset
+    tags: dict[int, list[Value]]
+    next: Value = 0
+
+
+# * Header, the IFDs, values which do not fit into the entries and then the blobs,
+# * like a camera writes them
+def build_container(ifds: list[Ifd], byte_order: str = '<') -> bytes:
+    offsets: list[int] = []
+    position = 8
+    for ifd in ifds:
+        offsets.append(position)
+        position += 2 + len(ifd.tags) * 12 + 4
+
+    external: dict[tuple[int, int], int] = {}
+    for index, ifd in enumerate(ifds):
+        for tag, values in ifd.tags.items():
+            if len(values) > 1:
+                external[(index, tag)] = position
+                position += 4 * len(values)
+
+    blobs: dict[int, int] = {}
+    for ifd in ifds:
+        tag_values = [value for values in ifd.tags.values() for value in values]
+        for value in [*tag_values, ifd.next]:
+            if isinstance(value, bytes) and id(value) not in blobs:
+                blobs[id(value)] = position
+                position += len(value)
+
+    def resolve(value: Value) -> int:
+        if isinstance(value, At):
+            return offsets[value.index]
+
+        if isinstance(value, bytes):
+            return blobs[id(value)]
+
+        return value
+
+    output = bytearray(position)
+    output[:2] = b'II' if byte_order == '<' else b'MM'
+    struct.pack_into(f'{byte_order}HI', output, 2, 42, offsets[0])
+
+    for index, ifd in enumerate(ifds):
+        offset = offsets[index]
+        struct.pack_into(f'{byte_order}H', output, offset, len(ifd.tags))
+
+        for entry_index, (tag, values) in enumerate(sorted(ifd.tags.items())):
+            entry = offset + 2 + entry_index * 12
+            resolved = [resolve(value) for value in values]
+            values_offset = external.get((index, tag), entry + 8)
+
+            struct.pack_into(f'{byte_order}HHI', output, entry, tag, LONG, len(values))
+            if values_offset != entry + 8:
+                struct.pack_into(f'{byte_order}I', output, entry + 8, values_offset)
+
+            values_format = f'{byte_order}{len(resolved)}I'
+            struct.pack_into(values_format, output, values_offset, *resolved)
+
+            for value in values:
+                if isinstance(value, bytes):
+                    output[blobs[id(value)]:blobs[id(value)] + len(value)] = value
+
+        next_entry = offset + 2 + len(ifd.tags) * 12
+        struct.pack_into(f'{byte_order}I', output, next_entry, resolve(ifd.next))
+
+    return bytes(output)
+
+
+def jpeg(size: tuple[int, int], progressive: bool = False) -> bytes:
+    data = io.BytesIO()
+    image = Image.linear_gradient('L').resize(size).convert('RGB')
+    image.save(data, 'JPEG', progressive=progressive)
+
+    return data.getvalue()
+
+
+def jpeg_tags(data: bytes) -> dict[int, list[Value]]:
+    return {JPEG_OFFSET_TAG: [data], JPEG_LENGTH_TAG: [len(data)]}
+
+
+def strip_tags(
+    data: bytes,
+    compression: int,
+    photometric: int = 2
+) -> dict[int, list[Value]]:
+    return {
+        COMPRESSION_TAG: [compression],
+        PHOTOMETRIC_TAG: [photometric],
+        STRIP_OFFSETS_TAG: [data],
+        STRIP_BYTE_COUNTS_TAG: [len(data)]
+    }
+
+
+@pytest.mark.parametrize('progressive', [False, True])
+def test_jpeg_size_reads_the_frame_header(progressive: bool) -> None:
+    data = b'padding' + jpeg(PREVIEW_SIZE, progressive)
+
+    assert jpeg_size(data, 7, len(data) - 7) == PREVIEW_SIZE
+
+
+def test_jpeg_size_skips_lossless_frames() -> None:
+    assert jpeg_size(LOSSLESS_JPEG, 0, len(LOSSLESS_JPEG)) is None
+
+
+@pytest.mark.parametrize(
+    'data',
+    [
+        b'\x00\x00' + jpeg(THUMBNAIL_SIZE)[2:],
+        jpeg(THUMBNAIL_SIZE)[:20],
+        b'\xff\xd8\xff\xda\x00\x02'
+    ],
+    ids=['not a jpeg', 'cut before the frame', 'scan before the frame']
+)
+def test_jpeg_size_gives_up_on_broken_headers(data: bytes) -> None:
+    assert jpeg_size(data, 0, len(data)) is None
+
+
+def test_jpeg_size_stays_within_the_length() -> None:
+    data = jpeg(THUMBNAIL_SIZE)
+
+    assert jpeg_size(data, 0, 20) is None
+
+
+# * CR2: the preview as an old style JPEG strip in IFD0, the thumbnail in IFD1
+# * and the sensor data as a lossless JPEG strip in IFD3
+def test_finds_the_biggest_preview_in_the_chain() -> None:
+    data = build_container([
+        Ifd(
+            {ORIENTATION_TAG: [6], **strip_tags(jpeg(PREVIEW_SIZE), OLD_STYLE_JPEG)},
+            At(1)
+        ),
+        Ifd(jpeg_tags(jpeg(THUMBNAIL_SIZE)), At(2)),
+        Ifd({COMPRESSION_TAG: [UNCOMPRESSED]}, At(3)),
+        Ifd(strip_tags(LOSSLESS_JPEG + bytes(1024), OLD_STYLE_JPEG))
+    ])
+
+    preview = find_preview(data)
+
+    assert preview is not None
+    assert (preview.width, preview.height) == PREVIEW_SIZE
+    assert preview.orientation == 6
+    assert data[preview.offset:preview.offset + preview.length] == jpeg(PREVIEW_SIZE)
+
+
+# * NEF: big endian, the thumbnail in IFD0,
+# * the preview and the sensor data in its SubIFDs
+def test_finds_the_preview_in_sub_ifds() -> None:
+    data = build_container([
+        Ifd({
+            ORIENTATION_TAG: [8],
+            **jpeg_tags(jpeg(THUMBNAIL_SIZE)),
+            SUB_IFDS_TAG: [At(1), At(2)],
+            EXIF_IFD_TAG: [At(3)]
+        }),
+        Ifd({COMPRESSION_TAG: [OLD_STYLE_JPEG], **jpeg_tags(jpeg(PREVIEW_SIZE))}),
+        Ifd(strip_tags(bytes(4096), UNCOMPRESSED, COLOR_FILTER_ARRAY)),
+        Ifd({0x9000: [230]})
+    ], byte_order='>')
+
+    preview = find_preview(data)
+
+    assert preview is not None
+    assert (preview.width, preview.height) == PREVIEW_SIZE
+    assert preview.orientation == 8
+
+
+# * DNG stores even the sensor data as a baseline JPEG at times,
+# * only its photometric interpretation tells it apart
+def test_sensor_data_is_never_the_preview() -> None:
+    data = build_container([
+        Ifd({SUB_IFDS_TAG: [At(1), At(2)]}),
+        Ifd(strip_tags(jpeg((640, 480)), NEW_STYLE_JPEG, COLOR_FILTER_ARRAY)),
+        Ifd(strip_tags(jpeg(PREVIEW_SIZE), NEW_STYLE_JPEG, 6))
+    ])
+
+    preview = find_preview(data)
+
+    assert preview is not None
+    assert (preview.width, preview.height) == PREVIEW_SIZE
+    assert preview.orientation == 1
+
+
+@pytest.mark.parametrize(
+    'ifds',
+    [
+        [Ifd(jpeg_tags(jpeg(THUMBNAIL_SIZE)), At(0))],
+        [Ifd(jpeg_tags(jpeg(THUMBNAIL_SIZE)), At(1)), Ifd({}, At(0))],
+        [
+            Ifd({**jpeg_tags(jpeg(THUMBNAIL_SIZE)), SUB_IFDS_TAG: [At(1)]}),
+            Ifd({SUB_IFDS_TAG: [At(0)]})
+        ]
+    ],
+    ids=['next is itself', 'chain loops back', 'sub ifds loop back']
+)
+def test_ifd_loops_are_visited_once(ifds: list[Ifd]) -> None:
+    preview = find_preview(build_container(ifds))
+
+    assert preview is not None
+    assert (preview.width, preview.height) == THUMBNAIL_SIZE
+
+
+@pytest.mark.parametrize(
+    'ifd',
+    [
+        Ifd(jpeg_tags(jpeg(THUMBNAIL_SIZE)), OUT_OF_RANGE),
+        Ifd({
+            **jpeg_tags(jpeg(THUMBNAIL_SIZE)),
+            SUB_IFDS_TAG: [OUT_OF_RANGE, OUT_OF_RANGE + 1]
+        }),
+        Ifd({**jpeg_tags(jpeg(THUMBNAIL_SIZE)), EXIF_IFD_TAG: [OUT_OF_RANGE]})
+    ],
+    ids=['next', 'sub ifds', 'exif ifd']
+)
+def test_ifds_past_the_end_are_skipped(ifd: Ifd) -> None:
+    preview = find_preview(build_container([ifd]))
+
+    assert preview is not None
+    assert (preview.width, preview.height) == THUMBNAIL_SIZE
+
+
+def test_previews_past_the_end_are_skipped() -> None:
+    data = build_container([
+        Ifd({**jpeg_tags(jpeg(THUMBNAIL_SIZE)), SUB_IFDS_TAG: [At(1)]}),
+        Ifd({JPEG_OFFSET_TAG: [OUT_OF_RANGE], JPEG_LENGTH_TAG: [1024]})
+    ])
+
+    preview = find_preview(data)
+
+    assert preview is not None
+    assert (preview.width, preview.height) == THUMBNAIL_SIZE
+
+
+# * The preview is cut short, as it is in a file which was not copied completely
+def test_truncated_preview_is_not_found() -> None:
+    data = build_container([Ifd(jpeg_tags(jpeg(PREVIEW_SIZE)))])
+
+    assert find_preview(data[:len(data) // 2]) is None
+
+
+@pytest.mark.parametrize(
+    'data',
+    [b'\x89PNG\r\n\x1a\n', b'II\x55\x00\x08\x00\x00\x00'],
+    ids=['not a tiff', 'other magic']
+)
+def test_other_containers_are_refused(data: bytes) -> None:
+    with pytest.raises(ValueError):
+        find_preview(data)
@@ -0,0 +1,158 @@
+import mmap
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image, ImageOps
+from PyQt6.QtGui import QImage
+
+from image_organizer.image_utils import load_and_resize, tile_loader
+from image_organizer.image_utils.mapped_decode import Block, MappedLayout, read_region
+from image_organizer.image_utils.tile_loader import LevelCache
+from image_organizer.image_utils.tiles import (
+    TILE_SIZE,
+    decode_level,
+    decode_tiles,
+    image_size,
+    level_size,
+    read_mapped_tiles,
+    surrounding_tiles,
+)
+
+# * Rotated by 90 degrees, so the stored and the shown sizes differ
+ROTATED = 6
+
+
+@pytest.fixture
+def rotated_jpeg(tmp_path: Path) -> Path:
+    image_path = tmp_path / 'rotated.jpg'
+    exif = Image.Exif()
+    exif[0x0112] = ROTATED
+
+    image = Image.linear_gradient('L').resize((1500, 1000)).convert('RGB')
+    image.save(image_path, exif=exif)
+    return image_path
+
+
+@pytest.mark.parametrize('level', [0, 1, 2])
+def test_levels_have_the_size_of_the_oriented_image(
+    rotated_jpeg: Path,
+    level: int
+) -> None:
+    full_size = image_size(rotated_jpeg)
+
+    assert full_size == (1000, 1500)
+    assert decode_level(rotated_jpeg, level).size == level_size(full_size, level)
+
+
+def test_full_resolution_level_is_oriented(rotated_jpeg: Path) -> None:
+    with Image.open(rotated_jpeg) as image:
+        expected = ImageOps.exif_transpose(image)
+
+    assert decode_level(rotated_jpeg, 0).tobytes() == expected.tobytes()
+
+
+def test_tiles_are_cut_in_the_given_order(rotated_jpeg: Path) -> None:
+    tiles = [(1, 2), (0, 0), (1, 0)]
+    decoded = list(decode_tiles(rotated_jpeg, 0, tiles))
+
+    assert [tile for tile, _ in decoded] == tiles
+    assert [(image.width(), image.height()) for _, image in decoded] == [
+        (1000 - TILE_SIZE, 1500 - 2 * TILE_SIZE),
+        (TILE_SIZE, TILE_SIZE),
+        (1000 - TILE_SIZE, TILE_SIZE)
+    ]
+
+
+# * PIL writes TIFFs as strips and BMPs from the bottom up, with rows padded to 4 bytes
+@pytest.mark.parametrize('name', ['image.tif', 'image.bmp'])
+def test_mapped_tiles_match_the_decoded_level(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    name: str
+) -> None:
+    monkeypatch.setattr(load_and_resize, 'MAPPED_DECODE_MIN_BYTES', 0)
+
+    image_path = tmp_path / name
+    gradient = Image.linear_gradient('L').resize((1301, 900))
+    channels = (gradient, gradient.rotate(90), gradient.rotate(180))
+    Image.merge('RGB', channels).save(image_path)
+
+    tiles = [(2, 1), (0, 0), (1, 1)]
+    mapped = read_mapped_tiles(image_path, tiles)
+
+    decoded_tiles = decode_tiles(image_path, 0, tiles)
+
+    assert mapped is not None
+    for (tile, image), (decoded_tile, decoded) in zip(mapped, decoded_tiles):
+        assert tile == decoded_tile
+        converted = image.convertToFormat(QImage.Format.Format_RGB32) # pyright: ignore[reportUnknownMemberType]
+        assert converted == decoded
+
+
+def test_regions_are_read_across_tiles() -> None:
+    pixels = np.arange(40 * 30 * 3, dtype=np.uint8).reshape(30, 40, 3)
+    tile = 16
+    origins = [(x, y) for y in range(0, 30, tile) for x in range(0, 40, tile)]
+    blocks: list[Block] = []
+
+    with mmap.mmap(-1, len(origins) * tile * tile * 3) as data:
+        for index, (x, y) in enumerate(origins):
+            padded = np.zeros((tile, tile, 3), np.uint8)
+            block = pixels[y:y + tile, x:x + tile]
+            padded[:block.shape[0], :block.shape[1]] = block
+
+            offset = index * tile * tile * 3
+            data[offset:offset + padded.nbytes] = padded.tobytes()
+            blocks.append(Block(offset, x, y, block.shape[1], block.shape[0], tile * 3))
+
+        layout = MappedLayout(40, 30, np.dtype('u1'), 3, (0, 1, 2), 'RGB', blocks)
+        region = read_region(data, layout, (10, 5, 37, 29))
+
+    np.testing.assert_array_equal(region, pixels[5:29, 10:37])
+
+
+def test_compressed_files_are_not_mapped(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(load_and_resize, 'MAPPED_DECODE_MIN_BYTES', 0)
+
+    image_path = tmp_path / 'image.tif'
+    Image.linear_gradient('L').save(image_path, compression='tiff_lzw')
+
+    assert read_mapped_tiles(image_path, [(0, 0)]) is None
+
+
+def test_level_is_decoded_once_per_generation(
+    rotated_jpeg: Path,
+    monkeypatch: pytest.MonkeyPatch
+) -> None:
+    decoded: list[int] = []
+
+    def counting_decode(image_path: Path, level: int) -> Image.Image:
+        decoded.append(level)
+        return decode_level(image_path, level)
+
+    monkeypatch.setattr(tile_loader, 'decode_level', counting_decode)
+    levels = LevelCache()
+
+    assert levels.get(rotated_jpeg, 0, 0) is levels.get(rotated_jpeg, 0, 0)
+    assert decoded == [0]
+
+    levels.clear(1)
+    levels.get(rotated_jpeg, 0, 0)
+    levels.get(rotated_jpeg, 0, 1)
+    levels.get(rotated_jpeg, 0, 1)
+
+    assert decoded == [0, 0, 0]
+
+
+def test_surrounding_tiles_start_closest_to_the_given_ones() -> None:
+    size = (5 * TILE_SIZE, 5 * TILE_SIZE)
+    surrounding = surrounding_tiles(size, [(2, 2)])
+
+    assert len(surrounding) == 24
+    assert (2, 2) not in surrounding
+    assert set(surrounding[:4]) == {(1, 2), (3, 2), (2, 1), (2, 3)}
+    assert set(surrounding[-4:]) == {(0, 0), (4, 0), (0, 4), (4, 4)}